@@ -1,11 +1,65 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from werkzeug.utils import secure_filename
 import os
+import numpy as np
 import pandas as pd
 import json
+import time
+
+from enrichment import (
+    TEAM_TRY_ORIGIN_CATEGORIES,
+    add_game_time_columns,
+    calcular_origen_tries,
+    game_seconds_by_halves,
+    game_seconds_by_periods,
+    half_boundaries,
+    half_time_groups,
+)
+from app_logging import configure_logging, get_logger, init_request_timing
+from conversions import (
+    EXCEL_EXTENSIONS,
+    XML_EXTENSIONS,
+    convert_excel,
+    convert_xml,
+    output_paths,
+    parse_xml_profile,
+    save_upload,
+)
+import db_events
+import event_store
+from event_index import EventIndex
+from event_query import LoadedMatch, QueryError
+from events_table import parse_table_args, stream_events_table
+from excel_ingest import WorkbookCache
+from job_queue import JobQueue
+from live_matches import InvalidEvents, LiveMatchRegistry, MatchFinalized, parse_events, parse_match_id, sse_stream
+from match_cache import MatchCache
+from match_registry import MatchRegistry
+from player_stats import PlayerStatsCache
+from prepared_response import PreparedJSON
+from serialization import frame_to_records
+from setpiece_cube import SetPieceCubeCache
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
+# Tamaño máximo de los archivos subidos a /upload
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', '100')) * 1024 * 1024
+
+# TRY_ORIGIN_BY_TEAM=1: el origen de un try es el último origen del mismo equipo
+# (como en la importación de XML) y no el último de cualquier equipo
+if os.getenv('TRY_ORIGIN_BY_TEAM', '0') == '1':
+    TRY_ORIGIN_OPTIONS = {"by_team": True, "origin_categories": TEAM_TRY_ORIGIN_CATEGORIES}
+else:
+    TRY_ORIGIN_OPTIONS = {}
+
+# EVENTS_SOURCE=db: /events lee la tabla Event (partidos importados a la base) en lugar de los JSON
+EVENTS_SOURCE = os.getenv('EVENTS_SOURCE', 'json')
+
+configure_logging()
+init_request_timing(app)
+log_carga = get_logger("loading")
+log_enriquecimiento = get_logger("enrichment")
 
 # Asegúrate de que el directorio de uploads exista
 UPLOAD_FOLDER = '/app/uploads/'
@@ -27,136 +81,190 @@ try:
     with open(matches_json_path, 'r') as f:
         df_partidos = pd.DataFrame(json.load(f))
 except FileNotFoundError:
-    print(f"Archivo no encontrado: {matriz_json_path} o {matches_json_path}")
+    log_carga.warning("Archivo no encontrado: %s o %s", matriz_json_path, matches_json_path)
     df = pd.DataFrame()
     df_partidos = pd.DataFrame()
 except Exception as e:
-    print(f"Error al leer el archivo: {e}")
+    log_carga.error("Error al leer el archivo: %s", e)
     df = pd.DataFrame()
     df_partidos = pd.DataFrame()
 
-# Función para calcular el origen de los tries
-def calcular_origen_tries(df):
+# Verifica si la columna 'POINTS' existe antes de llamar a la función
+if 'POINTS' in df.columns:
+    df = calcular_origen_tries(df, **TRY_ORIGIN_OPTIONS)
+else:
+    log_carga.warning("La columna 'POINTS' no existe en el DataFrame")
+
+log_carga.info("Matriz cargada: %d eventos, %d columnas", len(df), len(df.columns))
+
+# Índices por categoría, jugador, equipo y periodo para /events/table
+df_index = EventIndex(df)
+
+# Respuestas de partidos ya enriquecidas y serializadas, invalidadas por mtime/tamaño del archivo
+match_cache = MatchCache()
+
+# Partidos disponibles en uploads/, cargados bajo demanda
+match_registry = MatchRegistry(UPLOAD_FOLDER)
+
+# Almacén Parquet de los partidos de uploads/ para las consultas de temporada
+season_store = event_store.EventStore(os.path.join(UPLOAD_FOLDER, 'event_store'))
+
+# Estadísticas por jugador materializadas por versión de los datos
+player_stats = PlayerStatsCache()
+set_piece_cubes = SetPieceCubeCache()
+
+# Partidos que se están etiquetando en vivo, enriquecidos a medida que llegan eventos
+live_matches = LiveMatchRegistry(TRY_ORIGIN_OPTIONS)
+
+# Hojas de los Excel ya parseadas y conversiones hechas, por hash del archivo
+workbook_cache = WorkbookCache()
+
+# Conversiones de archivos subidos, ejecutadas en segundo plano
+conversion_jobs = JobQueue()
+
+def enriquecer_partido(matriz_path, matches_path):
+    """Lee y enriquece un partido; devuelve (eventos, cabecera) o None si no hay datos"""
+    with open(matriz_path, 'r') as f:
+        df = pd.DataFrame(json.load(f))
+    
+    # Calcular origen de tries (un partido sin tries, p. ej. uno en vivo, no trae POINTS)
     if 'POINTS' not in df.columns:
-        raise KeyError("La columna 'POINTS' no existe en el DataFrame")
+        df['POINTS'] = None
+    df = calcular_origen_tries(df, **TRY_ORIGIN_OPTIONS)
+
+    if df.empty:
+        return None
 
-    origin_categories = ["TURNOVER+", "SCRUM", "LINEOUT", "KICKOFF"]
-    tries_events = df[df['POINTS'] == "TRY"]
+    columns_to_include = ['ID', 'OPPONENT', 'SECOND', 'DURATION', 'CATEGORY', 'TEAM', 'COORDINATE_X', 'COORDINATE_Y', 'SECTOR', 'PLAYER', 'SCRUM_RESULT', 'ADVANCE', 'LINE_RESULT', 'LINE_QUANTITY', 'LINE_POSITION', 'LINE_THROWER', 'LINE_RECEIVER', 'LINE_PLAY', 'OPPONENT_JUMPER', 'BREAK_TYPE', 'BREAK_CHANNEL', 'TURNOVER_TYPE', 'INFRACTION_TYPE', 'KICK_TYPE', 'SQUARE', 'RUCK_SPEED', 'POINTS', 'POINTS(VALUE)', 'PERIODS', 'GOAL_KICK', 'TRY_ORIGIN', 'YELLOW-CARD', 'RED-CARD']
 
-    def get_origin_event(try_event):
-        try_time = try_event['SECOND']
-        relevant_events = df[(df['CATEGORY'].isin(origin_categories)) & (df['SECOND'] < try_time)]
-        return relevant_events.iloc[-1]['CATEGORY'] if not relevant_events.empty else None
+    # Asegúrate de que todas las columnas existan en el DataFrame
+    for column in columns_to_include:
+        if column not in df.columns:
+            df[column] = None
 
-    df['TRY_ORIGIN'] = df.apply(lambda event: get_origin_event(event) if event['POINTS'] == "TRY" else None, axis=1)
-    return df
+    filtered_df = df[columns_to_include].copy()
 
-# Verifica si la columna 'POINTS' existe antes de llamar a la función
-if 'POINTS' in df.columns:
-    df = calcular_origen_tries(df)
-else:
-    print("La columna 'POINTS' no existe en el DataFrame")
+    kick_off_1, fin_1, kick_off_2, fin_2 = half_boundaries(filtered_df)
 
-print(df.head())
+    if None in [kick_off_1, fin_1, kick_off_2, fin_2]:
+        log_enriquecimiento.warning("Valores inválidos para timeGroups: kick_off_1=%s, fin_1=%s, kick_off_2=%s, fin_2=%s",
+                                    kick_off_1, fin_1, kick_off_2, fin_2)
+        raise ValueError("Datos incompletos para calcular grupos de tiempo")
+
+    timeGroups = half_time_groups(kick_off_1, fin_1, kick_off_2, fin_2)
+
+    # TIME(VIDEO), Game_Time y Time_Group para todos los eventos a la vez
+    seconds = pd.to_numeric(filtered_df['SECOND'], errors='coerce')
+    game_seconds = game_seconds_by_halves(seconds, kick_off_1, fin_1, kick_off_2)
+    add_game_time_columns(filtered_df, game_seconds, timeGroups, video_time=True)
+
+    with open(matches_path, 'r') as f:
+        df_partidos = pd.DataFrame(json.load(f))
+    partido_info = df_partidos.to_dict(orient='records')[0]
+
+    return filtered_df, partido_info
+
+def cargar_partido(matriz_path, matches_path):
+    """Enriquece, indexa y serializa una sola vez un partido por versión de los archivos"""
+    start = time.perf_counter()
+    enriched = enriquecer_partido(matriz_path, matches_path)
+    if enriched is None:
+        return None
+    loaded = LoadedMatch(*enriched)
+    log_enriquecimiento.info("Partido %s: %d eventos, %d bytes en %.1fms", os.path.basename(matriz_path),
+                             len(loaded.records), len(loaded.prepared.body), (time.perf_counter() - start) * 1000)
+    return loaded
+
+def responder_eventos(paths):
+    """
+    Respuesta de /events para un partido: sin parámetros devuelve el payload
+    completo preserializado (con ETag); con filtros, proyección o paginación
+    resuelve la consulta sobre los índices del partido.
+    """
+    loaded = match_cache.get(paths, cargar_partido)
+    if loaded is None:
+        return jsonify({"error": "No data available"}), 404
+    if not request.args:
+        return loaded.prepared.to_response()
+    try:
+        return jsonify(loaded.query(request.args))
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+def responder_eventos_db(match_id=None):
+    """Eventos desde la base de datos, escritos en streaming a medida que se leen"""
+    if not db_events.available():
+        return jsonify({"error": "Base de datos no disponible"}), 503
+    try:
+        query = db_events.parse_query(request.args, match_id)
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    header = db_events.match_header(query["match_id"]) if query["match_id"] is not None else None
+    if query["match_id"] is not None and header is None:
+        return jsonify({"error": f"Partido no encontrado: {query['match_id']}"}), 404
+    return Response(db_events.stream_events_json(query, header), mimetype='application/json')
 
 @app.route('/events', methods=['GET'])
 def get_events():
+    if EVENTS_SOURCE == 'db':
+        return responder_eventos_db()
+
     if not os.path.exists(matriz_json_path):
         return jsonify({"error": "Archivo JSON no encontrado"}), 404
 
     try:
-        with open(matriz_json_path, 'r') as f:
-            df = pd.DataFrame(json.load(f))
-        
-        # Calcular origen de tries
-        df = calcular_origen_tries(df)
-
-        if df.empty:
-            return jsonify({"error": "No data available"}), 404
-
-        columns_to_include = ['ID', 'OPPONENT', 'SECOND', 'DURATION', 'CATEGORY', 'TEAM', 'COORDINATE_X', 'COORDINATE_Y', 'SECTOR', 'PLAYER', 'SCRUM_RESULT', 'ADVANCE', 'LINE_RESULT', 'LINE_QUANTITY', 'LINE_POSITION', 'LINE_THROWER', 'LINE_RECEIVER', 'LINE_PLAY', 'OPPONENT_JUMPER', 'BREAK_TYPE', 'BREAK_CHANNEL', 'TURNOVER_TYPE', 'INFRACTION_TYPE', 'KICK_TYPE', 'SQUARE', 'RUCK_SPEED', 'POINTS', 'POINTS(VALUE)', 'PERIODS', 'GOAL_KICK', 'TRY_ORIGIN', 'YELLOW-CARD', 'RED-CARD']
-
-        # Asegúrate de que todas las columnas existan en el DataFrame
-        for column in columns_to_include:
-            if column not in df.columns:
-                df[column] = None
-
-        filtered_df = df[columns_to_include]
-
-        kick_off_1 = filtered_df[(filtered_df['CATEGORY'] == 'KICK OFF') & (filtered_df['PERIODS'] == 1)]['SECOND'].min()
-        fin_1 = filtered_df[(filtered_df['CATEGORY'] == 'END') & (filtered_df['PERIODS'] == 1)]['SECOND'].max()
-        kick_off_2 = filtered_df[(filtered_df['CATEGORY'] == 'KICK OFF') & (filtered_df['PERIODS'] == 2)]['SECOND'].min()
-        fin_2 = filtered_df[(filtered_df['CATEGORY'] == 'END') & (filtered_df['PERIODS'] == 2)]['SECOND'].max()
-
-        def calcular_tiempo_de_juego(second):
-            if kick_off_1 is None or fin_1 is None or kick_off_2 is None or fin_2 is None:
-                print(f"Valores inválidos detectados: kick_off_1={kick_off_1}, fin_1={fin_1}, kick_off_2={kick_off_2}, fin_2={fin_2}")
-                return None
-
-            if second is None:
-                print("El valor de 'second' es None")
-                return None
-
-            if second <= fin_1:
-                return second - kick_off_1
-            elif second >= kick_off_2:
-                return (fin_1 - kick_off_1) + (second - kick_off_2)
-            return None
-
-        if None in [kick_off_1, fin_1, kick_off_2, fin_2]:
-            print(f"Valores inválidos para timeGroups: kick_off_1={kick_off_1}, fin_1={fin_1}, kick_off_2={kick_off_2}, fin_2={fin_2}")
-            return jsonify({"error": "Datos incompletos para calcular grupos de tiempo"}), 500
-
-        timeGroups = [
-            { "label": "0'- 20'", "start": 0, "end": 20 * 60 },
-            { "label": "20' - 40'", "start": 20 * 60, "end": calcular_tiempo_de_juego(fin_1) or 0 },
-            { "label": "40' - 60'", "start": calcular_tiempo_de_juego(kick_off_2) or 0, "end": (calcular_tiempo_de_juego(kick_off_2) or 0) + 20 * 60 },
-            { "label": "60' - 80'", "start": (calcular_tiempo_de_juego(kick_off_2) or 0) + 20 * 60, "end": calcular_tiempo_de_juego(fin_2) or 0 }
-        ]
-
-        events = filtered_df.to_dict(orient='records')
-        for event in events:
-            if 'SECOND' in event and event['SECOND'] is not None:
-                print(f"Procesando evento: {event}")
-                minutes, seconds = divmod(int(event['SECOND']), 60)
-                event['TIME(VIDEO)'] = f"{minutes:02}:{seconds:02}"
-                tiempo_de_juego = calcular_tiempo_de_juego(event['SECOND'])
-                if tiempo_de_juego is not None:
-                    tiempo_de_juego_minutes, tiempo_de_juego_seconds = divmod(tiempo_de_juego, 60)
-                    event['Game_Time'] = f"{int(tiempo_de_juego_minutes):02}:{int(tiempo_de_juego_seconds):02}"
-                    for group in timeGroups:
-                        if group["start"] is None or group["end"] is None:
-                            print(f"Grupo de tiempo inválido: {group}")
-                            continue  # Salta este grupo si es inválido
-
-                        if tiempo_de_juego is not None and group["start"] <= tiempo_de_juego < group["end"]:
-                            event["Time_Group"] = group["label"]
-                            break
-                else:
-                    print(f"Tiempo de juego no calculado para el evento: {event}")
-                    event['Game_Time'] = None
-                    event['Time_Group'] = None
-
-        for event in events:
-            for key, value in event.items():
-                if value != value:
-                    event[key] = None
-                elif isinstance(value, pd.Timestamp):
-                    event[key] = value.isoformat()
-                elif isinstance(value, pd.Timedelta):
-                    event[key] = str(value)
-                elif isinstance(value, (pd._libs.tslibs.nattype.NaTType, type(pd.NaT))):
-                    event[key] = None
-
-        with open(matches_json_path, 'r') as f:
-            df_partidos = pd.DataFrame(json.load(f))
-        partido_info = df_partidos.to_dict(orient='records')[0]
-
-        print(events)
-        return jsonify({"header": partido_info, "events": events})
+        return responder_eventos((matriz_json_path, matches_json_path))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def construir_payload_pescara(matriz_path, matches_path):
+    """Lee el partido Pescara vs Avezzano y calcula Game_Time/Time_Group"""
+    # Leer datos
+    with open(matriz_path, 'r') as f:
+        df_pescara = pd.DataFrame(json.load(f))
+    
+    with open(matches_path, 'r') as f:
+        df_partidos_pescara = pd.DataFrame(json.load(f))
+    
+    # Obtener eventos KICK OFF y END por periodo
+    kick_off_1 = df_pescara[(df_pescara['CATEGORY'] == 'KICK OFF') & (df_pescara['PERIODS'] == 1)]
+    fin_1 = df_pescara[(df_pescara['CATEGORY'] == 'END') & (df_pescara['PERIODS'] == 1)]
+    kick_off_2 = df_pescara[(df_pescara['CATEGORY'] == 'KICK OFF') & (df_pescara['PERIODS'] == 2)]
+    fin_2 = df_pescara[(df_pescara['CATEGORY'] == 'END') & (df_pescara['PERIODS'] == 2)]
+
+    start_1 = kick_off_1['SECOND'].min() if not kick_off_1.empty else 0
+    end_1 = fin_1['SECOND'].max() if not fin_1.empty else df_pescara[df_pescara['PERIODS'] == 1]['SECOND'].max()
+    start_2 = kick_off_2['SECOND'].min() if not kick_off_2.empty else 0
+    end_2 = fin_2['SECOND'].max() if not fin_2.empty else df_pescara[df_pescara['PERIODS'] == 2]['SECOND'].max()
+
+    # Calcular Game_Time y Time_Group para todos los eventos a la vez
+    time_groups = [
+        {"label": "0'- 20'", "start": 0, "end": 1200},
+        {"label": "20' - 40'", "start": 1200, "end": 2400},
+        {"label": "40' - 60'", "start": 2400, "end": 3600},
+        {"label": "60' - 80'", "start": 3600, "end": 4800}
+    ]
+    seconds = pd.to_numeric(df_pescara['SECOND'], errors='coerce')
+    game_seconds = game_seconds_by_periods(seconds, df_pescara['PERIODS'], start_1, end_1, start_2)
+    game_seconds[game_seconds < 0] = np.nan
+    add_game_time_columns(df_pescara, game_seconds, time_groups)
+
+    # Registros ya limpios (NaN -> None) en una sola pasada
+    events = frame_to_records(df_pescara)
+
+    partido_info = df_partidos_pescara.to_dict(orient='records')[0]
+    
+    return {"header": partido_info, "events": events}
+
+def preparar_pescara(matriz_path, matches_path):
+    """Serializa y comprime una sola vez el payload de /pescara por versión de los archivos"""
+    start = time.perf_counter()
+    payload = construir_payload_pescara(matriz_path, matches_path)
+    prepared = PreparedJSON(payload)
+    log_enriquecimiento.info("Payload de %s (pescara): %d eventos, %d bytes en %.1fms", os.path.basename(matriz_path),
+                             len(payload["events"]), len(prepared.body), (time.perf_counter() - start) * 1000)
+    return prepared
+
 @app.route('/pescara', methods=['GET'])
 def pescara_events():
     """Endpoint específico para el partido Pescara vs Avezzano"""
@@ -168,69 +276,144 @@ def pescara_events():
         # Verificar que existan los archivos
         if not os.path.exists(pescara_matriz_path) or not os.path.exists(pescara_matches_path):
             return jsonify({"error": "Archivos de Pescara no encontrados"}), 404
-        
-        # Leer datos
-        with open(pescara_matriz_path, 'r') as f:
-            df_pescara = pd.DataFrame(json.load(f))
-        
-        with open(pescara_matches_path, 'r') as f:
-            df_partidos_pescara = pd.DataFrame(json.load(f))
-        
-        # Calcular Game_Time (igual que en /events)
-        events = df_pescara.to_dict(orient='records')
-        
-        # Obtener eventos KICK OFF y END por periodo
-        kick_off_1 = df_pescara[(df_pescara['CATEGORY'] == 'KICK OFF') & (df_pescara['PERIODS'] == 1)]
-        fin_1 = df_pescara[(df_pescara['CATEGORY'] == 'END') & (df_pescara['PERIODS'] == 1)]
-        kick_off_2 = df_pescara[(df_pescara['CATEGORY'] == 'KICK OFF') & (df_pescara['PERIODS'] == 2)]
-        fin_2 = df_pescara[(df_pescara['CATEGORY'] == 'END') & (df_pescara['PERIODS'] == 2)]
-
-        start_1 = kick_off_1['SECOND'].min() if not kick_off_1.empty else 0
-        end_1 = fin_1['SECOND'].max() if not fin_1.empty else df_pescara[df_pescara['PERIODS'] == 1]['SECOND'].max()
-        start_2 = kick_off_2['SECOND'].min() if not kick_off_2.empty else 0
-        end_2 = fin_2['SECOND'].max() if not fin_2.empty else df_pescara[df_pescara['PERIODS'] == 2]['SECOND'].max()
-
-        # Calcular Game_Time para cada evento
-        for event in events:
-            period = event.get('PERIODS')
-            second = event.get('SECOND', 0)
-            
-            if period == 1:
-                tiempo_de_juego = (second - start_1) if start_1 else None
-            elif period == 2:
-                tiempo_de_juego = (end_1 - start_1) + (second - start_2) if start_2 else None
-            else:
-                tiempo_de_juego = None
-
-            if tiempo_de_juego is not None and tiempo_de_juego >= 0:
-                minutos = int(tiempo_de_juego // 60)
-                segundos = int(tiempo_de_juego % 60)
-                event['Game_Time'] = f"{minutos:02d}:{segundos:02d}"
-                
-                # Asignar Time_Group
-                time_groups = [
-                    {"label": "0'- 20'", "start": 0, "end": 1200},
-                    {"label": "20' - 40'", "start": 1200, "end": 2400},
-                    {"label": "40' - 60'", "start": 2400, "end": 3600},
-                    {"label": "60' - 80'", "start": 3600, "end": 4800}
-                ]
-                for group in time_groups:
-                    if group["start"] <= tiempo_de_juego < group["end"]:
-                        event["Time_Group"] = group["label"]
-                        break
-            else:
-                event['Game_Time'] = None
-                event['Time_Group'] = None
-
-        # Limpiar valores NaN
-        for event in events:
-            for key, value in event.items():
-                if value != value:  # NaN check
-                    event[key] = None
-
-        partido_info = df_partidos_pescara.to_dict(orient='records')[0]
-        
-        return jsonify({"header": partido_info, "events": events})
+
+        prepared = match_cache.get((pescara_matriz_path, pescara_matches_path), preparar_pescara)
+        return prepared.to_response()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/matches', methods=['GET'])
+def list_matches():
+    """Lista los partidos disponibles con su cabecera"""
+    return jsonify({"matches": match_registry.list()})
+
+@app.route('/matches/<match_id>/events', methods=['GET'])
+def match_events(match_id):
+    """Eventos enriquecidos de un partido; se cargan y cachean en el primer acceso"""
+    try:
+        paths = match_registry.paths(match_id)
+    except KeyError:
+        return jsonify({"error": f"Partido no encontrado: {match_id}"}), 404
+
+    try:
+        return responder_eventos(paths)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def responder_intervalo(match_id, consulta):
+    """Eventos de un partido según su tramo de video (consulta: "events_at" o "events_between")"""
+    try:
+        paths = match_registry.paths(match_id)
+    except KeyError:
+        return jsonify({"error": f"Partido no encontrado: {match_id}"}), 404
+    try:
+        loaded = match_cache.get(paths, cargar_partido)
+        if loaded is None:
+            return jsonify({"error": "No data available"}), 404
+        return jsonify(getattr(loaded, consulta)(request.args))
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/matches/<match_id>/events/at', methods=['GET'])
+def match_events_at(match_id):
+    """Eventos activos en el instante de video ?t= (para sincronizar con VideoPlayer)"""
+    return responder_intervalo(match_id, "events_at")
+
+@app.route('/matches/<match_id>/events/range', methods=['GET'])
+def match_events_range(match_id):
+    """Eventos cuyo tramo de video se superpone con [?t0=, ?t1=]"""
+    return responder_intervalo(match_id, "events_between")
+
+@app.route('/db/matches/<int:match_id>/events', methods=['GET'])
+def db_match_events(match_id):
+    """Eventos de un partido importado a la base de datos (sin JSON intermedio)"""
+    return responder_eventos_db(match_id)
+
+def partidos_de_temporada(season=None):
+    """(match_id, LoadedMatch) de los partidos de una temporada (o de todos)"""
+    matches = []
+    for info in match_registry.list():
+        if season and info.get('season') != season:
+            continue
+        try:
+            loaded = match_cache.get(match_registry.paths(info['match_id']), cargar_partido)
+        except Exception as e:
+            log_enriquecimiento.warning("Partido %s omitido en las estadísticas: %s", info['match_id'], e)
+            continue
+        if loaded is not None:
+            matches.append((info['match_id'], loaded))
+    return matches
+
+def partidos_del_almacen(season=None):
+    """
+    (match_id, versión, read) de los partidos de una temporada (o de todos)
+    leídos del almacén Parquet: read(columnas) devuelve solo esas columnas.
+    El almacén se pone al día con uploads/ antes de leer. Sin pyarrow se
+    usan los partidos enriquecidos desde los JSON.
+    """
+    if not event_store.available():
+        return [(match_id, loaded.version, lambda columns, loaded=loaded: loaded.df)
+                for match_id, loaded in partidos_de_temporada(season)]
+
+    entries, failed = season_store.sync(match_registry.pairs())
+    for match_id, error in failed.items():
+        log_enriquecimiento.warning("Partido %s omitido en las estadísticas: %s", match_id, error)
+    return [(entry['match_id'], event_store.entry_version(entry),
+             lambda columns, match_id=entry['match_id']: season_store.read_events(match_id, columns=columns))
+            for entry in entries if not season or entry['season'] == season]
+
+@app.route('/stats/players', methods=['GET'])
+def stats_players():
+    """
+    Estadísticas por jugador: de un partido con ?match_id=, o acumuladas en
+    la temporada con ?season= (sin parámetros, de todos los partidos).
+    """
+    match_id = request.args.get('match_id')
+    try:
+        if match_id:
+            try:
+                paths = match_registry.paths(match_id)
+            except KeyError:
+                return jsonify({"error": f"Partido no encontrado: {match_id}"}), 404
+            loaded = match_cache.get(paths, cargar_partido)
+            if loaded is None:
+                return jsonify({"error": "No data available"}), 404
+            return player_stats.for_match(match_id, loaded).to_response()
+
+        season = request.args.get('season')
+        return player_stats.for_season(season, partidos_del_almacen(season)).to_response()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/stats/set-pieces', methods=['GET'])
+def stats_set_pieces():
+    """
+    Conteos de lineouts, scrums y tackles desde el cubo de un partido
+    (?match_id=) o de la temporada (?season=). Filtros por dimensión
+    (category=LINEOUT&side=OWN, ...) y by=CATEGORY,SIDE para agrupar.
+    """
+    match_id = request.args.get('match_id')
+    try:
+        if match_id:
+            try:
+                paths = match_registry.paths(match_id)
+            except KeyError:
+                return jsonify({"error": f"Partido no encontrado: {match_id}"}), 404
+            loaded = match_cache.get(paths, cargar_partido)
+            if loaded is None:
+                return jsonify({"error": "No data available"}), 404
+            cube = set_piece_cubes.for_match(match_id, loaded)
+            return set_piece_cubes.respond(cube, request.args, match_id=match_id).to_response()
+
+        season = request.args.get('season')
+        matches = partidos_del_almacen(season)
+        cube = set_piece_cubes.for_season(season, matches)
+        return set_piece_cubes.respond(cube, request.args, season=season,
+                                       matches=sorted(match_id for match_id, _, _ in matches)).to_response()
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -243,215 +426,193 @@ def events_table():
     category = request.args.get('category')
     player = request.args.get('player')
     
-    filtered_df = df
-    
+    filters = {}
     if category:
-        filtered_df = filtered_df[filtered_df['CATEGORY'] == category]
+        filters['CATEGORY'] = [category]
     if player:
-        filtered_df = filtered_df[filtered_df['PLAYER'] == player]
-    
-    # Convierte el DataFrame filtrado a una tabla HTML
-    table_html = filtered_df.to_html(classes='table table-striped', index=False)
-    
-    # Renderiza la tabla HTML en una página simple con un formulario de filtro
-    html = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Events Table</title>
-        <link rel="stylesheet" href="https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css">
-    </head>
-    <body>
-        <div class="container">
-            <h1 class="mt-5">Events Table</h1>
-            <form method="get" action="/events/table" class="mb-3">
-                <div class="form-row">
-                    <div class="col">
-                        <input type="text" name="category" class="form-control" placeholder="Category" value="{category or ''}">
-                    </div>
-                    <div class="col">
-                        <input type="text" name="player" class="form-control" placeholder="Player" value="{player or ''}">
-                    </div>
-                    <div class="col">
-                        <button type="submit" class="btn btn-primary">Filter</button>
-                    </div>
-                </div>
-            </form>
-            {table_html}
-        </div>
-    </body>
-    </html>
-    """
-    return render_template_string(html)
+        filters['PLAYER'] = [player]
+    positions = df_index.select(filters)
 
-@app.route('/convert_excel_to_json', methods=['GET'])
-def convert_excel_to_json():
-    # Aqui debajo se debe colocar el nombre del archivo Excel que se debe ubicar en backend/uploads 
-    # y luego entrar a la ruta http://localhost:5001/convert_excel_to_json para que se creen los archivos JSON
-    file_path = os.path.join(UPLOAD_FOLDER, 'Matriz_San_Benedetto_24-25_(ENG).xlsx')
-    if not os.path.exists(file_path):
-        return jsonify({"error": "Archivo Excel no encontrado"}), 404
+    # Paginación y orden en el servidor; solo se genera el HTML de la página pedida
+    page, per_page, sort, descending = parse_table_args(request.args, df.columns)
+    if sort:
+        positions = df_index.sort(positions, sort, descending)
 
-    try:
-        df = pd.read_excel(file_path, sheet_name='MATRIZ')
-        df_partidos = pd.read_excel(file_path, sheet_name='MATCHES')
+    base_params = {'category': category, 'player': player}
+    return Response(stream_events_table(df, positions, base_params, page, per_page, sort, descending),
+                    mimetype='text/html')
 
-        # Convierte los DataFrames a JSON
-        df_json = df.to_json(orient='records')
-        df_partidos_json = df_partidos.to_json(orient='records')
+def convertir_excel_fijo(file_path, outputs, converter, enrich):
+    """
+    Convierte un Excel fijo de uploads/ dentro de la petición (200), como
+    siempre hicieron estas rutas. Con ?async=1 la conversión se encola y se
+    responde 202 con el trabajo, consultable en /jobs/<id>.
+    """
+    if not os.path.exists(file_path):
+        return jsonify({"error": "Archivo Excel no encontrado"}), 404
 
-        # Guarda los JSON en archivos
-        with open(os.path.join(UPLOAD_FOLDER, 'matriz.json'), 'w') as f:
-            f.write(df_json)
-        with open(os.path.join(UPLOAD_FOLDER, 'matches.json'), 'w') as f:
-            f.write(df_partidos_json)
+    force = request.args.get('force') == '1'
+    if request.args.get('async') == '1':
+        job = conversion_jobs.submit(
+            'excel', os.path.basename(file_path), convert_excel, file_path, outputs, workbook_cache,
+            converter, enrich=enrich, force=force,
+        )
+        return jsonify({"message": "Conversion queued", "job": job, "status_url": f"/jobs/{job['id']}"}), 202
 
-        return jsonify({"message": "Conversion successful"}), 200
+    try:
+        result = convert_excel(file_path, outputs, workbook_cache, converter, enrich=enrich, force=force)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    return jsonify({"message": "Conversion successful", "result": result}), 200
+
+@app.route('/convert_excel_to_json', methods=['GET'])
+def convert_excel_to_json():
+    # Aqui debajo se debe colocar el nombre del archivo Excel que se debe ubicar en backend/uploads 
+    # y luego entrar a la ruta http://localhost:5001/convert_excel_to_json para que se creen los archivos JSON
+    # (con ?async=1 corre en segundo plano y su estado se consulta en /jobs/<id>)
+    file_path = os.path.join(UPLOAD_FOLDER, 'Matriz_San_Benedetto_24-25_(ENG).xlsx')
+    outputs = [os.path.join(UPLOAD_FOLDER, 'matriz.json'), os.path.join(UPLOAD_FOLDER, 'matches.json')]
+    return convertir_excel_fijo(file_path, outputs, 'convert_excel_to_json', enrich=False)
     
     
 @app.route('/convert_excel_to_json_2', methods=['GET'])
 def convert_excel_to_json_2():
     file_path = os.path.join(UPLOAD_FOLDER, 'SERIE_B_PRATO_match_2.xlsx')
-    if not os.path.exists(file_path):
-        return jsonify({"error": "Archivo Excel no encontrado"}), 404
+    outputs = [os.path.join(UPLOAD_FOLDER, 'SERIE_B_PRATO.json'), os.path.join(UPLOAD_FOLDER, 'match-PRATO.json')]
+    return convertir_excel_fijo(file_path, outputs, 'convert_excel_to_json_2', enrich=True)
 
+@app.route('/upload', methods=['POST'])
+def upload_match():
+    """
+    Sube un Excel (hojas MATRIZ y MATCHES) o un XML de LongoMatch/Sportscode
+    y encola su conversión. Para XML el formulario debe incluir team y
+    opponent (y opcionalmente date, location, video_url y los tiempos
+    kick_off_1, end_1, kick_off_2, end_2 en segundos de video). Si ya hay
+    un archivo con ese nombre en uploads/ se responde 409 salvo con force=1.
+    """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({"error": "Falta el archivo (campo 'file')"}), 400
+
+    filename = secure_filename(upload.filename)
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in EXCEL_EXTENSIONS | XML_EXTENSIONS:
+        return jsonify({"error": f"Formato no soportado: {extension or filename}"}), 400
+
+    if extension in XML_EXTENSIONS:
+        try:
+            match_info, profile = parse_xml_profile(request.form)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    # No se pisa un archivo de uploads/ (p. ej. los libros que leen las rutas fijas) salvo con force=1
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
     try:
-        df = pd.read_excel(file_path, sheet_name='MATRIZ')
-        df_partidos = pd.read_excel(file_path, sheet_name='MATCHES')
-
-                # Procesa los eventos PENALTY
-        def process_penalty_events(row):
-            if row['CATEGORY'] == 'PENALTY':
-                advance = str(row.get('ADVANCE', '')).strip()
-                if row['TEAM'] == 'OPPONENT':
-                    player = "Player OPPONENT"
-                else:
-                    player = str(row.get('PLAYER', '')).strip()
-
-                if advance == 'NEUTRAL':
-                    row['YELLOW-CARD'] = player
-                elif advance == 'NEGATIVE':
-                    row['RED-CARD'] = player
-                else:
-                    row['YELLOW-CARD'] = None
-                    row['RED-CARD'] = None
-            else:
-                # Asegúrate de que YELLOW-CARD y RED-CARD no existan en otras categorías
-                row['YELLOW-CARD'] = None
-                row['RED-CARD'] = None
-            return row
-
-        # Procesa los eventos LINEOUT
-        def process_lineout_events(row):
-            if row['CATEGORY'] == 'LINEOUT':
-                player = str(row.get('PLAYER', '')).strip()
-                player_2 = str(row.get('PLAYER_2', '')).strip()
-
-                # Determina el LINE_THROWER y LINE_RECEIVER
-                if player.startswith('T-'):
-                    thrower = player[2:]  # Elimina el prefijo "T-"
-                    receiver = player_2
-                elif player_2.startswith('T-'):
-                    thrower = player_2[2:]  # Elimina el prefijo "T-"
-                    receiver = player
-                else:
-                    thrower = None
-                    receiver = None
-
-                # Asigna los valores al evento
-                row['LINE_THROWER'] = thrower
-                row['LINE_RECEIVER'] = receiver
-
-                # Coloca ambos jugadores en un array en PLAYER
-                players = [thrower, receiver]
-                players = [p for p in players if p and p.lower() != 'nan']  # Filtra valores no válidos
-                row['PLAYER'] = players if players else None  # Asigna None si está vacío
-
-                # Depuración
-                print(f"Processed LINEOUT event: PLAYER={row['PLAYER']}, LINE_THROWER={row['LINE_THROWER']}, LINE_RECEIVER={row['LINE_RECEIVER']}")
-            else:
-                # Asegúrate de que LINE_THROWER y LINE_RECEIVER no existan en otras categorías
-                row['LINE_THROWER'] = None
-                row['LINE_RECEIVER'] = None
-            return row
-
-            # Procesa los eventos TACKLE
-        def process_tackle_events(row):
-            if row['CATEGORY'] == 'TACKLE':
-                player = str(row.get('PLAYER', '')).strip() if row.get('PLAYER') else None
-                player_2 = str(row.get('PLAYER_2', '')).strip() if row.get('PLAYER_2') else None
-
-                # Filtra valores no válidos como None o 'nan'
-                players = [p for p in [player, player_2] if p and p.lower() != 'nan']
-
-                # Si hay un solo jugador, lo dejamos como un string; si no, como lista
-                row['PLAYER'] = players[0] if len(players) == 1 else (players if players else None)
-                row['Team_Tackle_Count'] = 1
-            return row
-
-        # Calcula el ORIGIN, END y fases para ATTACK y DEFENCE
-        def calculate_attack_defence(row, df):
-            if row['CATEGORY'] in ['ATTACK', 'DEFENCE']:
-                origin_events = ['KICK-OFF', 'TURNOVER+', 'SCRUM', 'LINEOUT', 'PENALTY', 'FREE-KICK']
-                relevant_origin = df[(df['CATEGORY'].isin(origin_events)) & (df['SECOND'] < row['SECOND'])]
-                origin = relevant_origin.iloc[-1] if not relevant_origin.empty else None
-
-                end_events = ['PENALTY', 'TURNOVER-', 'POINTS']
-                relevant_end = df[(df['CATEGORY'].isin(end_events)) & (df['SECOND'] > row['SECOND'])]
-                end = relevant_end.iloc[0] if not relevant_end.empty else None
-
-                ruck_events = df[(df['CATEGORY'] == 'RUCK') & (df['SECOND'] >= (origin['SECOND'] if origin is not None else 0)) & (df['SECOND'] <= (end['SECOND'] if end is not None else row['SECOND']))]
-                phases = len(ruck_events) + 1 if not ruck_events.empty else 1
-
-                row['ORIGIN'] = origin['CATEGORY'] if origin is not None else None
-                row['END'] = end['CATEGORY'] if end is not None else None
-                row['PHASES'] = phases
-            return row
-        
-
-
-
-        # Limpia las filas eliminando claves con valores null, NaN, arrays vacíos o 'Undefined'
-        def clean_row(row):
-            return {
-                k: v for k, v in row.items()
-                if v is not None and v != 'undefined' and (not isinstance(v, list) or len(v) > 0) and (not (isinstance(v, float) and pd.isna(v)))
-            }
-
-        # Inicializa las columnas LINE_THROWER y LINE_RECEIVER en el DataFrame
-        df['LINE_THROWER'] = None
-        df['LINE_RECEIVER'] = None
-        df['YELLOW-CARD'] = None
-        df['RED-CARD'] = None
-
-        # Aplica las transformaciones a los eventos
-        df = df.apply(process_lineout_events, axis=1)
-        df = df.apply(process_tackle_events, axis=1)
-        df = df.apply(process_penalty_events, axis=1)  # Aplica la nueva función
-        df = df.apply(lambda row: calculate_attack_defence(row, df), axis=1)
-
-        # Aplica la limpieza
-        df_json = df.apply(lambda row: clean_row(row.to_dict()), axis=1).to_json(orient='records')
-        df_partidos_json = df_partidos.apply(lambda row: clean_row(row.to_dict()), axis=1).to_json(orient='records')
-
-        # Guarda los JSON en archivos (ESTO SE HACE si no se comnenta la parte de arriba que hace la limpieza)
-        # # Convert DataFrames to JSON format
-        # df_json = df.to_json(orient='records')
-        # df_partidos_json = df_partidos.to_json(orient='records')
-
-        # Write JSON data to files
-        with open(os.path.join(UPLOAD_FOLDER, 'SERIE_B_PRATO.json'), 'w') as f:
-            f.write(df_json)
-        with open(os.path.join(UPLOAD_FOLDER, 'match-PRATO.json'), 'w') as f:
-            f.write(df_partidos_json)
+        save_upload(upload, file_path, overwrite=request.form.get('force') == '1')
+    except FileExistsError:
+        return jsonify({"error": f"Ya existe {filename} en uploads/; envía force=1 para reemplazarlo"}), 409
+
+    outputs = output_paths(UPLOAD_FOLDER, request.form.get('name') or filename)
+    if extension in XML_EXTENSIONS:
+        job = conversion_jobs.submit('xml', filename, convert_xml, file_path, outputs, match_info, profile)
+    else:
+        header_updates = {"JSON": os.path.splitext(os.path.basename(outputs[0]))[0]}
+        job = conversion_jobs.submit(
+            'excel', filename, convert_excel, file_path, outputs, workbook_cache, 'upload',
+            force=request.form.get('force') == '1', header_updates=header_updates,
+        )
+    return jsonify({"message": "Conversion queued", "job": job, "status_url": f"/jobs/{job['id']}"}), 202
+
+@app.route('/live/matches', methods=['GET', 'POST'])
+def live_match_list():
+    """GET: partidos en vivo. POST: crea uno ({"match_id"?, "header"?})"""
+    if request.method == 'GET':
+        return jsonify(live_matches.list())
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict) or not isinstance(body.get('header') or {}, dict):
+        return jsonify({"error": "Se espera un objeto con match_id y header (objeto)"}), 400
+    try:
+        match_id = parse_match_id(body.get('match_id'))
+    except InvalidEvents as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        live = live_matches.create(body.get('header'), match_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(live.summary()), 201
+
+@app.route('/live/matches/<match_id>', methods=['DELETE'])
+def live_match_delete(match_id):
+    """Quita un partido en vivo de memoria (los JSON ya finalizados se conservan)"""
+    if not live_matches.delete(match_id):
+        return jsonify({"error": f"Partido en vivo no encontrado: {match_id}"}), 404
+    return jsonify({"deleted": match_id})
+
+@app.route('/live/matches/<match_id>/finalize', methods=['POST'])
+def live_match_finalize(match_id):
+    """
+    Termina un partido en vivo: escribe sus JSON matriz/matches en uploads/
+    (con ?name= o el match_id como nombre), donde queda disponible como
+    cualquier partido subido, y cierra los streams.
+    """
+    live = live_matches.get(match_id)
+    if live is None:
+        return jsonify({"error": f"Partido en vivo no encontrado: {match_id}"}), 404
+    outputs = output_paths(UPLOAD_FOLDER, request.args.get('name') or match_id)
+    try:
+        finalized = live.finalize(outputs)
+    except MatchFinalized as e:
+        return jsonify({"error": str(e)}), 409
+    saved_as = event_store.slugify(os.path.splitext(os.path.basename(outputs[0]))[0])
+    return jsonify(dict(finalized, match_id=match_id, events_url=f"/matches/{saved_as}/events"))
+
+@app.route('/live/matches/<match_id>/events', methods=['GET', 'POST'])
+def live_match_events(match_id):
+    """
+    GET: snapshot del partido (eventos enriquecidos, agregados y seq).
+    POST: agrega uno o varios eventos y devuelve el mensaje publicado.
+    """
+    live = live_matches.get(match_id)
+    if live is None:
+        return jsonify({"error": f"Partido en vivo no encontrado: {match_id}"}), 404
+    if request.method == 'GET':
+        return jsonify(live.snapshot())
+    try:
+        events = parse_events(request.get_json(silent=True))
+    except InvalidEvents as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return jsonify(live.append(events)), 201
+    except MatchFinalized as e:
+        return jsonify({"error": str(e)}), 409
 
-        return jsonify({"message": "Conversion successful"}), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+@app.route('/live/matches/<match_id>/stream', methods=['GET'])
+def live_match_stream(match_id):
+    """
+    Server-Sent Events con cada envío al partido. Se reanuda desde el header
+    Last-Event-ID o ?last_event_id= (el seq del snapshot ya cargado).
+    """
+    live = live_matches.get(match_id)
+    if live is None:
+        return jsonify({"error": f"Partido en vivo no encontrado: {match_id}"}), 404
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_seq = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID debe ser numérico"}), 400
+    return Response(sse_stream(live, last_seq), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify(conversion_jobs.list())
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = conversion_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Trabajo no encontrado: {job_id}"}), 404
+    return jsonify(job)
 
 if __name__ == "__main__":
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Logging del backend por subsistema.
+
+Cada subsistema (carga de datos, enriquecimiento, HTTP, partidos en vivo) tiene su propio logger
+bajo "videoanalysis.*" y su nivel se puede ajustar por variable de entorno:
+
+    LOG_LEVEL=INFO               nivel por defecto de todos
+    LOG_LEVEL_LOADING=DEBUG      solo carga de archivos
+    LOG_LEVEL_ENRICHMENT=WARNING solo enriquecimiento
+    LOG_LEVEL_HTTP=INFO          resumen de tiempos por petición
+    LOG_LEVEL_LIVE=DEBUG         partidos en vivo
+
+Los mensajes usan formato perezoso (log.debug("... %s", valor)) para que no
+se construyan strings cuando el nivel está desactivado.
+"""
+import logging
+import os
+import time
+
+from flask import g, request
+
+SUBSYSTEMS = ("loading", "enrichment", "http", "live")
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+
+def get_logger(subsystem):
+    return logging.getLogger(f"videoanalysis.{subsystem}")
+
+
+def configure_logging():
+    """Configura el handler raíz de videoanalysis y los niveles por subsistema"""
+    base = logging.getLogger("videoanalysis")
+    if not base.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        base.addHandler(handler)
+        base.propagate = False
+    base.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    for subsystem in SUBSYSTEMS:
+        level = os.getenv(f"LOG_LEVEL_{subsystem.upper()}")
+        get_logger(subsystem).setLevel(level.upper() if level else logging.NOTSET)
+
+
+def init_request_timing(app):
+    """Registra una línea por petición con método, ruta, estado, bytes y duración"""
+    log = get_logger("http")
+
+    @app.before_request
+    def _start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        if log.isEnabledFor(logging.INFO):
+            start = g.pop("request_start", None)
+            elapsed_ms = (time.perf_counter() - start) * 1000 if start is not None else 0.0
+            # En las respuestas en streaming calcular el largo consumiría el generador
+            size = "stream" if response.is_streamed else response.calculate_content_length() or 0
+            log.info("%s %s -> %s %s bytes en %.1fms",
+                     request.method, request.full_path.rstrip('?'), response.status_code, size, elapsed_ms)
+        return response
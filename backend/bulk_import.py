@@ -0,0 +1,101 @@
+"""
+Importación masiva de eventos a la base de datos.
+
+Agregar los Event de a uno con el ORM (db.add por evento, con echo=True
+registrando cada INSERT) hace que importar un partido cueste una sentencia y
+una línea de log por evento. Aquí los eventos se convierten en filas (dicts
+con las columnas de la tabla) y se insertan por lotes con insert() de
+SQLAlchemy Core (executemany), usando la conexión de la transacción del
+partido: el llamador decide cuándo hacer commit.
+
+COPY (PostgreSQL con psycopg2) queda como opción explícita (method="copy"
+o "auto"): no pasa por SQLAlchemy, así que no aplica los default del lado de
+Python de las columnas (default=..., p. ej. created_at) y todavía no se
+probó contra una base PostgreSQL real.
+"""
+import io
+import json
+import os
+
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '1000'))
+
+EVENT_COLUMNS = ("match_id", "event_type", "start_time", "end_time", "team", "player_name",
+                 "zone", "coordinate_x", "coordinate_y", "extra_data")
+
+
+def event_rows(events, match_id):
+    """Filas de la tabla de eventos a partir de los eventos parseados del XML"""
+    return [{
+        "match_id": match_id,
+        "event_type": event['event_type'],
+        "start_time": event['start'],
+        "end_time": event['end'],
+        "team": event.get('team'),
+        "player_name": event.get('player'),
+        "zone": event.get('zone'),
+        "coordinate_x": event.get('coordinate_x'),
+        "coordinate_y": event.get('coordinate_y'),
+        "extra_data": event.get('extra_data', {}),
+    } for event in events]
+
+
+def insert_rows(connection, table, rows, batch_size=BULK_BATCH_SIZE):
+    """INSERT por lotes de batch_size filas (executemany); devuelve las filas insertadas"""
+    statement = table.insert()
+    for start in range(0, len(rows), batch_size):
+        connection.execute(statement, rows[start:start + batch_size])
+    return len(rows)
+
+
+def _copy_field(value):
+    """Valor en formato CSV de COPY: vacío sin comillas es NULL, los textos van entre comillas"""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, bool) or not isinstance(value, str):
+        return str(value)
+    return '"' + value.replace('"', '""') + '"'
+
+
+def supports_copy(connection):
+    """COPY solo está disponible en PostgreSQL con psycopg2 (cursor.copy_expert)"""
+    return connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2'
+
+
+def copy_rows(connection, table, rows, columns=None):
+    """COPY ... FROM STDIN con todas las filas en un solo envío (PostgreSQL)"""
+    if columns is None:
+        columns = list(rows[0].keys()) if rows else []
+    if not rows:
+        return 0
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(','.join(_copy_field(row.get(column)) for column in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    quoted_columns = ', '.join(connection.dialect.identifier_preparer.quote(c) for c in columns)
+    table_name = connection.dialect.identifier_preparer.format_table(table)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table_name} ({quoted_columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+def bulk_insert(connection, table, rows, method='insert', batch_size=BULK_BATCH_SIZE):
+    """
+    Inserta rows en table sobre connection (sin commit). method: "insert"
+    (INSERT por lotes, por defecto), "copy" o "auto" (COPY si el motor lo
+    permite, si no INSERT). COPY no aplica los default de Python de la tabla.
+    """
+    if method == 'auto':
+        method = 'copy' if supports_copy(connection) else 'insert'
+    if method == 'copy':
+        return copy_rows(connection, table, rows)
+    if method == 'insert':
+        return insert_rows(connection, table, rows, batch_size)
+    raise ValueError(f"Método de importación desconocido: {method}")
@@ -0,0 +1,154 @@
+"""
+Conversión de los archivos de tagging (Excel o XML) a los JSON matriz/matches
+que sirve la API.
+
+Las funciones no dependen de Flask para poder ejecutarse en el pool de
+trabajos de conversión; reciben un callback progress(etapa, fracción) y
+escriben los JSON de forma atómica (archivo temporal + rename) para que una
+petición concurrente nunca lea un archivo a medio escribir.
+"""
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from convert_xml_enriched import enrich_events_simple, parse_xml_events
+from enrichment import enrich_excel_events
+from event_store import replace_atomic, slugify
+from serialization import compact_records
+
+EXCEL_EXTENSIONS = {'.xlsx', '.xlsm'}
+XML_EXTENSIONS = {'.xml'}
+
+# Campos del formulario de subida que describen un partido importado desde XML
+XML_MATCH_FIELDS = ("team", "opponent", "date", "location", "video_url")
+XML_TIME_FIELDS = ("kick_off_1", "end_1", "kick_off_2", "end_2")
+
+
+def _no_progress(stage, fraction):
+    pass
+
+
+def _write_atomic(path, text):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    replace_atomic(path, write)
+
+
+def save_upload(upload, path, overwrite=False):
+    """
+    Guarda un archivo subido (FileStorage) en path pasando por un temporal
+    de nombre único. Sin overwrite lanza FileExistsError si path ya existe:
+    se publica con os.link, que no reemplaza, así que de dos subidas
+    simultáneas con el mismo nombre solo una queda y ninguna a medias.
+    """
+    if overwrite:
+        replace_atomic(path, upload.save)
+        return
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.',
+                                        suffix='.part')
+    os.close(handle)
+    try:
+        upload.save(tmp_path)
+        os.link(tmp_path, path)
+    finally:
+        os.remove(tmp_path)
+
+
+def output_paths(folder, name):
+    """
+    Rutas (matriz, matches) para un archivo subido. Siguen el esquema
+    matriz-<slug>.json / matches-<slug>.json que reconoce MatchRegistry.
+    """
+    slug = slugify(os.path.splitext(os.path.basename(name))[0]) or 'partido'
+    return (os.path.join(folder, f"matriz-{slug}.json"), os.path.join(folder, f"matches-{slug}.json"))
+
+
+def write_match(outputs, events, match_data):
+    """Escribe los JSON (matriz, matches) de un partido en las rutas `outputs`"""
+    _write_atomic(outputs[0], json.dumps(events, indent=2, ensure_ascii=False))
+    _write_atomic(outputs[1], json.dumps(match_data, indent=2, ensure_ascii=False))
+
+
+def convert_excel(file_path, outputs, workbook_cache, converter, enrich=True, force=False,
+                  header_updates=None, progress=_no_progress):
+    """
+    Convierte las hojas MATRIZ y MATCHES del libro a los JSON `outputs`.
+    Con enrich aplica enrich_excel_events y quita las claves vacías (como
+    convert_excel_to_json_2); sin enrich vuelca las hojas tal cual. Si el
+    libro no cambió desde la última conversión no hace nada (salvo force).
+    """
+    digest = workbook_cache.digest(file_path)
+    if not force and workbook_cache.is_converted(digest, outputs, converter):
+        return {"skipped": True, "outputs": list(outputs)}
+
+    progress("reading", 0.1)
+    sheets = workbook_cache.sheets(file_path, ('MATRIZ', 'MATCHES'), digest)
+    df, df_partidos = sheets['MATRIZ'], sheets['MATCHES']
+    if header_updates:
+        df_partidos = df_partidos.assign(**header_updates)
+
+    if enrich:
+        if 'CATEGORY' not in df.columns:
+            raise ValueError("La hoja MATRIZ no tiene la columna CATEGORY")
+        progress("enriching", 0.5)
+        df = enrich_excel_events(df)
+        df_json = pd.Series(compact_records(df), dtype=object).to_json(orient='records')
+        df_partidos_json = pd.Series(compact_records(df_partidos), dtype=object).to_json(orient='records')
+    else:
+        df_json = df.to_json(orient='records')
+        df_partidos_json = df_partidos.to_json(orient='records')
+
+    progress("writing", 0.9)
+    _write_atomic(outputs[0], df_json)
+    _write_atomic(outputs[1], df_partidos_json)
+    workbook_cache.record_conversion(digest, file_path, outputs, converter)
+    return {"skipped": False, "events": int(len(df)), "outputs": list(outputs)}
+
+
+def parse_xml_profile(form):
+    """
+    Lee del formulario los datos del partido y los tiempos de juego para
+    convertir un XML; lanza ValueError si algún tiempo no es numérico.
+    """
+    match_info = {field: (form.get(field) or "").strip() for field in XML_MATCH_FIELDS}
+    if not match_info["team"] or not match_info["opponent"]:
+        raise ValueError("Para importar un XML se necesitan team y opponent")
+
+    profile = {"team": match_info["team"], "opponent": match_info["opponent"], "date": match_info["date"]}
+    for field in XML_TIME_FIELDS:
+        if form.get(field) not in (None, ''):
+            try:
+                profile[field] = float(form[field])
+            except ValueError:
+                raise ValueError(f"{field} debe ser numérico (segundos de video)")
+    return match_info, profile
+
+
+def convert_xml(file_path, outputs, match_info, profile, progress=_no_progress):
+    """Convierte un XML de LongoMatch/Sportscode a los JSON `outputs`"""
+    progress("parsing", 0.1)
+    events = parse_xml_events(file_path, profile)
+
+    progress("enriching", 0.5)
+    enriched_events = enrich_events_simple(events, match_info, profile)
+
+    match_data = [{
+        "MATCH_ID": 1,
+        "TEAM": match_info["team"],
+        "OPPONENT": match_info["opponent"],
+        "DATE": match_info.get("date", ""),
+        "LOCATION": match_info.get("location", ""),
+        "VIDEO_URL": match_info.get("video_url", ""),
+        "KICK_OFF_1": profile.get("kick_off_1", 0),
+        "END_1": profile.get("end_1", 2400),
+        "KICK_OFF_2": profile.get("kick_off_2", 2400),
+        "END_2": profile.get("end_2", 4800),
+        "JSON": os.path.splitext(os.path.basename(outputs[0]))[0],
+    }]
+
+    progress("writing", 0.9)
+    write_match(outputs, enriched_events, match_data)
+    return {"skipped": False, "events": len(enriched_events), "outputs": list(outputs)}
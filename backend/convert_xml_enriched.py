@@ -7,22 +7,25 @@ Pero genera JSONs en lugar de insertar en base de datos
 import sys
 import os
 import json
-import xml.etree.ElementTree as ET
 from datetime import datetime
 
 # Agregar directorio backend al path para imports
 sys.path.insert(0, '/app')
 
-def parse_xml_events(xml_path, profile):
+from enrichment import TEAM_TRY_ORIGIN_CATEGORIES, sweep_try_origins
+from xml_import import get_import_profile
+from xml_stream import iter_instances
+
+def parse_xml_events(xml_path, profile, import_profile="enriched"):
     """
-    Extrae eventos del XML usando misma lógica que importer.py
+    Extrae eventos del XML usando misma lógica que importer.py.
+    import_profile es el perfil de xml_import que mapea las labels.
     """
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-    
     events = []
+    mapping = get_import_profile(import_profile)
     
-    for inst in root.findall(".//instance"):
+    # iterparse: cada <instance> se procesa y se descarta, sin armar el DOM completo
+    for inst in iter_instances(xml_path):
         code_elem = inst.find("code")
         if code_elem is None:
             continue
@@ -41,47 +44,17 @@ def parse_xml_events(xml_path, profile):
         except:
             continue
         
-        # Extraer descriptores y jugadores
-        extra_data = {}
-        players = []
-        x = None
-        y = None
-        
-        for label in inst.findall("label"):
-            group_elem = label.find("group")
-            text_elem = label.find("text")
-            
-            if group_elem is not None and text_elem is not None:
-                group = group_elem.text.strip() if group_elem.text else ""
-                text = text_elem.text.strip() if text_elem.text else ""
-                
-                if group.upper() == "JUGADOR" and text:
-                    players.append(text)
-                elif group.upper() == "EQUIPO":
-                    # Identificar si es PESCARA o RIVAL
-                    extra_data["EQUIPO"] = text
-                elif group.upper() == "X":
-                    try:
-                        x = float(text)
-                    except:
-                        pass
-                elif group.upper() == "Y":
-                    try:
-                        y = float(text)
-                    except:
-                        pass
-                else:
-                    extra_data[group] = text
-        
         event = {
             "event_type": event_type,
             "timestamp_sec": start_sec,
             "duration": duration,
-            "players": players if players else None,
-            "x": x,
-            "y": y,
-            "extra_data": extra_data
+            "players": None,
+            "x": None,
+            "y": None,
+            "extra_data": {}
         }
+        # Descriptores y jugadores según el perfil de importación (xml_import), sobre el mismo evento
+        mapping.map_labels(inst, columns=event)
         events.append(event)
     
     return events
@@ -244,24 +217,17 @@ def enrich_events_simple(events, match_info, profile):
         enriched.append(enriched_event)
         event_id += 1
     
-    # Calcular TRY_ORIGIN
-    origin_categories = ["TURNOVER+", "SCRUM", "LINEOUT", "KICK OFF"]
-    
-    for event in enriched:
-        if event.get("POINTS") == "TRY":
-            try_time = event["SECOND"]
-            try_team = event["TEAM"]
-            
-            # Buscar evento de origen previo del mismo equipo
-            relevant_events = [
-                e for e in enriched 
-                if e["CATEGORY"] in origin_categories 
-                and e["SECOND"] < try_time
-                and e["TEAM"] == try_team
-            ]
-            
-            if relevant_events:
-                event["TRY_ORIGIN"] = relevant_events[-1]["CATEGORY"]
+    # Calcular TRY_ORIGIN: último origen previo del mismo equipo, en un solo recorrido
+    origins = sweep_try_origins(
+        [e["SECOND"] for e in enriched],
+        [e["CATEGORY"] for e in enriched],
+        [e["TEAM"] for e in enriched],
+        [e.get("POINTS") == "TRY" for e in enriched],
+        TEAM_TRY_ORIGIN_CATEGORIES,
+    )
+    for event, origin in zip(enriched, origins):
+        if origin is not None:
+            event["TRY_ORIGIN"] = origin
     
     return enriched
 
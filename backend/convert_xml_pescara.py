@@ -1,13 +1,10 @@
-import xml.etree.ElementTree as ET
+from xml_stream import iter_instances
 import json
 
-tree = ET.parse('/app/uploads/20251019 Az-Pescara (2) 2.xml')
-root = tree.getroot()
-
 matriz = []
 id_counter = 1
 
-for instance in root.findall('.//instance'):
+for instance in iter_instances('/app/uploads/20251019 Az-Pescara (2) 2.xml'):
     code = instance.find('code')
     if code is None:
         continue
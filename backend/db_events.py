@@ -0,0 +1,185 @@
+"""
+Eventos servidos desde la base de datos (modelos Match/Event de models.py).
+
+Los partidos importados con scripts/import_emergency_pescara.py (o cualquier
+otra importación que escriba Event) se sirven sin regenerar los JSON de
+uploads/: los filtros se traducen a un SELECT sobre columnas indexadas
+(match_id, event_type, start_time, team, player_name) y las filas se leen con
+un cursor del lado del servidor en bloques de yield_per, escribiendo la
+respuesta JSON a medida que llegan. Se usa el SessionLocal de db.py, así que
+cada petición toma una conexión del pool y la devuelve al terminar.
+
+db.py y models.py se importan recién en el primer uso: sin base de datos
+configurada el resto de la API sigue sirviendo los JSON.
+"""
+import json
+import os
+
+from event_query import QueryError
+
+DB_YIELD_PER = int(os.getenv('DB_YIELD_PER', '1000'))
+MAX_DB_LIMIT = 100000
+
+# Parámetro -> columna de Event (los valores separados por coma se combinan con OR)
+DB_FILTERS = {
+    "category": "event_type",
+    "team": "team",
+    "player": "player_name",
+    "zone": "zone",
+}
+DB_RESERVED_PARAMS = {"match_id", "start", "end", "limit"}
+
+_backend = None
+
+
+class DatabaseUnavailable(RuntimeError):
+    """No hay SQLAlchemy, db.py o models.py (se responde 503)"""
+
+
+def _load():
+    """(SessionLocal, Event, Match), importados una sola vez"""
+    global _backend
+    if _backend is None:
+        try:
+            from db import SessionLocal
+            from models import Event, Match
+        except ImportError as e:
+            raise DatabaseUnavailable(f"Base de datos no disponible: {e}")
+        _backend = (SessionLocal, Event, Match)
+    return _backend
+
+
+def available():
+    try:
+        _load()
+    except DatabaseUnavailable:
+        return False
+    return True
+
+
+def ensure_indexes(engine):
+    """Crea (si faltan) los índices que usan los filtros de /events"""
+    from sqlalchemy import Index
+    _, Event, _ = _load()
+    indexes = [
+        Index('ix_events_match_start', Event.match_id, Event.start_time),
+        Index('ix_events_match_type', Event.match_id, Event.event_type),
+        Index('ix_events_player', Event.player_name),
+    ]
+    for index in indexes:
+        index.create(bind=engine, checkfirst=True)
+    return [index.name for index in indexes]
+
+
+def parse_query(args, match_id=None):
+    """
+    Convierte los parámetros de la petición en {"match_id", "filters",
+    "start", "end", "limit"}; lanza QueryError si alguno es inválido.
+    """
+    filters = {}
+    for name in args:
+        if name in DB_RESERVED_PARAMS:
+            continue
+        column = DB_FILTERS.get(name)
+        if column is None:
+            raise QueryError(f"Parámetro desconocido: {name}")
+        values = [v.strip() for raw in args.getlist(name) for v in raw.split(',') if v.strip()]
+        if values:
+            filters.setdefault(column, []).extend(values)
+
+    try:
+        if match_id is None and args.get('match_id'):
+            match_id = int(args['match_id'])
+        start = float(args['start']) if args.get('start') else None
+        end = float(args['end']) if args.get('end') else None
+        limit = int(args['limit']) if args.get('limit') else None
+    except ValueError:
+        raise QueryError("match_id, start, end y limit deben ser numéricos")
+    if limit is not None and not 1 <= limit <= MAX_DB_LIMIT:
+        raise QueryError(f"limit debe estar entre 1 y {MAX_DB_LIMIT}")
+
+    return {"match_id": match_id, "filters": filters, "start": start, "end": end, "limit": limit}
+
+
+def build_select(query):
+    """SELECT de las columnas de Event según la consulta, ordenado por partido y tiempo"""
+    from sqlalchemy import select
+    _, Event, _ = _load()
+
+    statement = select(
+        Event.id, Event.match_id, Event.event_type, Event.start_time, Event.end_time, Event.team,
+        Event.player_name, Event.zone, Event.coordinate_x, Event.coordinate_y, Event.extra_data,
+    )
+    if query["match_id"] is not None:
+        statement = statement.where(Event.match_id == query["match_id"])
+    for column, values in query["filters"].items():
+        statement = statement.where(getattr(Event, column).in_(values))
+    if query["start"] is not None:
+        statement = statement.where(Event.start_time >= query["start"])
+    if query["end"] is not None:
+        statement = statement.where(Event.start_time < query["end"])
+    statement = statement.order_by(Event.match_id, Event.start_time, Event.id)
+    if query["limit"] is not None:
+        statement = statement.limit(query["limit"])
+    return statement
+
+
+def event_record(row):
+    """Fila de Event -> evento con las mismas claves que los JSON de uploads/"""
+    duration = row.end_time - row.start_time if row.end_time is not None and row.start_time is not None else None
+    record = {
+        "ID": row.id,
+        "MATCH_ID": row.match_id,
+        "CATEGORY": row.event_type,
+        "SECOND": row.start_time,
+        "DURATION": duration,
+        "TEAM": row.team,
+        "PLAYER": row.player_name,
+        "ZONE": row.zone,
+        "COORDINATE_X": row.coordinate_x,
+        "COORDINATE_Y": row.coordinate_y,
+    }
+    # Descriptores (ADVANCE, INFRACTION, ...) al mismo nivel, sin pisar las columnas
+    for key, value in (row.extra_data or {}).items():
+        record.setdefault(key, value)
+    return record
+
+
+def match_header(match_id):
+    """Cabecera del partido (mismas claves que matches*.json) o None si no existe"""
+    SessionLocal, _, Match = _load()
+    with SessionLocal() as db:
+        match = db.get(Match, match_id)
+        if match is None:
+            return None
+        team = getattr(match, 'team', None)
+        return {
+            "MATCH_ID": match.id,
+            "TEAM": team.name if team is not None else None,
+            "OPPONENT": match.opponent_name,
+            "DATE": match.match_date.isoformat() if match.match_date is not None else None,
+            "COMPETITION": match.competition,
+            "LOCATION": match.location,
+            "RESULT": match.result,
+            "VIDEO_URL": match.video_url,
+        }
+
+
+def stream_events_json(query, header=None, yield_per=DB_YIELD_PER):
+    """
+    Genera el JSON {"header": ..., "events": [...], "count": n} en trozos.
+    La sesión se abre al empezar a iterar y se cierra (devolviendo la conexión
+    al pool) al terminar o si el cliente corta la descarga.
+    """
+    SessionLocal, _, _ = _load()
+    statement = build_select(query).execution_options(stream_results=True)
+
+    yield '{"header": ' + json.dumps(header, ensure_ascii=False, default=str) + ', "events": ['
+    count = 0
+    with SessionLocal() as db:
+        result = db.execute(statement)
+        for partition in result.yield_per(yield_per).partitions():
+            chunk = ', '.join(json.dumps(event_record(row), ensure_ascii=False, default=str) for row in partition)
+            yield (', ' if count else '') + chunk
+            count += len(partition)
+    yield '], "count": ' + str(count) + '}'
@@ -0,0 +1,509 @@
+"""
+Etapas de enriquecimiento de eventos sobre el DataFrame completo.
+
+Cada función trabaja por columnas (NumPy/pandas) en lugar de recorrer las
+filas en Python, para que el costo crezca de forma lineal con el tamaño de
+la matriz aunque se cargue una temporada entera.
+"""
+import numpy as np
+import pandas as pd
+
+# Categorías que pueden originar un try (mismas que usaba /events)
+TRY_ORIGIN_CATEGORIES = ["TURNOVER+", "SCRUM", "LINEOUT", "KICKOFF"]
+# Las que usa la importación de XML, donde el origen se busca en el mismo equipo
+TEAM_TRY_ORIGIN_CATEGORIES = ["TURNOVER+", "SCRUM", "LINEOUT", "KICK OFF"]
+
+# Segmentación de posesiones (mismas listas que usaba convert_excel_to_json_2)
+POSSESSION_CATEGORIES = ["ATTACK", "DEFENCE"]
+POSSESSION_ORIGIN_CATEGORIES = ["KICK-OFF", "TURNOVER+", "SCRUM", "LINEOUT", "PENALTY", "FREE-KICK"]
+POSSESSION_END_CATEGORIES = ["PENALTY", "TURNOVER-", "POINTS"]
+RUCK_CATEGORY = "RUCK"
+
+
+def _last_preceding_positions(origin_seconds, origin_positions, query_seconds):
+    """
+    Para cada valor de query_seconds devuelve la posición (en el orden original
+    del DataFrame) del último evento de origen con SECOND estrictamente menor,
+    o -1 si no existe ninguno.
+
+    Se ordena una sola vez por SECOND y se usa un máximo acumulado de las
+    posiciones, así que el resultado coincide con `relevant_events.iloc[-1]`
+    incluso si la matriz no está ordenada cronológicamente.
+    """
+    if len(origin_seconds) == 0 or len(query_seconds) == 0:
+        return np.full(len(query_seconds), -1, dtype=np.int64)
+
+    order = np.argsort(origin_seconds, kind="stable")
+    sorted_seconds = origin_seconds[order]
+    latest_position = np.maximum.accumulate(origin_positions[order])
+
+    idx = np.searchsorted(sorted_seconds, query_seconds, side="left") - 1
+    result = np.full(len(query_seconds), -1, dtype=np.int64)
+    found = idx >= 0
+    result[found] = latest_position[idx[found]]
+    return result
+
+
+def _first_following_positions(end_seconds, end_positions, query_seconds):
+    """
+    Simétrica de _last_preceding_positions: posición del primer evento (en el
+    orden del DataFrame) con SECOND estrictamente mayor, o -1 si no hay.
+    Equivale a `relevant_events.iloc[0]`.
+    """
+    if len(end_seconds) == 0 or len(query_seconds) == 0:
+        return np.full(len(query_seconds), -1, dtype=np.int64)
+
+    order = np.argsort(end_seconds, kind="stable")
+    sorted_seconds = end_seconds[order]
+    earliest_position = np.minimum.accumulate(end_positions[order][::-1])[::-1]
+
+    idx = np.searchsorted(sorted_seconds, query_seconds, side="right")
+    result = np.full(len(query_seconds), -1, dtype=np.int64)
+    found = idx < len(sorted_seconds)
+    result[found] = earliest_position[idx[found]]
+    return result
+
+
+def resolve_try_origins(df, origin_categories=None, by_team=False):
+    """
+    Calcula el origen de todos los tries en una sola pasada.
+
+    Devuelve una Series alineada con df.index con la categoría del último
+    evento de origen anterior a cada try (None si no hay). Con by_team=True
+    solo se consideran eventos de origen del mismo TEAM que el try, igual que
+    en convert_xml_enriched.enrich_events_simple.
+    """
+    if origin_categories is None:
+        origin_categories = TRY_ORIGIN_CATEGORIES
+
+    result = pd.Series([None] * len(df), index=df.index, dtype=object)
+    if df.empty or 'POINTS' not in df.columns:
+        return result
+
+    seconds = pd.to_numeric(df['SECOND'], errors='coerce').to_numpy(dtype=float)
+    categories = df['CATEGORY'].to_numpy(dtype=object)
+    positions = np.arange(len(df), dtype=np.int64)
+
+    is_try = (df['POINTS'] == "TRY").to_numpy() & ~np.isnan(seconds)
+    is_origin = df['CATEGORY'].isin(origin_categories).to_numpy() & ~np.isnan(seconds)
+    if not is_try.any() or not is_origin.any():
+        return result
+
+    values = result.to_numpy(dtype=object, copy=True)
+
+    if by_team:
+        teams = df['TEAM'].to_numpy(dtype=object) if 'TEAM' in df.columns else np.full(len(df), None, dtype=object)
+        for team in pd.unique(teams[is_try]):
+            if team is None or team != team:
+                continue
+            team_mask = teams == team
+            try_pos = positions[is_try & team_mask]
+            origin_pos = positions[is_origin & team_mask]
+            found = _last_preceding_positions(seconds[origin_pos], origin_pos, seconds[try_pos])
+            hit = found >= 0
+            values[try_pos[hit]] = categories[found[hit]]
+    else:
+        try_pos = positions[is_try]
+        origin_pos = positions[is_origin]
+        found = _last_preceding_positions(seconds[origin_pos], origin_pos, seconds[try_pos])
+        hit = found >= 0
+        values[try_pos[hit]] = categories[found[hit]]
+
+    return pd.Series(values, index=df.index, dtype=object)
+
+
+def sweep_try_origins(seconds, categories, teams, is_try, origin_categories=None):
+    """
+    Origen de cada try recorriendo los eventos una vez en orden de SECOND.
+
+    Pensada para los eventos de la importación de XML (listas de dicts, sin
+    DataFrame). Lleva, por equipo, la posición del último evento de origen
+    visto; los orígenes de un mismo SECOND recién cuentan para los tries de
+    segundos posteriores. Devuelve una lista con la categoría de origen de
+    cada try (None en el resto), la misma que resolve_try_origins: el último
+    en el orden de la lista entre los orígenes del equipo con SECOND menor.
+    Con teams=None no se distingue por equipo; si no, los eventos sin TEAM
+    (None o NaN) no son ni tries ni orígenes, como en resolve_try_origins
+    con by_team=True.
+
+    Si los eventos ya vienen ordenados por SECOND (lo normal en un XML) el
+    costo es O(n); si no, se ordenan antes y es O(n log n).
+    """
+    origin_set = set(TRY_ORIGIN_CATEGORIES if origin_categories is None else origin_categories)
+    result = [None] * len(seconds)
+    # Los eventos sin SECOND (NaN) no son ni tries ni orígenes
+    order = [i for i, second in enumerate(seconds) if second == second]
+    if any(seconds[a] > seconds[b] for a, b in zip(order, order[1:])):
+        order.sort(key=seconds.__getitem__)
+
+    latest = {}
+    pending = []
+    current_second = None
+    for i in order:
+        if teams is None:
+            team = None
+        else:
+            team = teams[i]
+            if team is None or team != team:
+                continue
+        second = seconds[i]
+        if second != current_second:
+            for origin_team, position in pending:
+                if position > latest.get(origin_team, -1):
+                    latest[origin_team] = position
+            pending.clear()
+            current_second = second
+
+        if is_try[i]:
+            position = latest.get(team, -1)
+            if position >= 0:
+                result[i] = categories[position]
+        if categories[i] in origin_set:
+            pending.append((team, i))
+    return result
+
+
+def calcular_origen_tries(df, origin_categories=None, by_team=False):
+    """Asigna la columna TRY_ORIGIN a todos los tries del DataFrame"""
+    if 'POINTS' not in df.columns:
+        raise KeyError("La columna 'POINTS' no existe en el DataFrame")
+
+    df['TRY_ORIGIN'] = resolve_try_origins(df, origin_categories, by_team=by_team)
+    return df
+
+
+def segment_possessions(df, possession_categories=None, origin_categories=None,
+                        end_categories=None, ruck_category=RUCK_CATEGORY):
+    """
+    Segmenta las posesiones de ATTACK/DEFENCE en una sola pasada.
+
+    Para cada evento de posesión devuelve:
+      ORIGIN: categoría del último evento de origen con SECOND menor
+      END:    categoría del primer evento de cierre con SECOND mayor
+      PHASES: rucks entre el origen (0 si no hay) y el cierre (o el propio
+              evento si no hay cierre), ambos incluidos, más uno
+
+    El resultado es un DataFrame alineado con df.index; las filas que no son
+    de posesión quedan con None/NaN. Los rucks se cuentan con dos
+    searchsorted sobre sus SECOND ordenados.
+    """
+    if possession_categories is None:
+        possession_categories = POSSESSION_CATEGORIES
+    if origin_categories is None:
+        origin_categories = POSSESSION_ORIGIN_CATEGORIES
+    if end_categories is None:
+        end_categories = POSSESSION_END_CATEGORIES
+
+    n = len(df)
+    origin = np.full(n, None, dtype=object)
+    end = np.full(n, None, dtype=object)
+    phases = np.full(n, np.nan)
+
+    if n and 'CATEGORY' in df.columns and 'SECOND' in df.columns:
+        seconds = pd.to_numeric(df['SECOND'], errors='coerce').to_numpy(dtype=float)
+        categories = df['CATEGORY'].to_numpy(dtype=object)
+        category_series = df['CATEGORY']
+        positions = np.arange(n, dtype=np.int64)
+        has_second = ~np.isnan(seconds)
+
+        is_possession = category_series.isin(possession_categories).to_numpy()
+        query_pos = positions[is_possession & has_second]
+        query_seconds = seconds[query_pos]
+
+        origin_pos = positions[category_series.isin(origin_categories).to_numpy() & has_second]
+        end_pos = positions[category_series.isin(end_categories).to_numpy() & has_second]
+        found_origin = _last_preceding_positions(seconds[origin_pos], origin_pos, query_seconds)
+        found_end = _first_following_positions(seconds[end_pos], end_pos, query_seconds)
+
+        has_origin = found_origin >= 0
+        has_end = found_end >= 0
+        origin[query_pos[has_origin]] = categories[found_origin[has_origin]]
+        end[query_pos[has_end]] = categories[found_end[has_end]]
+
+        window_start = np.where(has_origin, seconds[np.maximum(found_origin, 0)], 0.0)
+        window_end = np.where(has_end, seconds[np.maximum(found_end, 0)], query_seconds)
+        ruck_seconds = np.sort(seconds[(category_series == ruck_category).to_numpy() & has_second])
+        rucks = (np.searchsorted(ruck_seconds, window_end, side="right")
+                 - np.searchsorted(ruck_seconds, window_start, side="left"))
+
+        # Un evento de posesión sin SECOND no tiene origen, cierre ni rucks
+        phases[is_possession] = 1
+        phases[query_pos] = rucks + 1
+
+    return pd.DataFrame({
+        'ORIGIN': pd.Series(origin, index=df.index, dtype=object),
+        'END': pd.Series(end, index=df.index, dtype=object),
+        'PHASES': pd.Series(phases, index=df.index),
+    })
+
+
+def calculate_attack_defence(df, **kwargs):
+    """Asigna ORIGIN, END y PHASES a los eventos de ATTACK/DEFENCE del DataFrame"""
+    segments = segment_possessions(df, **kwargs)
+    for column in segments.columns:
+        df[column] = segments[column]
+    return df
+
+
+def tiempo_de_juego(second, kick_off_1, end_1, kick_off_2):
+    """Tiempo de juego (segundos) de un instante de video, o None si cae en el descanso"""
+    if second is None:
+        return None
+    if second <= end_1:
+        return second - kick_off_1
+    elif second >= kick_off_2:
+        return (end_1 - kick_off_1) + (second - kick_off_2)
+    return None
+
+
+def half_time_groups(kick_off_1, end_1, kick_off_2, end_2):
+    """Grupos de 20' de /events a partir del inicio y fin de cada tiempo (en segundos de video)"""
+    def game_time(second):
+        return tiempo_de_juego(second, kick_off_1, end_1, kick_off_2)
+
+    second_half = game_time(kick_off_2) or 0
+    return [
+        {"label": "0'- 20'", "start": 0, "end": 20 * 60},
+        {"label": "20' - 40'", "start": 20 * 60, "end": game_time(end_1) or 0},
+        {"label": "40' - 60'", "start": second_half, "end": second_half + 20 * 60},
+        {"label": "60' - 80'", "start": second_half + 20 * 60, "end": game_time(end_2) or 0},
+    ]
+
+
+def half_boundaries(df):
+    """
+    (kick_off_1, end_1, kick_off_2, end_2) de un partido: primer KICK OFF y
+    último END de cada tiempo según PERIODS (NaN si falta alguno).
+    """
+    def second(category, period, how):
+        rows = (df['CATEGORY'] == category) & (df['PERIODS'] == period)
+        return getattr(df.loc[rows, 'SECOND'], how)()
+
+    return (second('KICK OFF', 1, 'min'), second('END', 1, 'max'),
+            second('KICK OFF', 2, 'min'), second('END', 2, 'max'))
+
+
+def game_time_groups(df, boundaries=None):
+    """
+    Time_Group de cada evento a partir de CATEGORY, PERIODS y SECOND, como
+    lo calcula /events (None donde no hay tiempo de juego).
+    """
+    kick_off_1, end_1, kick_off_2, end_2 = boundaries or half_boundaries(df)
+    seconds = pd.to_numeric(df['SECOND'], errors='coerce').to_numpy(dtype=float)
+    game_seconds = game_seconds_by_halves(seconds, kick_off_1, end_1, kick_off_2)
+    groups = assign_time_groups(game_seconds, half_time_groups(kick_off_1, end_1, kick_off_2, end_2))
+    groups[np.isnan(game_seconds)] = None
+    return groups
+
+
+def game_seconds_by_halves(seconds, kick_off_1, end_1, kick_off_2):
+    """
+    Versión vectorizada de tiempo_de_juego: el primer tiempo llega hasta end_1
+    y el segundo empieza en kick_off_2. Devuelve NaN para el descanso.
+    """
+    seconds = np.asarray(seconds, dtype=float)
+    first_half = seconds <= end_1
+    second_half = ~first_half & (seconds >= kick_off_2)
+    return np.select(
+        [first_half, second_half],
+        [seconds - kick_off_1, (end_1 - kick_off_1) + (seconds - kick_off_2)],
+        default=np.nan,
+    )
+
+
+def game_seconds_by_periods(seconds, periods, start_1, end_1, start_2):
+    """
+    Tiempo de juego según la columna PERIODS (criterio de /pescara).
+    Un inicio de periodo nulo o cero deja ese periodo sin tiempo (NaN).
+    """
+    seconds = np.asarray(seconds, dtype=float)
+    periods = np.asarray(periods, dtype=object)
+    start_1 = start_1 if start_1 else np.nan
+    start_2 = start_2 if start_2 else np.nan
+    return np.select(
+        [periods == 1, periods == 2],
+        [seconds - start_1, (end_1 - start_1) + (seconds - start_2)],
+        default=np.nan,
+    )
+
+
+def format_clock(values):
+    """
+    Formatea segundos como "MM:SS" igual que divmod + f"{int(m):02}:{int(s):02}",
+    incluidos los valores negativos (-220 -> "-4:20", por el piso de divmod).
+    NaN se convierte en None.
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(len(values), None, dtype=object)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return result
+
+    minutes = np.floor_divide(values[valid], 60).astype(np.int64)
+    secs = np.mod(values[valid], 60).astype(np.int64)
+
+    # Solo se formatean los pares minuto/segundo distintos (a lo sumo unos miles)
+    codes, inverse = np.unique(minutes * 60 + secs, return_inverse=True)
+    labels = np.array([f"{m:02}:{s:02}" for m, s in zip(codes // 60, codes % 60)], dtype=object)
+    result[valid] = labels[inverse.reshape(-1)]
+    return result
+
+
+def assign_time_groups(game_seconds, groups, default=None):
+    """
+    Devuelve la etiqueta del primer grupo {"label", "start", "end"} que contiene
+    cada tiempo de juego (start <= t < end). Los que no caen en ningún grupo
+    toman `default` (escalar o array del mismo largo).
+    """
+    game_seconds = np.asarray(game_seconds, dtype=float)
+    conditions = [(game_seconds >= g["start"]) & (game_seconds < g["end"]) for g in groups]
+    group_index = np.select(conditions, np.arange(len(groups)), default=-1)
+
+    if default is None:
+        result = np.full(len(game_seconds), None, dtype=object)
+    else:
+        result = np.array(default, dtype=object, copy=True)
+    labels = np.array([g["label"] for g in groups], dtype=object)
+    matched = group_index >= 0
+    result[matched] = labels[group_index[matched]]
+    return result
+
+
+def add_game_time_columns(df, game_seconds, groups, video_time=False):
+    """
+    Agrega Game_Time y Time_Group (y TIME(VIDEO) si video_time) a todo el
+    DataFrame de una vez. Donde no hay tiempo de juego ambos quedan en None;
+    los eventos fuera de todo grupo conservan el Time_Group que ya tuvieran.
+    """
+    game_seconds = np.asarray(game_seconds, dtype=float)
+    has_time = ~np.isnan(game_seconds)
+
+    previous_group = df['Time_Group'].to_numpy(dtype=object) if 'Time_Group' in df.columns else None
+    time_group = assign_time_groups(game_seconds, groups, default=previous_group)
+    time_group[~has_time] = None
+
+    def as_column(values):
+        return pd.Series(values, index=df.index, dtype=object)
+
+    if video_time:
+        video_seconds = np.trunc(pd.to_numeric(df['SECOND'], errors='coerce').to_numpy(dtype=float))
+        df['TIME(VIDEO)'] = as_column(format_clock(video_seconds))
+    df['Game_Time'] = as_column(format_clock(game_seconds))
+    df['Time_Group'] = as_column(time_group)
+    return df
+
+
+def _text_values(df, column, mask, missing, truthy_only=False):
+    """
+    str(valor).strip() de las filas de la máscara, igual que hacían los apply
+    con row.get(column, missing). Con truthy_only los valores falsos ('' o 0)
+    quedan en None, como `str(...) if row.get(column) else None`.
+    """
+    if column not in df.columns:
+        return np.full(int(mask.sum()), missing, dtype=object)
+    values = df[column].to_numpy(dtype=object)[mask]
+    if truthy_only:
+        return np.array([str(v).strip() if v else None for v in values], dtype=object)
+    return np.array([str(v).strip() for v in values], dtype=object)
+
+
+def _valid_players(*candidates):
+    """Jugadores no vacíos y distintos de 'nan' (así quedan los NaN tras str())"""
+    return [p for p in candidates if p and p.lower() != 'nan']
+
+
+def _set_rows(df, column, mask, values):
+    """Asigna valores (pueden ser listas) solo a las filas de la máscara"""
+    column_values = df[column].to_numpy(dtype=object).copy() if column in df.columns \
+        else np.full(len(df), None, dtype=object)
+    for position, value in zip(np.flatnonzero(mask), values):
+        column_values[position] = value
+    df[column] = pd.Series(column_values, index=df.index, dtype=object)
+
+
+def process_lineout_events(df):
+    """
+    LINEOUT: el jugador con prefijo "T-" (en PLAYER o PLAYER_2) es el
+    lanzador y el otro el receptor; PLAYER pasa a ser la lista de ambos.
+    LINE_THROWER y LINE_RECEIVER quedan en None fuera de los lineouts.
+    """
+    mask = (df['CATEGORY'] == 'LINEOUT').to_numpy()
+    thrower = np.full(len(df), None, dtype=object)
+    receiver = np.full(len(df), None, dtype=object)
+
+    if mask.any():
+        player = _text_values(df, 'PLAYER', mask, '')
+        player_2 = _text_values(df, 'PLAYER_2', mask, '')
+        first = pd.Series(player, dtype=object).str.startswith('T-').to_numpy(dtype=bool)
+        second = ~first & pd.Series(player_2, dtype=object).str.startswith('T-').to_numpy(dtype=bool)
+
+        lineout_thrower = np.full(len(player), None, dtype=object)
+        lineout_receiver = np.full(len(player), None, dtype=object)
+        lineout_thrower[first] = [p[2:] for p in player[first]]
+        lineout_receiver[first] = player_2[first]
+        lineout_thrower[second] = [p[2:] for p in player_2[second]]
+        lineout_receiver[second] = player[second]
+
+        thrower[mask] = lineout_thrower
+        receiver[mask] = lineout_receiver
+        _set_rows(df, 'PLAYER', mask, [_valid_players(t, r) or None
+                                       for t, r in zip(lineout_thrower, lineout_receiver)])
+
+    df['LINE_THROWER'] = pd.Series(thrower, index=df.index, dtype=object)
+    df['LINE_RECEIVER'] = pd.Series(receiver, index=df.index, dtype=object)
+    return df
+
+
+def process_tackle_events(df):
+    """
+    TACKLE: PLAYER y PLAYER_2 se combinan (string si hay uno solo, lista si
+    hay dos) y Team_Tackle_Count vale 1 en cada tackle.
+    """
+    mask = (df['CATEGORY'] == 'TACKLE').to_numpy()
+    if not mask.any():
+        return df
+
+    player = _text_values(df, 'PLAYER', mask, None, truthy_only=True)
+    player_2 = _text_values(df, 'PLAYER_2', mask, None, truthy_only=True)
+    players = [_valid_players(a, b) for a, b in zip(player, player_2)]
+    _set_rows(df, 'PLAYER', mask, [p[0] if len(p) == 1 else (p or None) for p in players])
+    df['Team_Tackle_Count'] = np.where(mask, 1.0, np.nan)
+    return df
+
+
+def process_penalty_events(df):
+    """
+    PENALTY: ADVANCE NEUTRAL es amarilla y NEGATIVE es roja para el jugador
+    (o "Player OPPONENT" si el penal es del rival). YELLOW-CARD y RED-CARD
+    quedan en None en el resto de los eventos.
+    """
+    mask = (df['CATEGORY'] == 'PENALTY').to_numpy()
+    yellow = np.full(len(df), None, dtype=object)
+    red = np.full(len(df), None, dtype=object)
+
+    if mask.any():
+        advance = _text_values(df, 'ADVANCE', mask, '')
+        player = _text_values(df, 'PLAYER', mask, '')
+        if 'TEAM' in df.columns:
+            player[df['TEAM'].to_numpy(dtype=object)[mask] == 'OPPONENT'] = "Player OPPONENT"
+
+        positions = np.flatnonzero(mask)
+        neutral = advance == 'NEUTRAL'
+        negative = advance == 'NEGATIVE'
+        yellow[positions[neutral]] = player[neutral]
+        red[positions[negative]] = player[negative]
+
+    df['YELLOW-CARD'] = pd.Series(yellow, index=df.index, dtype=object)
+    df['RED-CARD'] = pd.Series(red, index=df.index, dtype=object)
+    return df
+
+
+def enrich_excel_events(df):
+    """
+    Etapa única de convert_excel_to_json_2: lineouts, tackles, penales y
+    segmentación de posesiones, en ese orden y sobre columnas completas.
+    """
+    df = process_lineout_events(df)
+    df = process_tackle_events(df)
+    df = process_penalty_events(df)
+    return calculate_attack_defence(df)
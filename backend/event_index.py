@@ -0,0 +1,109 @@
+"""
+Índices invertidos sobre el DataFrame de eventos de un partido.
+
+Para cada columna indexada se guarda {valor normalizado: posiciones de fila}.
+PLAYER puede ser un string o una lista (LINEOUT con lanzador y receptor,
+TACKLE con dos tacleadores): las listas se expanden, así que un evento
+aparece bajo cada uno de sus jugadores.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Dimensiones que se indexan al cargar el partido; el resto se indexa al primer uso
+EAGER_COLUMNS = ("CATEGORY", "PLAYER", "TEAM", "PERIODS")
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def normalize_key(value):
+    """Clave de comparación: sin distinguir mayúsculas y con 1.0 == "1" """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip().casefold()
+
+
+def build_column_index(series):
+    """{valor normalizado: posiciones ordenadas y sin repetir} de una columna"""
+    values = pd.Series(series.to_numpy(dtype=object), dtype=object)
+    exploded = values.explode()
+    exploded = exploded[exploded.notna()]
+    if exploded.empty:
+        return {}
+
+    positions = exploded.index.to_numpy(dtype=np.int64)
+    keys = pd.Series([normalize_key(v) for v in exploded.to_numpy(dtype=object)], dtype=object)
+    return {key: np.unique(positions[idx]) for key, idx in keys.groupby(keys.to_numpy()).indices.items()}
+
+
+class EventIndex:
+    def __init__(self, df, eager_columns=EAGER_COLUMNS):
+        self.df = df
+        self.size = len(df)
+        self._indexes = {}
+        self._ranks = {}
+        self._lock = threading.Lock()
+        for column in eager_columns:
+            if column in df.columns:
+                self._indexes[column] = build_column_index(df[column])
+
+    def column_index(self, column):
+        with self._lock:
+            index = self._indexes.get(column)
+        if index is None:
+            index = build_column_index(self.df[column])
+            with self._lock:
+                self._indexes[column] = index
+        return index
+
+    def positions(self, column, values):
+        """Posiciones de los eventos cuya columna coincide con alguno de los valores"""
+        index = self.column_index(column)
+        found = [index[k] for k in (normalize_key(v) for v in values) if k in index]
+        if not found:
+            return _EMPTY
+        return found[0] if len(found) == 1 else np.unique(np.concatenate(found))
+
+    def select(self, filters):
+        """Intersección de {columna: [valores]}; sin filtros devuelve todas las posiciones"""
+        result = None
+        for column, values in filters.items():
+            found = self.positions(column, values)
+            result = found if result is None else np.intersect1d(result, found, assume_unique=True)
+        return np.arange(self.size, dtype=np.int64) if result is None else result
+
+    def sort_rank(self, column):
+        """
+        Rango global de cada fila al ordenar por la columna (nulos al final),
+        calculado una vez; ordenar un subconjunto es un argsort de enteros.
+        """
+        with self._lock:
+            rank = self._ranks.get(column)
+        if rank is not None:
+            return rank
+
+        series = self.df[column]
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            order = np.argsort(series.to_numpy(dtype=float), kind="stable")
+        else:
+            values = series.to_numpy(dtype=object, na_value=None)
+            keys = pd.DataFrame({
+                "null": [v is None for v in values],
+                "key": ["" if v is None else normalize_key(", ".join(map(str, v)) if isinstance(v, list) else v)
+                        for v in values],
+            })
+            order = keys.sort_values(["null", "key"], kind="mergesort").index.to_numpy()
+
+        rank = np.empty(self.size, dtype=np.int64)
+        rank[order] = np.arange(self.size, dtype=np.int64)
+        with self._lock:
+            self._ranks[column] = rank
+        return rank
+
+    def sort(self, positions, column, descending=False):
+        """Ordena posiciones según la columna usando sort_rank"""
+        order = np.argsort(self.sort_rank(column)[positions], kind="stable")
+        if descending:
+            order = order[::-1]
+        return positions[order]
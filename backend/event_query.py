@@ -0,0 +1,174 @@
+"""
+Consultas sobre los eventos de un partido ya cargado en memoria.
+
+LoadedMatch guarda el DataFrame enriquecido, sus registros JSON y la
+respuesta completa preserializada. Los filtros (categoría, equipo, jugador,
+periodo, descriptores), la ventana de tiempo, la proyección de campos y la
+paginación por cursor se resuelven con el EventIndex del partido y un orden
+por SECOND calculados una sola vez por versión de los datos.
+"""
+import base64
+import binascii
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from event_index import EventIndex
+from interval_index import IntervalIndex
+from prepared_response import PreparedJSON
+from serialization import frame_to_records
+
+# Alias de parámetros en minúscula -> columna
+FILTER_ALIASES = {
+    "category": "CATEGORY",
+    "team": "TEAM",
+    "player": "PLAYER",
+    "period": "PERIODS",
+}
+RESERVED_PARAMS = {"fields", "limit", "cursor", "start", "end"}
+MAX_LIMIT = 5000
+
+
+class QueryError(ValueError):
+    """Parámetros de consulta inválidos (se responde 400)"""
+
+
+def _finite_float(value):
+    """float(value), con ValueError también para nan/inf (no son un instante de video)"""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"valor no finito: {value}")
+    return number
+
+
+def _encode_cursor(version, position):
+    raw = json.dumps({"v": version, "p": int(position)}).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor, version):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        position = int(data["p"])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise QueryError("Cursor inválido")
+    if data.get("v") != version:
+        raise QueryError("El cursor corresponde a otra versión de los datos; vuelva a empezar")
+    return position
+
+
+class LoadedMatch:
+    def __init__(self, df, header):
+        self.df = df.reset_index(drop=True)
+        self.header = header
+        self.columns = list(self.df.columns)
+        self._columns_by_name = {str(c).upper(): c for c in self.columns}
+        self.records = frame_to_records(self.df)
+        self.prepared = PreparedJSON({"header": header, "events": self.records})
+        self.version = self.prepared.etag[:16]
+
+        seconds = pd.to_numeric(self.df['SECOND'], errors='coerce').to_numpy(dtype=float) \
+            if 'SECOND' in self.df.columns else np.full(len(self.df), np.nan)
+        self._time_order = np.argsort(seconds, kind='stable')
+        self._sorted_seconds = seconds[self._time_order]
+
+        self.index = EventIndex(self.df)
+        self.intervals = IntervalIndex.from_frame(self.df)
+
+    def time_window(self, start=None, end=None):
+        """Posiciones (ordenadas) de los eventos con start <= SECOND < end"""
+        lo = 0 if start is None else np.searchsorted(self._sorted_seconds, start, side='left')
+        hi = np.searchsorted(self._sorted_seconds, np.inf, side='right') if end is None \
+            else np.searchsorted(self._sorted_seconds, end, side='left')
+        return np.sort(self._time_order[lo:hi])
+
+    def parse_filters(self, args):
+        """Convierte los parámetros de la petición en {columna: [valores]}"""
+        filters = {}
+        for name in args:
+            if name in RESERVED_PARAMS:
+                continue
+            column = self._columns_by_name.get(FILTER_ALIASES.get(name, name).upper())
+            if column is None:
+                raise QueryError(f"Parámetro desconocido: {name}")
+            values = [v for raw in args.getlist(name) for v in raw.split(',') if v.strip()]
+            if values:
+                filters.setdefault(column, []).extend(values)
+        return filters
+
+    def select(self, filters, start=None, end=None):
+        """Posiciones ordenadas que cumplen todos los filtros (OR dentro de cada columna)"""
+        positions = self.index.select(filters)
+        if start is not None or end is not None:
+            positions = np.intersect1d(positions, self.time_window(start, end), assume_unique=True)
+        return positions
+
+    def query(self, args):
+        """Resuelve una consulta de /events con filtros, proyección y paginación"""
+        filters = self.parse_filters(args)
+
+        try:
+            start = _finite_float(args['start']) if args.get('start') else None
+            end = _finite_float(args['end']) if args.get('end') else None
+            limit = int(args['limit']) if args.get('limit') else None
+        except ValueError:
+            raise QueryError("start, end y limit deben ser numéricos (y finitos)")
+        if limit is not None and not 1 <= limit <= MAX_LIMIT:
+            raise QueryError(f"limit debe estar entre 1 y {MAX_LIMIT}")
+
+        fields = self.parse_fields(args)
+        positions = self.select(filters, start, end)
+        total = len(positions)
+
+        if args.get('cursor'):
+            after = _decode_cursor(args['cursor'], self.version)
+            positions = positions[np.searchsorted(positions, after, side='right'):]
+
+        next_cursor = None
+        if limit is not None and len(positions) > limit:
+            positions = positions[:limit]
+            next_cursor = _encode_cursor(self.version, positions[-1])
+
+        events = self.project(positions, fields)
+        return {"header": self.header, "events": events, "count": total, "next_cursor": next_cursor}
+
+    def parse_fields(self, args):
+        """Campos pedidos con ?fields= (None si se piden todos)"""
+        if not args.get('fields'):
+            return None
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in self.columns]
+        if unknown:
+            raise QueryError(f"Campos desconocidos: {', '.join(unknown)}")
+        return fields
+
+    def project(self, positions, fields=None):
+        """Registros de las posiciones dadas, solo con `fields` si se indican"""
+        records = self.records
+        if fields is None:
+            return [records[p] for p in positions]
+        return [{f: records[p][f] for f in fields} for p in positions]
+
+    def events_at(self, args):
+        """Eventos activos en el instante de video ?t= (SECOND <= t <= SECOND + DURATION)"""
+        try:
+            t = _finite_float(args['t'])
+        except (KeyError, ValueError):
+            raise QueryError("t es obligatorio y debe ser numérico (y finito)")
+        events = self.project(self.intervals.at(t), self.parse_fields(args))
+        return {"t": t, "events": events, "count": len(events)}
+
+    def events_between(self, args):
+        """Eventos cuyo tramo de video se superpone con [?t0=, ?t1=]"""
+        try:
+            t0 = _finite_float(args['t0'])
+            t1 = _finite_float(args['t1'])
+        except (KeyError, ValueError):
+            raise QueryError("t0 y t1 son obligatorios y deben ser numéricos (y finitos)")
+        if t1 < t0:
+            raise QueryError("t1 debe ser mayor o igual que t0")
+        events = self.project(self.intervals.overlapping(t0, t1), self.parse_fields(args))
+        return {"t0": t0, "t1": t1, "events": events, "count": len(events)}
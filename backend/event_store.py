@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Almacén de eventos de todos los partidos en formato columnar (Parquet).
+
+Cada partido se guarda particionado por temporada y partido:
+
+    <root>/season=24-25/match_id=serie-b-prato/events.parquet
+    <root>/manifest.json
+
+El manifiesto guarda la cabecera del partido (contenido de matches*.json),
+la firma de los archivos de origen y las columnas que se codificaron como
+JSON porque mezclan tipos (p. ej. PLAYER como string o lista). La lectura usa
+memory-map y solo decodifica las columnas pedidas, así que una consulta de
+temporada sobre CATEGORY/TEAM/PLAYER no tiene que parsear el JSON completo de
+cada partido.
+
+Varias peticiones pueden sincronizar el almacén a la vez: la ingesta se
+serializa por partido y cada archivo se escribe en un temporal de nombre
+único antes de reemplazar el anterior.
+
+pyarrow se importa recién al leer o escribir el almacén: los helpers de este
+módulo (slugify, season_of, discover_match_files) y el resto de la API no lo
+necesitan para arrancar.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+from match_cache import file_signature
+
+EVENT_STORE_DIR = os.getenv('EVENT_STORE_DIR', '/app/uploads/event_store')
+MANIFEST_NAME = 'manifest.json'
+
+# Tipos que Parquet guarda tal cual; el resto se codifica como texto JSON
+_PLAIN_KINDS = {"string", "floating", "integer", "mixed-integer-float", "boolean", "empty"}
+
+
+def _parquet():
+    """(pyarrow, pyarrow.parquet), importados en el primer uso del almacén"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    return pa, pq
+
+
+def available():
+    """True si pyarrow está instalado y el almacén se puede usar"""
+    try:
+        _parquet()
+    except ImportError:
+        return False
+    return True
+
+
+def entry_version(entry):
+    """Versión corta de un partido del almacén: cambia cuando cambian sus archivos de origen"""
+    if entry.get('version'):
+        return entry['version']
+    raw = json.dumps(entry.get('signature'), sort_keys=True).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def season_of(header):
+    """
+    Deduce la temporada ("24-25") de la cabecera del partido: primero desde
+    COMPETITION ("SERIE B 24-25") y si no desde DATE (epoch ms o ISO). La
+    temporada empieza en agosto.
+    """
+    match = re.search(r'(\d{2})-(\d{2})', str(header.get('COMPETITION', '')))
+    if match:
+        return f"{match.group(1)}-{match.group(2)}"
+
+    date = header.get('DATE')
+    try:
+        if isinstance(date, (int, float)):
+            date = datetime.fromtimestamp(date / 1000, tz=timezone.utc)
+        else:
+            date = datetime.fromisoformat(str(date))
+    except (TypeError, ValueError, OverflowError, OSError):
+        return "unknown"
+
+    start = date.year if date.month >= 8 else date.year - 1
+    return f"{start % 100:02d}-{(start + 1) % 100:02d}"
+
+
+def discover_match_files(folder):
+    """
+    Empareja cada matches*.json/match-*.json con su matriz: usa el campo JSON
+    de la cabecera si existe (match-PRATO.json -> SERIE_B_PRATO.json) o el
+    mismo sufijo con prefijo "matriz" (matchesC2.json -> matrizC2.json).
+    """
+    pairs = []
+    for matches_path in sorted(glob.glob(os.path.join(folder, 'match*.json'))):
+        try:
+            with open(matches_path, 'r') as f:
+                header = json.load(f)[0]
+        except (ValueError, IndexError, KeyError, OSError):
+            continue
+
+        name = os.path.basename(matches_path)
+        if header.get('JSON'):
+            matriz_name = f"{header['JSON']}.json"
+        elif name.startswith('matches'):
+            matriz_name = 'matriz' + name[len('matches'):]
+        else:
+            continue
+
+        matriz_path = os.path.join(folder, matriz_name)
+        if os.path.exists(matriz_path):
+            pairs.append((matriz_path, matches_path))
+    return pairs
+
+
+def replace_atomic(path, write):
+    """
+    write(ruta_temporal) y luego os.replace sobre path. El temporal tiene
+    nombre único en la misma carpeta: dos escrituras simultáneas del mismo
+    archivo no se pisan el .tmp y gana la última.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    os.close(handle)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _encode_frame(df):
+    """Convierte columnas de tipo mixto a texto JSON; devuelve (df, columnas_json)"""
+    df = df.copy()
+    json_columns = []
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+        if infer_dtype(df[column], skipna=True) in _PLAIN_KINDS:
+            continue
+        values = df[column].to_numpy(dtype=object, na_value=None)
+        df[column] = pd.Series(
+            [None if v is None else json.dumps(v, ensure_ascii=False) for v in values],
+            index=df.index, dtype=object,
+        )
+        json_columns.append(column)
+    return df, json_columns
+
+
+def _decode_frame(df, json_columns):
+    for column in json_columns:
+        if column in df.columns:
+            values = df[column].to_numpy(dtype=object, na_value=None)
+            df[column] = pd.Series([None if v is None else json.loads(v) for v in values],
+                                   index=df.index, dtype=object)
+    return df
+
+
+class EventStore:
+    def __init__(self, root=EVENT_STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        # Un lock por match_id: la ingesta de un partido no corre dos veces a la vez
+        self._match_locks = {}
+        self._manifest = self._read_manifest()
+
+    # --- manifiesto -----------------------------------------------------
+
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path(), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        def write(tmp_path):
+            with open(tmp_path, 'w') as f:
+                json.dump(self._manifest, f, indent=2, ensure_ascii=False)
+        replace_atomic(self._manifest_path(), write)
+
+    def _events_path(self, entry):
+        return os.path.join(self.root, f"season={entry['season']}", f"match_id={entry['match_id']}", 'events.parquet')
+
+    # --- ingesta --------------------------------------------------------
+
+    def _match_lock(self, match_id):
+        with self._lock:
+            return self._match_locks.setdefault(match_id, threading.RLock())
+
+    def ingest(self, matriz_path, matches_path, match_id=None, force=False):
+        """Guarda un partido en el almacén (si sus archivos cambiaron) y devuelve su entrada"""
+        if match_id is None:
+            match_id = slugify(os.path.splitext(os.path.basename(matriz_path))[0])
+        # Si otra petición está ingresando el mismo partido se espera y se usa su entrada
+        with self._match_lock(match_id):
+            signature = [list(file_signature(matriz_path)), list(file_signature(matches_path))]
+            with self._lock:
+                entry = self._manifest.get(match_id)
+            if entry is not None and entry['signature'] == signature and not force:
+                return entry
+
+            with open(matriz_path, 'r') as f:
+                events = pd.DataFrame(json.load(f))
+            with open(matches_path, 'r') as f:
+                header = json.load(f)[0]
+            return self.put(match_id, events, header, signature=signature,
+                            sources=[os.path.abspath(matriz_path), os.path.abspath(matches_path)])
+
+    def put(self, match_id, events, header, signature=None, sources=None):
+        """Escribe (o reemplaza) los eventos de un partido ya cargado en memoria"""
+        pa, pq = _parquet()
+        encoded, json_columns = _encode_frame(events)
+        entry = {
+            "match_id": match_id,
+            "season": season_of(header),
+            "header": header,
+            "rows": int(len(events)),
+            "columns": [str(c) for c in events.columns],
+            "json_columns": json_columns,
+            "signature": signature,
+            "sources": sources,
+        }
+        entry["version"] = entry_version(entry) if signature is not None else os.urandom(8).hex()
+
+        path = self._events_path(entry)
+        table = pa.Table.from_pandas(encoded, preserve_index=False)
+        with self._match_lock(match_id):
+            replace_atomic(path, lambda tmp_path: pq.write_table(table, tmp_path))
+            with self._lock:
+                previous = self._manifest.get(match_id)
+                if previous is not None and self._events_path(previous) != path:
+                    try:
+                        os.remove(self._events_path(previous))
+                    except OSError:
+                        pass
+                self._manifest[match_id] = entry
+                self._write_manifest()
+        return entry
+
+    def ingest_folder(self, folder):
+        """Ingresa todos los pares matriz/matches que encuentre en la carpeta"""
+        return [self.ingest(matriz, matches) for matriz, matches in discover_match_files(folder)]
+
+    def sync(self, pairs):
+        """
+        Deja el almacén igual a `pairs` ({match_id: (matriz, matches)}):
+        ingresa los partidos nuevos o cambiados (los demás solo cuestan dos
+        stat) y quita los que ya no están. Devuelve (entradas vigentes,
+        {match_id: error} de los que no se pudieron leer). Si un partido ya
+        guardado no se puede volver a leer (p. ej. su JSON se está
+        reescribiendo), se sigue usando la entrada anterior, que es válida.
+        """
+        entries, failed = [], {}
+        for match_id, (matriz_path, matches_path) in sorted(pairs.items()):
+            try:
+                entries.append(self.ingest(matriz_path, matches_path, match_id=match_id))
+            except (OSError, ValueError, IndexError, KeyError) as e:
+                failed[match_id] = e
+                with self._lock:
+                    previous = self._manifest.get(match_id)
+                if previous is not None:
+                    entries.append(previous)
+
+        with self._lock:
+            removed = [match_id for match_id in self._manifest if match_id not in pairs]
+            for match_id in removed:
+                entry = self._manifest.pop(match_id)
+                try:
+                    os.remove(self._events_path(entry))
+                except OSError:
+                    pass
+            if removed:
+                self._write_manifest()
+        return entries, failed
+
+    # --- lectura --------------------------------------------------------
+
+    def matches(self, season=None):
+        with self._lock:
+            entries = list(self._manifest.values())
+        if season is not None:
+            entries = [e for e in entries if e['season'] == season]
+        return sorted(entries, key=lambda e: (e['season'], e['match_id']))
+
+    def entry(self, match_id):
+        with self._lock:
+            entry = self._manifest.get(match_id)
+        if entry is None:
+            raise KeyError(f"Partido no encontrado en el almacén: {match_id}")
+        return entry
+
+    def read_events(self, match_id, columns=None, categories=None):
+        """
+        Lee los eventos de un partido. `columns` limita las columnas leídas
+        (las inexistentes se ignoran) y `categories` filtra CATEGORY al leer.
+        """
+        entry = self.entry(match_id)
+        if columns is not None:
+            columns = [c for c in columns if c in entry['columns']]
+        filters = [('CATEGORY', 'in', list(categories))] if categories and 'CATEGORY' in entry['columns'] else None
+        _, pq = _parquet()
+        table = pq.read_table(self._events_path(entry), columns=columns, filters=filters, memory_map=True)
+        return _decode_frame(table.to_pandas(), entry['json_columns'])
+
+    def read_season(self, season=None, columns=None, categories=None):
+        """Concatena los eventos de todos los partidos (de una temporada) con su match_id"""
+        frames = []
+        for entry in self.matches(season):
+            df = self.read_events(entry['match_id'], columns=columns, categories=categories)
+            df.insert(0, 'match_id', entry['match_id'])
+            df.insert(1, 'season', entry['season'])
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=['match_id', 'season'] + list(columns or []))
+        return pd.concat(frames, ignore_index=True, sort=False)
+
+
+if __name__ == '__main__':
+    folder = os.path.dirname(EVENT_STORE_DIR.rstrip('/'))
+    store = EventStore()
+    print(f"🔄 Ingresando partidos desde {folder}...")
+    for entry in store.ingest_folder(folder):
+        print(f"   ✅ {entry['season']} / {entry['match_id']}: {entry['rows']} eventos")
+    print(f"📁 Almacén: {store.root}")
@@ -0,0 +1,121 @@
+"""
+Tabla HTML de eventos generada en streaming.
+
+Solo se convierte a HTML la página pedida y las filas se envían en bloques
+a medida que se generan, sin pasar por to_html ni por el compilador de
+plantillas, así que el tiempo de respuesta y la memoria no dependen del
+tamaño de la matriz.
+"""
+from urllib.parse import urlencode
+
+from markupsafe import escape
+
+from serialization import column_values
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+CHUNK_ROWS = 50
+
+_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Events Table</title>
+    <link rel="stylesheet" href="https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css">
+</head>
+<body>
+    <div class="container">
+        <h1 class="mt-5">Events Table</h1>
+"""
+
+_FOOT = """    </div>
+</body>
+</html>
+"""
+
+
+def parse_table_args(args, columns):
+    """Lee page/per_page/sort/order de la petición con valores por defecto seguros"""
+    try:
+        page = max(1, int(args.get('page', 1)))
+    except ValueError:
+        page = 1
+    try:
+        per_page = min(MAX_PAGE_SIZE, max(1, int(args.get('per_page', PAGE_SIZE))))
+    except ValueError:
+        per_page = PAGE_SIZE
+    sort = args.get('sort')
+    if sort not in columns:
+        sort = None
+    descending = args.get('order') == 'desc'
+    return page, per_page, sort, descending
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = ", ".join(str(v) for v in value)
+    return escape(value)
+
+
+def _form(category, player):
+    return f"""        <form method="get" action="/events/table" class="mb-3">
+            <div class="form-row">
+                <div class="col">
+                    <input type="text" name="category" class="form-control" placeholder="Category" value="{escape(category or '')}">
+                </div>
+                <div class="col">
+                    <input type="text" name="player" class="form-control" placeholder="Player" value="{escape(player or '')}">
+                </div>
+                <div class="col">
+                    <button type="submit" class="btn btn-primary">Filter</button>
+                </div>
+            </div>
+        </form>
+"""
+
+
+def stream_events_table(df, positions, base_params, page, per_page, sort=None, descending=False):
+    """
+    Genera la página HTML por partes. `positions` son las filas ya filtradas
+    (y ordenadas); `base_params` son los filtros a conservar en los enlaces.
+    """
+    total = len(positions)
+    pages = max(1, -(-total // per_page))
+    page = min(page, pages)
+    page_positions = positions[(page - 1) * per_page:page * per_page]
+    columns = list(df.columns)
+
+    def link(**overrides):
+        params = {**base_params, 'per_page': per_page, **overrides}
+        params = {k: v for k, v in params.items() if v not in (None, '')}
+        return escape('/events/table?' + urlencode(params))
+
+    yield _HEAD
+    yield _form(base_params.get('category'), base_params.get('player'))
+    yield f'        <p>{total} eventos &middot; página {page} de {pages}</p>\n'
+    yield '        <table class="table table-striped">\n            <thead>\n                <tr>'
+    for column in columns:
+        order = 'desc' if column == sort and not descending else 'asc'
+        arrow = (' &darr;' if descending else ' &uarr;') if column == sort else ''
+        yield f'<th><a href="{link(sort=column, order=order, page=1)}">{escape(column)}</a>{arrow}</th>'
+    yield '</tr>\n            </thead>\n            <tbody>\n'
+
+    for start in range(0, len(page_positions), CHUNK_ROWS):
+        chunk = df.iloc[page_positions[start:start + CHUNK_ROWS]]
+        data = [column_values(chunk[column]) for column in columns]
+        yield "".join(
+            "                <tr>" + "".join(f"<td>{_cell(v)}</td>" for v in row) + "</tr>\n"
+            for row in zip(*data)
+        )
+
+    yield '            </tbody>\n        </table>\n        <nav class="mb-5">\n'
+    sort_params = {'sort': sort, 'order': 'desc' if descending else None}
+    if page > 1:
+        yield f'            <a class="btn btn-secondary" href="{link(page=page - 1, **sort_params)}">&laquo; Anterior</a>\n'
+    if page < pages:
+        yield f'            <a class="btn btn-secondary" href="{link(page=page + 1, **sort_params)}">Siguiente &raquo;</a>\n'
+    yield '        </nav>\n'
+    yield _FOOT
@@ -0,0 +1,174 @@
+"""
+Lectura de los libros Excel de la matriz con una sola apertura y cache.
+
+Las hojas MATRIZ y MATCHES se parsean abriendo el libro una sola vez (con
+python-calamine si está instalado y pandas lo soporta, o con openpyxl en
+modo solo lectura). El resultado se guarda por hash SHA-256 del archivo, en
+memoria y en EXCEL_CACHE_DIR, y un manifiesto registra qué JSON se generaron
+a partir de qué versión del libro para no volver a convertir un Excel que no
+cambió.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from match_cache import file_signature
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+EXCEL_CACHE_DIR = os.getenv('EXCEL_CACHE_DIR', '/app/uploads/excel_cache')
+MANIFEST_NAME = 'conversions.json'
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _open_workbook(path):
+    if python_calamine is not None:
+        try:
+            return pd.ExcelFile(path, engine='calamine')
+        except ValueError:
+            pass  # pandas < 2.2 no conoce el motor calamine
+    return pd.ExcelFile(path, engine='openpyxl')
+
+
+def read_sheets(path, sheet_names):
+    """Parsea varias hojas abriendo el libro una sola vez; devuelve {hoja: DataFrame}"""
+    with _open_workbook(path) as workbook:
+        missing = [name for name in sheet_names if name not in workbook.sheet_names]
+        if missing:
+            raise ValueError(f"Hojas no encontradas en {os.path.basename(path)}: {', '.join(missing)}")
+        return {name: workbook.parse(name) for name in sheet_names}
+
+
+class WorkbookCache:
+    def __init__(self, cache_dir=EXCEL_CACHE_DIR, max_entries=8):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._sheets = OrderedDict()
+        self._digests = {}
+        self._manifest = self._read_manifest()
+
+    # --- hash del libro ---------------------------------------------------
+
+    def digest(self, path):
+        """SHA-256 del libro; solo se recalcula si cambian su mtime o tamaño"""
+        signature = file_signature(path)
+        with self._lock:
+            known = self._digests.get(signature[0])
+            if known is not None and known[0] == signature:
+                return known[1]
+        digest = file_sha256(path)
+        with self._lock:
+            self._digests[signature[0]] = (signature, digest)
+        return digest
+
+    # --- hojas parseadas --------------------------------------------------
+
+    def _pickle_path(self, digest, sheet_names):
+        key = hashlib.sha1('\0'.join(sheet_names).encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.cache_dir, f"{digest}-{key}.pkl")
+
+    def sheets(self, path, sheet_names, digest=None):
+        """
+        Devuelve {hoja: DataFrame} del libro. Los DataFrames son copias, así
+        que el conversor puede modificarlos sin tocar el cache.
+        """
+        sheet_names = tuple(sheet_names)
+        if digest is None:
+            digest = self.digest(path)
+        key = (digest, sheet_names)
+
+        with self._lock:
+            sheets = self._sheets.get(key)
+            if sheets is not None:
+                self._sheets.move_to_end(key)
+        if sheets is None:
+            sheets = self._load_pickle(digest, sheet_names)
+        if sheets is None:
+            sheets = read_sheets(path, sheet_names)
+            self._store_pickle(digest, sheet_names, sheets)
+
+        with self._lock:
+            self._sheets[key] = sheets
+            self._sheets.move_to_end(key)
+            while len(self._sheets) > self.max_entries:
+                self._sheets.popitem(last=False)
+        return {name: df.copy() for name, df in sheets.items()}
+
+    def _load_pickle(self, digest, sheet_names):
+        try:
+            with open(self._pickle_path(digest, sheet_names), 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Sin cache en disco o generado con otra versión de pandas
+            return None
+
+    def _store_pickle(self, digest, sheet_names, sheets):
+        path = self._pickle_path(digest, sheet_names)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(sheets, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            pass
+
+    # --- conversiones ya hechas -------------------------------------------
+
+    def _manifest_path(self):
+        return os.path.join(self.cache_dir, MANIFEST_NAME)
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path(), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_converted(self, digest, outputs, converter):
+        """
+        True si todos los JSON de salida se generaron con este conversor a
+        partir de esta versión del libro y nadie los modificó después.
+        """
+        with self._lock:
+            for output in outputs:
+                entry = self._manifest.get(os.path.abspath(output))
+                if entry is None or entry['sha256'] != digest or entry['converter'] != converter:
+                    return False
+                try:
+                    if list(file_signature(output)[1:]) != entry['signature']:
+                        return False
+                except FileNotFoundError:
+                    return False
+        return True
+
+    def record_conversion(self, digest, source, outputs, converter):
+        """Registra que los JSON de salida corresponden a esta versión del libro"""
+        with self._lock:
+            for output in outputs:
+                self._manifest[os.path.abspath(output)] = {
+                    "source": os.path.abspath(source),
+                    "sha256": digest,
+                    "converter": converter,
+                    "signature": list(file_signature(output)[1:]),
+                }
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._manifest_path() + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._manifest, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self._manifest_path())
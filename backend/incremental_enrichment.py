@@ -0,0 +1,335 @@
+"""
+Enriquecimiento incremental para eventos que se agregan durante un partido.
+
+calcular_origen_tries, calculate_attack_defence y las columnas de tiempo de
+juego recalculan todo el partido. Para el etiquetado en vivo, IncrementalEnricher
+calcula el estado inicial con esas mismas funciones y después, por cada
+evento agregado, actualiza solo lo que ese evento puede cambiar:
+
+- un origen de try (o de posesión) en el segundo s pasa a ser el origen de
+  los tries (posesiones) con SECOND > s, porque es el de mayor posición;
+- un evento de cierre en s cierra las posesiones todavía abiertas con
+  SECOND < s;
+- un ruck en r suma una fase a las posesiones cuya ventana contiene r;
+- un KICK OFF o END de periodo que mueve los límites de un tiempo recalcula
+  Game_Time/Time_Group de todo el partido (pasa unas pocas veces por partido).
+
+Los orígenes y cierres se guardan ordenados por SECOND con el máximo
+(mínimo) acumulado de sus posiciones, así que cada consulta es una búsqueda
+binaria. Si los eventos llegan en orden, el costo de un agregado no depende
+del largo del partido; uno atrasado solo toca los eventos posteriores.
+"""
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate
+
+import numpy as np
+import pandas as pd
+
+from enrichment import (
+    POSSESSION_CATEGORIES,
+    POSSESSION_END_CATEGORIES,
+    POSSESSION_ORIGIN_CATEGORIES,
+    RUCK_CATEGORY,
+    TRY_ORIGIN_CATEGORIES,
+    add_game_time_columns,
+    assign_time_groups,
+    calcular_origen_tries,
+    calculate_attack_defence,
+    format_clock,
+    game_seconds_by_halves,
+    half_time_groups,
+)
+from serialization import frame_to_records
+
+# Columnas que calcula el enriquecimiento
+DERIVED_COLUMNS = ["TRY_ORIGIN", "ORIGIN", "END", "PHASES", "TIME(VIDEO)", "Game_Time", "Time_Group"]
+
+# (CATEGORY, PERIODS) de los eventos que marcan el inicio y fin de cada tiempo
+HALF_BOUNDARIES = {
+    ("KICK OFF", 1): ("kick_off_1", min),
+    ("END", 1): ("end_1", max),
+    ("KICK OFF", 2): ("kick_off_2", min),
+    ("END", 2): ("end_2", max),
+}
+
+
+def _second(value):
+    """SECOND como float (NaN si falta o no es numérico), como pd.to_numeric(errors='coerce')"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _same(a, b):
+    return a == b or (a != a and b != b)
+
+
+class _LastBefore:
+    """Posiciones ordenadas por SECOND; last_before(t) = mayor posición con SECOND < t"""
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self.seconds = [second for second, _ in pairs]
+        self.latest = list(accumulate((position for _, position in pairs), max))
+
+    def insert(self, second, position):
+        """Agrega una posición mayor que todas las anteriores"""
+        idx = bisect_right(self.seconds, second)
+        self.seconds.insert(idx, second)
+        self.latest.insert(idx, position)
+        # El nuevo es el máximo de todo prefijo que lo incluya
+        for j in range(idx + 1, len(self.latest)):
+            self.latest[j] = position
+
+    def last_before(self, t):
+        idx = bisect_left(self.seconds, t) - 1
+        return self.latest[idx] if idx >= 0 else -1
+
+
+class _FirstAfter:
+    """Posiciones ordenadas por SECOND; first_after(t) = menor posición con SECOND > t"""
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self.seconds = [second for second, _ in pairs]
+        self.earliest = list(accumulate((position for _, position in reversed(pairs)), min))[::-1]
+
+    def insert(self, second, position):
+        """Agrega una posición mayor que todas las anteriores"""
+        idx = bisect_right(self.seconds, second)
+        earliest = self.earliest[idx] if idx < len(self.earliest) else position
+        self.seconds.insert(idx, second)
+        self.earliest.insert(idx, earliest)
+
+    def first_after(self, t):
+        idx = bisect_right(self.seconds, t)
+        return self.earliest[idx] if idx < len(self.earliest) else -1
+
+
+class IncrementalEnricher:
+    """
+    Eventos de un partido con TRY_ORIGIN, ORIGIN/END/PHASES y Game_Time/
+    Time_Group mantenidos a medida que se agregan eventos con append().
+
+    try_origin_options son los de calcular_origen_tries (origin_categories,
+    by_team). Mientras falta el END de un tiempo se lo considera en juego,
+    para que los eventos en vivo tengan Game_Time; con los cuatro límites
+    presentes el resultado es el mismo que el del cálculo completo.
+    """
+
+    def __init__(self, events=(), origin_categories=None, by_team=False):
+        self.origin_categories = set(TRY_ORIGIN_CATEGORIES if origin_categories is None else origin_categories)
+        self.by_team = by_team
+        self.events = [dict(event) for event in events]
+        self._rebuild()
+
+    # --- estado inicial, con las funciones del cálculo completo ---
+
+    def _rebuild(self):
+        n = len(self.events)
+        self._seconds = [_second(event.get('SECOND')) for event in self.events]
+        self._categories = [event.get('CATEGORY') for event in self.events]
+        self._source_groups = [event.get('Time_Group') for event in self.events]
+        self._bounds = {}
+        for position in range(n):
+            self._track_bounds(position)
+
+        if n:
+            df = pd.DataFrame(self.events)
+            df['SECOND'] = self._seconds
+            if 'POINTS' not in df.columns:
+                df['POINTS'] = None
+            df = calcular_origen_tries(df, origin_categories=sorted(self.origin_categories), by_team=self.by_team)
+            df = calculate_attack_defence(df)
+            self._add_time_columns(df, np.asarray(self._seconds, dtype=float))
+            derived = frame_to_records(df[DERIVED_COLUMNS])
+            for event, values in zip(self.events, derived):
+                if values['PHASES'] is not None:
+                    values['PHASES'] = int(values['PHASES'])
+                event.update(values)
+
+        positions = range(n)
+        timed = [p for p in positions if self._seconds[p] == self._seconds[p]]
+
+        self._tries = {}
+        origins = {}
+        for p in timed:
+            key = self._team_key(p)
+            if key is None and self.by_team:
+                continue
+            if self._is_try(p):
+                self._tries.setdefault(key, []).append((self._seconds[p], p))
+            if self._categories[p] in self.origin_categories:
+                origins.setdefault(key, []).append((self._seconds[p], p))
+        for pairs in self._tries.values():
+            pairs.sort()
+        self._try_origins = {key: _LastBefore(pairs) for key, pairs in origins.items()}
+
+        self._possession_origins = _LastBefore(
+            (self._seconds[p], p) for p in timed if self._categories[p] in POSSESSION_ORIGIN_CATEGORIES)
+        self._ends = _FirstAfter((self._seconds[p], p) for p in timed if self._categories[p] in POSSESSION_END_CATEGORIES)
+        self._rucks = sorted(self._seconds[p] for p in timed if self._categories[p] == RUCK_CATEGORY)
+
+        self._possessions = sorted((self._seconds[p], p) for p in timed if self._categories[p] in POSSESSION_CATEGORIES)
+        self._open = []
+        self._window_ends = []
+        self._windows = {}
+        for second, p in self._possessions:
+            self._segment(p, {})
+
+    # --- utilidades ---
+
+    def _team_key(self, position):
+        if not self.by_team:
+            return None
+        team = self.events[position].get('TEAM')
+        return None if team is None or team != team else team
+
+    def _is_try(self, position):
+        return self.events[position].get('POINTS') == "TRY"
+
+    def _set(self, position, values, changes):
+        event = self.events[position]
+        for column, value in values.items():
+            if column not in event or not _same(event[column], value):
+                event[column] = value
+                changes.setdefault(position, {})[column] = value
+
+    def _track_bounds(self, position):
+        """Actualiza los límites de los tiempos; True si alguno cambió"""
+        event = self.events[position]
+        second = self._seconds[position]
+        bound = HALF_BOUNDARIES.get((self._categories[position], event.get('PERIODS')))
+        if bound is None or second != second:
+            return False
+        name, pick = bound
+        current = self._bounds.get(name)
+        value = second if current is None else pick(current, second)
+        self._bounds[name] = value
+        return value != current
+
+    def _time_groups(self):
+        """Límites actuales (un tiempo sin END sigue en juego) y sus grupos de 20'"""
+        kick_off_1 = self._bounds.get('kick_off_1', np.nan)
+        end_1 = self._bounds.get('end_1', np.inf)
+        kick_off_2 = self._bounds.get('kick_off_2', np.nan)
+        end_2 = self._bounds.get('end_2', np.inf)
+        return (kick_off_1, end_1, kick_off_2), half_time_groups(kick_off_1, end_1, kick_off_2, end_2)
+
+    def _add_time_columns(self, df, seconds):
+        halves, groups = self._time_groups()
+        add_game_time_columns(df, game_seconds_by_halves(seconds, *halves), groups, video_time=True)
+
+    def _time_values(self, positions):
+        """TIME(VIDEO), Game_Time y Time_Group de las posiciones dadas"""
+        seconds = np.asarray([self._seconds[p] for p in positions], dtype=float)
+        halves, groups = self._time_groups()
+        game_seconds = game_seconds_by_halves(seconds, *halves)
+        previous = np.empty(len(positions), dtype=object)
+        previous[:] = [self._source_groups[p] for p in positions]
+        time_group = assign_time_groups(game_seconds, groups, default=previous)
+        time_group[np.isnan(game_seconds)] = None
+        video = format_clock(np.trunc(seconds))
+        game_time = format_clock(game_seconds)
+        return [{"TIME(VIDEO)": video[i], "Game_Time": game_time[i], "Time_Group": time_group[i]}
+                for i in range(len(positions))]
+
+    def _segment(self, position, changes):
+        """ORIGIN, END y PHASES de una posesión con SECOND, y sus índices"""
+        t = self._seconds[position]
+        origin = self._possession_origins.last_before(t)
+        end = self._ends.first_after(t)
+        start = self._seconds[origin] if origin >= 0 else 0.0
+        stop = self._seconds[end] if end >= 0 else t
+        phases = bisect_right(self._rucks, stop) - bisect_left(self._rucks, start) + 1
+
+        previous = self._windows.get(position)
+        if previous is not None and previous[1] != stop:
+            self._window_ends.pop(bisect_left(self._window_ends, (previous[1], position)))
+        if previous is None or previous[1] != stop:
+            insort(self._window_ends, (stop, position))
+        self._windows[position] = (start, stop)
+
+        idx = bisect_left(self._open, (t, position))
+        is_open = idx < len(self._open) and self._open[idx] == (t, position)
+        if end < 0 and not is_open:
+            self._open.insert(idx, (t, position))
+        elif end >= 0 and is_open:
+            self._open.pop(idx)
+
+        self._set(position, {
+            "ORIGIN": self._categories[origin] if origin >= 0 else None,
+            "END": self._categories[end] if end >= 0 else None,
+            "PHASES": phases,
+        }, changes)
+
+    # --- agregado de eventos ---
+
+    def append(self, events):
+        """
+        Agrega eventos al final del partido y actualiza lo que dependen de
+        ellos. Devuelve {posición: {columna: valor}} con las columnas
+        derivadas que cambiaron (todas, para los eventos nuevos).
+        """
+        changes = {}
+        new_positions = []
+        bounds_changed = False
+        for event in events:
+            position = len(self.events)
+            self.events.append(dict(event))
+            self._seconds.append(_second(event.get('SECOND')))
+            self._categories.append(event.get('CATEGORY'))
+            self._source_groups.append(event.get('Time_Group'))
+            new_positions.append(position)
+            bounds_changed |= self._track_bounds(position)
+            self._add_event(position, changes)
+
+        if bounds_changed:
+            positions = list(range(len(self.events)))
+        else:
+            positions = new_positions
+        for position, values in zip(positions, self._time_values(positions)):
+            self._set(position, values, changes)
+        return changes
+
+    def _add_event(self, position, changes):
+        second = self._seconds[position]
+        category = self._categories[position]
+        self._set(position, {"TRY_ORIGIN": None, "ORIGIN": None, "END": None, "PHASES": None}, changes)
+        if second != second:
+            if category in POSSESSION_CATEGORIES:
+                self._set(position, {"PHASES": 1}, changes)
+            return
+
+        # TRY_ORIGIN: el nuevo origen pasa a ser el de los tries posteriores de su equipo
+        key = self._team_key(position)
+        if key is not None or not self.by_team:
+            if category in self.origin_categories:
+                self._try_origins.setdefault(key, _LastBefore()).insert(second, position)
+                tries = self._tries.get(key, [])
+                for _, later in tries[bisect_right(tries, (second, np.inf)):]:
+                    self._set(later, {"TRY_ORIGIN": category}, changes)
+            if self._is_try(position):
+                origins = self._try_origins.get(key)
+                origin = origins.last_before(second) if origins is not None else -1
+                self._set(position, {"TRY_ORIGIN": self._categories[origin] if origin >= 0 else None}, changes)
+                insort(self._tries.setdefault(key, []), (second, position))
+
+        # Posesiones afectadas por un nuevo origen, cierre o ruck
+        affected = set()
+        if category in POSSESSION_ORIGIN_CATEGORIES:
+            self._possession_origins.insert(second, position)
+            affected.update(p for _, p in self._possessions[bisect_right(self._possessions, (second, np.inf)):])
+        if category in POSSESSION_END_CATEGORIES:
+            self._ends.insert(second, position)
+            affected.update(p for _, p in self._open[:bisect_left(self._open, (second, -1))])
+        if category == RUCK_CATEGORY:
+            insort(self._rucks, second)
+            affected.update(p for _, p in self._window_ends[bisect_left(self._window_ends, (second, -1)):]
+                            if self._windows[p][0] <= second)
+        if category in POSSESSION_CATEGORIES:
+            insort(self._possessions, (second, position))
+            affected.add(position)
+        for p in sorted(affected):
+            self._segment(p, changes)
@@ -25,6 +25,10 @@ def init_database():
         Base.metadata.create_all(bind=engine)
         print("✅ Tablas creadas exitosamente!")
         
+        # Índices para los filtros de /events servidos desde la base (db_events)
+        from db_events import ensure_indexes
+        print(f"📇 Índices de eventos: {', '.join(ensure_indexes(engine))}")
+        
         # Listar tablas creadas
         from sqlalchemy import inspect
         inspector = inspect(engine)
@@ -0,0 +1,88 @@
+"""
+Índice de intervalos sobre los tramos de video de los eventos.
+
+Cada evento ocupa [SECOND, SECOND + DURATION] (DURATION faltante o negativa
+cuenta como 0). El índice guarda los inicios ordenados junto con sus fines:
+un evento activo en t empezó como mucho `window` segundos antes (la
+duración más larga de los eventos "cortos"), así que una consulta es una
+búsqueda binaria sobre los inicios y un filtro NumPy sobre esa ventana. Los
+pocos eventos mucho más largos que el resto (LONG_QUANTILE) se guardan
+aparte y se recorren enteros para que no agranden la ventana de todos.
+
+Un partido real tiene cientos o pocos miles de eventos. Con esos tamaños
+una máscara NumPy sobre todos los eventos cuesta unos pocos µs, menos que
+las búsquedas binarias. Por eso, hasta SCAN_LIMIT eventos, el índice solo
+recorre los arrays. Las ventanas ordenadas se usan en temporadas enteras o
+en partidos concatenados. (Un árbol de intervalos era más lento que el
+recorrido en todos los tamaños de un partido.)
+"""
+import numpy as np
+import pandas as pd
+
+# Los eventos con DURATION por encima de este cuantil se recorren aparte
+LONG_QUANTILE = 0.99
+# Hasta esta cantidad de eventos una máscara sobre todos es más rápida que buscar la ventana
+SCAN_LIMIT = 10_000
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def event_spans(df):
+    """(inicio, fin) de cada fila; NaN donde falta SECOND"""
+    starts = pd.to_numeric(df['SECOND'], errors='coerce').to_numpy(dtype=float) \
+        if 'SECOND' in df.columns else np.full(len(df), np.nan)
+    durations = pd.to_numeric(df['DURATION'], errors='coerce').to_numpy(dtype=float) \
+        if 'DURATION' in df.columns else np.zeros(len(df))
+    durations = np.where(np.isnan(durations) | (durations < 0), 0.0, durations)
+    return starts, starts + durations
+
+
+class IntervalIndex:
+    def __init__(self, starts, ends, scan_limit=SCAN_LIMIT):
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        self.size = len(starts)
+        self._scan = self.size <= scan_limit
+        if self._scan:
+            # NaN nunca cumple las comparaciones, así que no hace falta filtrarlos
+            self._starts, self._ends = starts, ends
+            return
+        valid = ~(np.isnan(starts) | np.isnan(ends))
+        positions = np.flatnonzero(valid).astype(np.int64)
+        starts, ends = starts[valid], ends[valid]
+
+        durations = ends - starts
+        limit = float(np.quantile(durations, LONG_QUANTILE)) if len(durations) else 0.0
+        long = durations > limit
+        self.window = float(durations[~long].max()) if (~long).any() else 0.0
+
+        order = np.argsort(starts[~long], kind='stable')
+        self._positions = positions[~long][order]
+        self._starts = starts[~long][order]
+        self._ends = ends[~long][order]
+        self._long_positions = positions[long]
+        self._long_starts = starts[long]
+        self._long_ends = ends[long]
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(*event_spans(df))
+
+    def overlapping(self, t0, t1):
+        """Posiciones ordenadas de los eventos que se superponen con [t0, t1]"""
+        t0, t1 = float(t0), float(t1)
+        if t1 < t0:
+            return _EMPTY
+        if self._scan:
+            return np.flatnonzero((self._starts <= t1) & (self._ends >= t0))
+        lo = np.searchsorted(self._starts, t0 - self.window, side='left')
+        hi = np.searchsorted(self._starts, t1, side='right')
+        found = self._positions[lo:hi][self._ends[lo:hi] >= t0]
+        if len(self._long_positions):
+            long = (self._long_starts <= t1) & (self._long_ends >= t0)
+            found = np.concatenate([found, self._long_positions[long]])
+        return np.sort(found)
+
+    def at(self, t):
+        """Posiciones ordenadas de los eventos activos en t (SECOND <= t <= SECOND + DURATION)"""
+        return self.overlapping(t, t)
@@ -0,0 +1,95 @@
+"""
+Cola de trabajos de conversión en segundo plano.
+
+Las conversiones (Excel o XML subidos por los analistas) se ejecutan en un
+pool local de hilos en lugar de dentro de la petición, así que varios
+partidos se pueden importar a la vez sin bloquear al resto de la API. Cada
+trabajo tiene un id y un estado consultable (queued, running, done, failed)
+con la etapa y el progreso que reporta la función de conversión.
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from app_logging import get_logger
+
+CONVERSION_WORKERS = int(os.getenv('CONVERSION_WORKERS', '2'))
+
+log = get_logger("loading")
+
+
+class JobQueue:
+    def __init__(self, max_workers=CONVERSION_WORKERS, max_jobs=200):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="conversion")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, filename, fn, *args, **kwargs):
+        """
+        Encola fn(*args, progress=..., **kwargs) y devuelve el estado inicial
+        del trabajo. El valor que devuelve fn queda en "result".
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "filename": filename,
+            "status": "queued",
+            "stage": None,
+            "progress": 0.0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            # Se descartan los terminados más antiguos; los que siguen en cola o
+            # corriendo se conservan aunque sean anteriores
+            excess = len(self._jobs) - self.max_jobs
+            if excess > 0:
+                finished = [old_id for old_id, old in self._jobs.items()
+                            if old["status"] not in ("queued", "running")][:excess]
+                for old_id in finished:
+                    del self._jobs[old_id]
+            snapshot = dict(job)
+
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        log.info("Trabajo %s encolado: %s %s", job_id, kind, filename)
+        return snapshot
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            self._jobs[job_id].update(changes)
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status="running", started_at=time.time())
+
+        def progress(stage, fraction):
+            self._update(job_id, stage=stage, progress=round(float(fraction), 3))
+
+        try:
+            result = fn(*args, progress=progress, **kwargs)
+        except Exception as e:
+            log.error("Trabajo %s falló: %s\n%s", job_id, e, traceback.format_exc())
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+            return
+        self._update(job_id, status="done", stage=None, progress=1.0, result=result, finished_at=time.time())
+        log.info("Trabajo %s terminado", job_id)
+
+    def get(self, job_id):
+        """Estado del trabajo (copia) o None si no existe"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list(self):
+        """Todos los trabajos conocidos, del más reciente al más antiguo"""
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]
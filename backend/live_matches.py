@@ -0,0 +1,303 @@
+"""
+Partidos en curso: ingesta de eventos etiquetados en vivo y envío a los
+clientes conectados con Server-Sent Events.
+
+Cada LiveMatch enriquece los eventos con IncrementalEnricher a medida que
+llegan y mantiene algunos agregados (eventos, puntos y categorías por
+equipo) sumando solo el delta. Cada POST genera un mensaje numerado con los
+eventos nuevos ya enriquecidos, las columnas derivadas que cambiaron en
+eventos anteriores y los agregados actualizados; los clientes suscritos a
+/live/matches/<id>/stream lo reciben sin volver a pedir el partido entero.
+Los últimos LIVE_HISTORY mensajes se guardan para que un cliente que se
+reconecta con Last-Event-ID reciba lo que se perdió.
+
+Los partidos en vivo viven en memoria: al terminar se finalizan, lo que
+escribe sus JSON matriz/matches en uploads/ (quedan como cualquier partido
+subido) y cierra los streams. El registro guarda a lo sumo LIVE_MAX_MATCHES
+partidos y, al llenarse, descarta primero los finalizados menos usados.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from app_logging import get_logger
+from conversions import write_match
+from incremental_enrichment import IncrementalEnricher
+
+LIVE_HISTORY = int(os.getenv('LIVE_HISTORY', '500'))
+LIVE_HEARTBEAT = float(os.getenv('LIVE_HEARTBEAT', '15'))
+LIVE_MAX_MATCHES = int(os.getenv('LIVE_MAX_MATCHES', '50'))
+LIVE_MAX_BATCH = 1000
+
+# match_id válido en una URL y como nombre de archivo
+MATCH_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+log = get_logger("live")
+
+
+class InvalidEvents(ValueError):
+    """Cuerpo de POST que no es un evento o una lista de eventos (se responde 400)"""
+
+
+class MatchFinalized(RuntimeError):
+    """El partido ya se finalizó y no acepta más eventos (se responde 409)"""
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _check_event(index, event):
+    """InvalidEvents si el evento no tiene la forma que espera el enriquecimiento"""
+    if not isinstance(event, dict) or not isinstance(event.get('CATEGORY'), str) or not event['CATEGORY']:
+        raise InvalidEvents(f"Evento {index}: debe ser un objeto con CATEGORY (texto)")
+    second = event.get('SECOND')
+    if second is not None and not _is_number(second):
+        raise InvalidEvents(f"Evento {index}: SECOND debe ser un número finito")
+    periods = event.get('PERIODS')
+    if periods is not None and (not isinstance(periods, int) or isinstance(periods, bool)):
+        raise InvalidEvents(f"Evento {index}: PERIODS debe ser un entero")
+    team = event.get('TEAM')
+    if team is not None and not isinstance(team, str):
+        raise InvalidEvents(f"Evento {index}: TEAM debe ser texto")
+
+
+def parse_events(payload):
+    """
+    Eventos de un POST: un objeto, una lista de objetos o {"events": [...]}.
+    Se valida el lote entero antes de agregar nada.
+    """
+    if isinstance(payload, dict) and isinstance(payload.get('events'), list):
+        payload = payload['events']
+    events = [payload] if isinstance(payload, dict) else payload
+    if not isinstance(events, list) or not events:
+        raise InvalidEvents("Se espera un evento o una lista de eventos")
+    if len(events) > LIVE_MAX_BATCH:
+        raise InvalidEvents(f"A lo sumo {LIVE_MAX_BATCH} eventos por envío")
+    for index, event in enumerate(events):
+        _check_event(index, event)
+    return events
+
+
+def parse_match_id(value):
+    """match_id de un POST /live/matches (None genera uno); InvalidEvents si no es válido"""
+    if value is None:
+        return None
+    if not isinstance(value, str) or not MATCH_ID_PATTERN.match(value):
+        raise InvalidEvents("match_id debe ser texto con letras, números, '.', '_' o '-'")
+    return value
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class LiveMatch:
+    def __init__(self, match_id, header=None, try_origin_options=None):
+        self.match_id = match_id
+        self.header = header or {}
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finalized = None
+        self.closed = False
+        self._options = try_origin_options or {}
+        self._enricher = IncrementalEnricher(**self._options)
+        self._source = []
+        self._condition = threading.Condition()
+        self._history = deque(maxlen=LIVE_HISTORY)
+        self._seq = 0
+        self._teams = {}
+
+    def _aggregate(self, events):
+        """Suma los eventos nuevos a los agregados por equipo ("" si no tienen TEAM)"""
+        for event in events:
+            team = event.get('TEAM')
+            totals = self._teams.setdefault("" if team is None else str(team),
+                                            {"events": 0, "points": 0, "categories": {}})
+            totals["events"] += 1
+            category = event.get('CATEGORY')
+            totals["categories"][category] = totals["categories"].get(category, 0) + 1
+            if category == 'POINTS':
+                value = event.get('POINTS(VALUE)')
+                if isinstance(value, (int, float)) and value == value:
+                    totals["points"] += value
+
+    def _aggregates(self):
+        return {team: dict(totals, categories=dict(totals["categories"])) for team, totals in self._teams.items()}
+
+    def append(self, events):
+        """
+        Agrega los eventos, publica el mensaje a los suscriptores y lo
+        devuelve. Es todo o nada: si el enriquecimiento falla a mitad del
+        lote, el partido se rearma con los eventos anteriores.
+        """
+        with self._condition:
+            if self.finalized is not None or self.closed:
+                raise MatchFinalized(f"El partido en vivo ya se finalizó: {self.match_id}")
+            first = len(self._enricher.events)
+            try:
+                changes = self._enricher.append(events)
+            except Exception:
+                self._enricher = IncrementalEnricher(self._source, **self._options)
+                raise
+            self._source.extend(dict(event) for event in events)
+            self.updated_at = time.time()
+            added = self._enricher.events[first:]
+            self._aggregate(added)
+            self._seq += 1
+            message = {
+                "seq": self._seq,
+                "match_id": self.match_id,
+                "first_position": first,
+                "events": [dict(event) for event in added],
+                "updated": [{"position": position, "changes": values}
+                            for position, values in sorted(changes.items()) if position < first],
+                "aggregates": self._aggregates(),
+            }
+            self._history.append((self._seq, _dumps(message)))
+            self._condition.notify_all()
+        return message
+
+    def snapshot(self):
+        """Estado completo: lo que carga un cliente antes de suscribirse desde `seq`"""
+        with self._condition:
+            return {
+                "seq": self._seq,
+                "match_id": self.match_id,
+                "header": self.header,
+                "events": [dict(event) for event in self._enricher.events],
+                "aggregates": self._aggregates(),
+            }
+
+    def summary(self):
+        with self._condition:
+            return {"match_id": self.match_id, "header": self.header, "seq": self._seq,
+                    "events": len(self._enricher.events), "created_at": self.created_at,
+                    "finalized": self.finalized}
+
+    def finalize(self, outputs):
+        """
+        Escribe los eventos recibidos (tal como llegaron, el enriquecimiento
+        completo se hace al cargarlos) y la cabecera en los JSON `outputs`
+        (matriz, matches), y cierra el partido a nuevos eventos.
+        """
+        with self._condition:
+            if self.finalized is not None:
+                raise MatchFinalized(f"El partido en vivo ya se finalizó: {self.match_id}")
+            match_data = [dict(self.header, JSON=os.path.splitext(os.path.basename(outputs[0]))[0])]
+            write_match(outputs, self._source, match_data)
+            self.finalized = {"outputs": list(outputs), "events": len(self._source), "at": time.time()}
+            self.updated_at = time.time()
+            self._condition.notify_all()
+            return self.finalized
+
+    def close(self):
+        """Cierra los streams abiertos (el partido se quitó del registro)"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def wait(self, after, timeout):
+        """
+        (mensajes con seq > after, reset). Espera hasta timeout si no hay
+        ninguno; reset es True si alguno ya no está en el historial y el
+        cliente tiene que volver a cargar el snapshot.
+        """
+        with self._condition:
+            if self._seq <= after and self.finalized is None and not self.closed:
+                self._condition.wait(timeout)
+            if self._history and after < self._history[0][0] - 1:
+                return [], True
+            return [(seq, data) for seq, data in self._history if seq > after], False
+
+    @property
+    def seq(self):
+        with self._condition:
+            return self._seq
+
+
+def sse_stream(live, last_seq=None, heartbeat=LIVE_HEARTBEAT):
+    """
+    Genera el stream text/event-stream de un partido desde last_seq (por
+    defecto, desde el mensaje actual). Un comentario cada `heartbeat`
+    segundos mantiene viva la conexión y detecta clientes desconectados.
+    Al finalizar o quitar el partido se envía un evento "closed" y el stream
+    termina.
+    """
+    if last_seq is None:
+        last_seq = live.seq
+    yield "retry: 3000\n\n"
+    while True:
+        messages, reset = live.wait(last_seq, heartbeat)
+        if not messages and (live.finalized is not None or live.closed):
+            yield f"event: closed\ndata: {_dumps({'seq': last_seq, 'finalized': live.finalized})}\n\n"
+            return
+        if reset:
+            last_seq = live.seq
+            yield f"id: {last_seq}\nevent: reset\ndata: {_dumps({'seq': last_seq})}\n\n"
+            continue
+        if not messages:
+            yield ": keep-alive\n\n"
+            continue
+        for seq, data in messages:
+            yield f"id: {seq}\nevent: events\ndata: {data}\n\n"
+            last_seq = seq
+
+
+class LiveMatchRegistry:
+    def __init__(self, try_origin_options=None, max_matches=LIVE_MAX_MATCHES):
+        self.try_origin_options = try_origin_options or {}
+        self.max_matches = max_matches
+        self._lock = threading.Lock()
+        self._matches = OrderedDict()
+
+    def _evict(self):
+        """
+        Deja lugar para un partido más: quita primero los finalizados y luego
+        los que hace más tiempo no reciben eventos. Llamar con el lock tomado.
+        """
+        while len(self._matches) >= self.max_matches:
+            candidates = sorted(self._matches.values(), key=lambda live: (live.finalized is None, live.updated_at))
+            live = self._matches.pop(candidates[0].match_id)
+            live.close()
+            if live.finalized is None:
+                log.warning("Partido en vivo descartado sin finalizar (límite de %d): %s",
+                            self.max_matches, live.match_id)
+            else:
+                log.info("Partido en vivo finalizado descartado de memoria: %s", live.match_id)
+
+    def create(self, header=None, match_id=None):
+        """Crea un partido en curso; ValueError si match_id ya existe"""
+        match_id = match_id or f"live-{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            if match_id in self._matches:
+                raise ValueError(f"El partido en vivo ya existe: {match_id}")
+            self._evict()
+            live = LiveMatch(match_id, header, self.try_origin_options)
+            self._matches[match_id] = live
+        log.info("Partido en vivo creado: %s", match_id)
+        return live
+
+    def get(self, match_id):
+        with self._lock:
+            return self._matches.get(match_id)
+
+    def delete(self, match_id):
+        """Quita un partido de memoria y cierra sus streams; False si no existía"""
+        with self._lock:
+            live = self._matches.pop(match_id, None)
+        if live is None:
+            return False
+        live.close()
+        log.info("Partido en vivo eliminado: %s", match_id)
+        return True
+
+    def list(self):
+        with self._lock:
+            matches = list(self._matches.values())
+        return [live.summary() for live in matches]
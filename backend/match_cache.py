@@ -0,0 +1,106 @@
+"""
+Cache en memoria de los datos de partido ya enriquecidos.
+
+Cada entrada se identifica por las rutas de los archivos de origen (y la
+función que construye el payload) junto con su mtime y tamaño: mientras los
+archivos no cambien, las peticiones repetidas devuelven el payload calculado
+sin volver a leer ni procesar el JSON. Cuando se superan max_entries partidos
+se descarta el usado hace más tiempo (LRU). Si varias peticiones piden a la
+vez un partido que no está en cache, solo una lo calcula y el resto espera
+ese resultado.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def file_signature(path):
+    """Devuelve (ruta, mtime_ns, tamaño) del archivo; lanza FileNotFoundError si no existe"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def lru_get(entries, key):
+    """Entrada de un OrderedDict usado como LRU (None si no está); la marca como recién usada"""
+    entry = entries.get(key)
+    if entry is not None:
+        entries.move_to_end(key)
+    return entry
+
+
+def lru_put(entries, key, entry, max_entries):
+    """Guarda entry en el OrderedDict y descarta las usadas hace más tiempo por encima de max_entries"""
+    entries[key] = entry
+    entries.move_to_end(key)
+    while len(entries) > max_entries:
+        entries.popitem(last=False)
+
+
+class MatchCache:
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, paths, builder):
+        """
+        Devuelve el valor cacheado para los archivos `paths`, o llama a
+        builder(*paths) si alguno cambió (o nunca se calculó).
+        """
+        paths = tuple(paths)
+        key = (paths, builder)
+        version = tuple(file_signature(p) for p in paths)
+
+        with self._lock:
+            value = self._lookup(key, version)
+            if value is not _MISSING:
+                return value
+            building = self._building.setdefault(key, threading.Lock())
+
+        # El cálculo se hace fuera del lock general para no bloquear otros
+        # partidos; el lock del partido hace que las peticiones simultáneas
+        # esperen al primer cálculo en lugar de repetirlo
+        with building:
+            try:
+                with self._lock:
+                    value = self._lookup(key, version)
+                if value is not _MISSING:
+                    return value
+
+                value = builder(*paths)
+
+                with self._lock:
+                    self.misses += 1
+                    lru_put(self._entries, key, (version, value), self.max_entries)
+                return value
+            finally:
+                with self._lock:
+                    if self._building.get(key) is building:
+                        del self._building[key]
+
+    def _lookup(self, key, version):
+        """Valor cacheado para esa versión de los archivos o _MISSING (con el lock tomado)"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            return _MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def invalidate(self, paths=None):
+        """Elimina las entradas de unos archivos concretos o todo el cache"""
+        with self._lock:
+            if paths is None:
+                self._entries.clear()
+                return
+            paths = tuple(paths)
+            for key in [k for k in self._entries if k[0] == paths]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,68 @@
+"""
+Registro de los partidos disponibles en la carpeta de uploads.
+
+Reemplaza las constantes matriz_json_path/matches_json_path: cada par
+matriz/matches encontrado recibe un match_id estable (el mismo que usa el
+almacén columnar) y sus eventos solo se cargan cuando alguien los pide.
+"""
+import json
+import os
+import threading
+
+from event_store import discover_match_files, season_of, slugify
+
+
+class MatchRegistry:
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._matches = {}
+        self._folder_mtime = None
+
+    def refresh(self, force=False):
+        """Vuelve a escanear la carpeta solo si cambió su contenido"""
+        try:
+            mtime = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._folder_mtime and not force:
+            return
+
+        matches = {}
+        for matriz_path, matches_path in discover_match_files(self.folder):
+            match_id = slugify(os.path.splitext(os.path.basename(matriz_path))[0])
+            matches[match_id] = (matriz_path, matches_path)
+
+        with self._lock:
+            self._matches = matches
+            self._folder_mtime = mtime
+
+    def paths(self, match_id):
+        """Devuelve (matriz_path, matches_path) del partido; KeyError si no existe"""
+        self.refresh()
+        with self._lock:
+            if match_id not in self._matches:
+                raise KeyError(match_id)
+            return self._matches[match_id]
+
+    def pairs(self):
+        """{match_id: (matriz_path, matches_path)} de todos los partidos"""
+        self.refresh()
+        with self._lock:
+            return dict(self._matches)
+
+    def list(self):
+        """Cabeceras de todos los partidos con su match_id y temporada"""
+        self.refresh()
+        with self._lock:
+            items = sorted(self._matches.items())
+
+        result = []
+        for match_id, (matriz_path, matches_path) in items:
+            try:
+                with open(matches_path, 'r') as f:
+                    header = json.load(f)[0]
+            except (OSError, ValueError, IndexError):
+                continue
+            result.append({"match_id": match_id, "season": season_of(header), **header})
+        return result
@@ -0,0 +1,205 @@
+"""
+Estadísticas por jugador calculadas en el backend.
+
+Los gráficos por jugador (tackles, penales, tries, turnovers, puntos)
+recorrían en el navegador todos los eventos de /events para contar por
+jugador. Aquí se calculan con conteos vectorizados (factorize + bincount)
+sobre los eventos de cada partido, con los mismos criterios que esos
+gráficos, y se acumulan por temporada. Solo usan columnas de origen
+(STAT_INPUT_COLUMNS), así que las temporadas se leen del almacén Parquet sin
+enriquecer cada partido. Los resultados se materializan como PreparedJSON y
+se guardan por versión de los datos: la de un partido es la de su
+LoadedMatch (o su entrada del almacén), la de una temporada el conjunto de
+versiones de sus partidos. Los dos caminos de un partido se guardan por
+separado (sus versiones no se comparan) y los dos caches son LRU acotados,
+así que valores de ?season= que no existen no hacen crecer la memoria.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from match_cache import lru_get, lru_put
+from prepared_response import PreparedJSON
+from serialization import frame_to_records
+
+# Columnas de conteo por jugador, en el orden en que se devuelven
+STAT_COLUMNS = [
+    "tackles", "tackles_positive", "tackles_neutral", "tackles_negative", "missed_tackles",
+    "penalties", "turnovers_won", "turnovers_lost", "tries", "points",
+    "lineout_throws", "lineout_receptions",
+]
+# Columnas de los eventos que usan las estadísticas (las que se leen del almacén)
+STAT_INPUT_COLUMNS = ["CATEGORY", "ADVANCE", "TEAM", "POINTS", "POINTS(VALUE)", "PLAYER",
+                      "LINE_THROWER", "LINE_RECEIVER"]
+# Valores de PLAYER que no son un jugador
+EMPTY_PLAYERS = {"", "None", "none"}
+# Tamaño de los caches: estadísticas por partido y respuestas preparadas
+MAX_MATCH_FRAMES = 256
+MAX_PREPARED = 64
+
+
+def _values(df, name):
+    """Columna como array de objetos (todo None si no existe)"""
+    if name in df.columns:
+        return df[name].to_numpy(dtype=object)
+    return np.full(len(df), None, dtype=object)
+
+
+def _valid_players(players):
+    """Máscara de los valores de PLAYER que son un jugador (no nulos ni "None")"""
+    return np.fromiter((p is not None and p == p and str(p).strip() not in EMPTY_PLAYERS for p in players),
+                       dtype=bool, count=len(players))
+
+
+def _expand_players(players):
+    """
+    (filas, jugadores): cada evento se repite una vez por jugador si PLAYER
+    es una lista (XML con varios jugadores), como hacen los gráficos.
+    """
+    lengths = np.fromiter((len(p) if isinstance(p, list) else 1 for p in players), dtype=np.int64,
+                          count=len(players))
+    rows = np.repeat(np.arange(len(players)), lengths)
+    if (lengths == 1).all():
+        return rows, players
+    expanded = np.empty(len(rows), dtype=object)
+    expanded[:] = [q for p in players for q in (p if isinstance(p, list) else [p])]
+    return rows, expanded
+
+
+def player_stat_frame(df):
+    """
+    Una fila por jugador (índice PLAYER) con las columnas de STAT_COLUMNS.
+    Los eventos con varios jugadores (PLAYER lista) cuentan para cada uno;
+    tries y puntos excluyen los del rival, como los gráficos.
+    """
+    category = _values(df, 'CATEGORY')
+    advance = _values(df, 'ADVANCE')
+    own = _values(df, 'TEAM') != 'OPPONENT'
+    tackles = category == 'TACKLE'
+    lineouts = category == 'LINEOUT'
+    points_value = pd.to_numeric(df['POINTS(VALUE)'], errors='coerce').fillna(0).to_numpy(dtype=float) \
+        if 'POINTS(VALUE)' in df.columns else np.zeros(len(df))
+
+    # Una columna por estadística (en el orden de STAT_COLUMNS) con el aporte de cada evento
+    per_event = {
+        "tackles": tackles,
+        "tackles_positive": tackles & (advance == 'POSITIVE'),
+        "tackles_neutral": tackles & (advance == 'NEUTRAL'),
+        "tackles_negative": tackles & (advance == 'NEGATIVE'),
+        "missed_tackles": category == 'MISSED-TACKLE',
+        "penalties": category == 'PENALTY',
+        "turnovers_won": category == 'TURNOVER+',
+        "turnovers_lost": category == 'TURNOVER-',
+        "tries": (_values(df, 'POINTS') == 'TRY') & own,
+        "points": np.where((category == 'POINTS') & own, points_value, 0.0),
+    }
+
+    rows, players = _expand_players(_values(df, 'PLAYER'))
+    valid = _valid_players(players)
+    rows, players = rows[valid], players[valid]
+
+    # Lanzadores y receptores de line se cuentan por su propia columna
+    columns = {"lineout_throws": 'LINE_THROWER', "lineout_receptions": 'LINE_RECEIVER'}
+    lineout_players = {}
+    for stat, column in columns.items():
+        values = _values(df, column)[lineouts]
+        lineout_players[stat] = values[_valid_players(values)]
+
+    codes, names = pd.factorize(np.concatenate([players] + list(lineout_players.values())))
+    n_players = len(names)
+    player_codes = codes[:len(players)]
+
+    stats = {}
+    for stat, contribution in per_event.items():
+        stats[stat] = np.bincount(player_codes, weights=contribution[rows].astype(float), minlength=n_players)
+    offset = len(players)
+    for stat, values in lineout_players.items():
+        stats[stat] = np.bincount(codes[offset:offset + len(values)], minlength=n_players).astype(float)
+        offset += len(values)
+
+    result = pd.DataFrame(stats, index=pd.Index(names, name='PLAYER', dtype=object))[STAT_COLUMNS]
+    counts = [c for c in STAT_COLUMNS if c != 'points']
+    result[counts] = result[counts].astype(np.int64)
+    if (result['points'] % 1 == 0).all():
+        result['points'] = result['points'].astype(np.int64)
+    return result.sort_index()
+
+
+def season_stat_frame(frames):
+    """Suma las estadísticas de varios partidos y agrega `matches` (partidos con datos del jugador)"""
+    if not frames:
+        return pd.DataFrame(columns=['matches'] + STAT_COLUMNS).rename_axis('PLAYER')
+    combined = pd.concat([frame.assign(matches=1) for frame in frames])
+    stats = combined.groupby(level=0, sort=True).sum()
+    return stats[['matches'] + STAT_COLUMNS].rename_axis('PLAYER')
+
+
+def _records(stats):
+    return frame_to_records(stats.reset_index())
+
+
+class PlayerStatsCache:
+    def __init__(self, max_matches=MAX_MATCH_FRAMES, max_prepared=MAX_PREPARED):
+        self.max_matches = max_matches
+        self.max_prepared = max_prepared
+        self._lock = threading.Lock()
+        self._matches = OrderedDict()
+        self._prepared = OrderedDict()
+
+    def match_frame(self, match_id, version, read, source='store'):
+        """
+        Estadísticas de un partido para `version` de sus datos; read(columnas)
+        devuelve sus eventos (al menos esas columnas) si hay que calcularlas.
+        `source` separa las versiones de LoadedMatch ('loaded') de las del
+        almacén ('store'), que no se pueden comparar entre sí.
+        """
+        key = (source, match_id)
+        with self._lock:
+            entry = lru_get(self._matches, key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        frame = player_stat_frame(read(STAT_INPUT_COLUMNS))
+        with self._lock:
+            lru_put(self._matches, key, (version, frame), self.max_matches)
+        return frame
+
+    def for_match(self, match_id, loaded):
+        """PreparedJSON con las estadísticas del partido"""
+        key = ('match', match_id)
+        with self._lock:
+            entry = lru_get(self._prepared, key)
+            if entry is not None and entry[0] == loaded.version:
+                return entry[1]
+        frame = self.match_frame(match_id, loaded.version, lambda columns: loaded.df, source='loaded')
+        prepared = PreparedJSON({"match_id": match_id, "header": loaded.header, "version": loaded.version,
+                                 "players": _records(frame)})
+        with self._lock:
+            lru_put(self._prepared, key, (loaded.version, prepared), self.max_prepared)
+        return prepared
+
+    def for_season(self, season, matches):
+        """
+        PreparedJSON con las estadísticas acumuladas de `matches`, una lista
+        de (match_id, versión, read) como la de match_frame. Solo se recalcula
+        si cambió algún partido; una temporada sin partidos no se guarda.
+        """
+        versions = tuple(sorted((match_id, version) for match_id, version, _ in matches))
+        key = ('season', season)
+        with self._lock:
+            entry = lru_get(self._prepared, key)
+            if entry is not None and entry[0] == versions:
+                return entry[1]
+
+        frames = [self.match_frame(match_id, version, read) for match_id, version, read in matches]
+        stats = season_stat_frame(frames)
+        prepared = PreparedJSON({
+            "season": season,
+            "matches": [match_id for match_id, _ in versions],
+            "players": _records(stats),
+        })
+        if versions:
+            with self._lock:
+                lru_put(self._prepared, key, (versions, prepared), self.max_prepared)
+        return prepared
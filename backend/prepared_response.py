@@ -0,0 +1,60 @@
+"""
+Respuestas JSON serializadas una sola vez por versión de los datos.
+
+PreparedJSON guarda el cuerpo ya codificado, su ETag y las variantes
+comprimidas (gzip y, si el paquete `brotli` está instalado, br). Así cada
+petición solo tiene que elegir los bytes adecuados o contestar 304.
+"""
+import gzip
+import hashlib
+import json
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Por debajo de este tamaño no compensa comprimir
+MIN_COMPRESS_SIZE = 1024
+
+
+class PreparedJSON:
+    def __init__(self, payload):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha1(self.body).hexdigest()
+        self.etag = digest
+
+        # Una ETag fuerte distinta por codificación, como exige HTTP
+        self.variants = {None: (self.body, digest)}
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            self.variants['gzip'] = (gzip.compress(self.body, compresslevel=6, mtime=0), f"{digest}-gzip")
+            if brotli is not None:
+                self.variants['br'] = (brotli.compress(self.body, quality=5), f"{digest}-br")
+
+    def _choose_encoding(self):
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accepted.quality(encoding) > 0:
+                return encoding
+        return None
+
+    def to_response(self, status=200):
+        """Construye la respuesta Flask para la petición actual (200 o 304)"""
+        encoding = self._choose_encoding()
+        body, etag = self.variants[encoding]
+
+        known_etags = [tag for _, tag in self.variants.values()]
+        if any(request.if_none_match.contains(tag) for tag in known_etags):
+            response = Response(status=304)
+        else:
+            response = Response(body, status=status, mimetype='application/json')
+            if encoding is not None:
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        # Siempre revalidar: si el archivo cambia, la ETag cambia
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la etapa de transformación de convert_excel_to_json_2:
+enrich_excel_events + compact_records vs. los cuatro df.apply(axis=1) y el
+clean_row fila por fila que se usaban antes.
+
+Recorre todos los uploads/Matriz_*.xlsx (y SERIE_B_PRATO_match_2.xlsx), lee
+cada hoja MATRIZ una vez fuera de la medición y verifica que el JSON
+resultante tenga los mismos eventos con ambos caminos.
+Uso: python backend/scripts/bench_excel_conversion.py [archivos.xlsx...]
+"""
+
+import sys
+import os
+import glob
+import json
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+from bench_possessions import legacy_attack_defence
+from enrichment import enrich_excel_events
+from serialization import compact_records
+
+UPLOADS = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+
+
+def legacy_conversion(df):
+    """Transformaciones originales de convert_excel_to_json_2, fila por fila"""
+    def process_penalty_events(row):
+        if row['CATEGORY'] == 'PENALTY':
+            advance = str(row.get('ADVANCE', '')).strip()
+            if row['TEAM'] == 'OPPONENT':
+                player = "Player OPPONENT"
+            else:
+                player = str(row.get('PLAYER', '')).strip()
+
+            if advance == 'NEUTRAL':
+                row['YELLOW-CARD'] = player
+            elif advance == 'NEGATIVE':
+                row['RED-CARD'] = player
+            else:
+                row['YELLOW-CARD'] = None
+                row['RED-CARD'] = None
+        else:
+            row['YELLOW-CARD'] = None
+            row['RED-CARD'] = None
+        return row
+
+    def process_lineout_events(row):
+        if row['CATEGORY'] == 'LINEOUT':
+            player = str(row.get('PLAYER', '')).strip()
+            player_2 = str(row.get('PLAYER_2', '')).strip()
+            if player.startswith('T-'):
+                thrower = player[2:]
+                receiver = player_2
+            elif player_2.startswith('T-'):
+                thrower = player_2[2:]
+                receiver = player
+            else:
+                thrower = None
+                receiver = None
+            row['LINE_THROWER'] = thrower
+            row['LINE_RECEIVER'] = receiver
+            players = [p for p in [thrower, receiver] if p and p.lower() != 'nan']
+            row['PLAYER'] = players if players else None
+        else:
+            row['LINE_THROWER'] = None
+            row['LINE_RECEIVER'] = None
+        return row
+
+    def process_tackle_events(row):
+        if row['CATEGORY'] == 'TACKLE':
+            player = str(row.get('PLAYER', '')).strip() if row.get('PLAYER') else None
+            player_2 = str(row.get('PLAYER_2', '')).strip() if row.get('PLAYER_2') else None
+            players = [p for p in [player, player_2] if p and p.lower() != 'nan']
+            row['PLAYER'] = players[0] if len(players) == 1 else (players if players else None)
+            row['Team_Tackle_Count'] = 1
+        return row
+
+    def clean_row(row):
+        return {
+            k: v for k, v in row.items()
+            if v is not None and v != 'undefined' and (not isinstance(v, list) or len(v) > 0) and (not (isinstance(v, float) and pd.isna(v)))
+        }
+
+    df['LINE_THROWER'] = None
+    df['LINE_RECEIVER'] = None
+    df['YELLOW-CARD'] = None
+    df['RED-CARD'] = None
+    df = df.apply(process_lineout_events, axis=1)
+    df = df.apply(process_tackle_events, axis=1)
+    df = df.apply(process_penalty_events, axis=1)
+    df = legacy_attack_defence(df)
+    return df.apply(lambda row: clean_row(row.to_dict()), axis=1).to_json(orient='records')
+
+
+def new_conversion(df):
+    df = enrich_excel_events(df)
+    return pd.Series(compact_records(df), dtype=object).to_json(orient='records')
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    result = fn(df.copy())
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or (sorted(glob.glob(os.path.join(UPLOADS, 'Matriz_*.xlsx')))
+                             + [os.path.join(UPLOADS, 'SERIE_B_PRATO_match_2.xlsx')])
+
+    print(f"{'archivo':<48} {'eventos':>8} {'por columnas':>14} {'original':>12} {'x':>6}")
+    for path in paths:
+        name = os.path.basename(path)
+        if name.startswith('~$') or not os.path.exists(path):
+            continue
+        df = pd.read_excel(path, sheet_name='MATRIZ')
+        if 'CATEGORY' not in df.columns:
+            print(f"{name:<48} {'-':>8}  (sin columna CATEGORY, no lo procesa el conversor)")
+            continue
+
+        fast, t_fast = timed(new_conversion, df)
+        slow, t_slow = timed(legacy_conversion, df)
+        assert json.loads(fast) == json.loads(slow), f"{name}: los eventos no coinciden"
+        print(f"{name:<48} {len(df):>8} {t_fast * 1000:>12.1f}ms {t_slow * 1000:>10.1f}ms {t_slow / t_fast:>5.0f}x")
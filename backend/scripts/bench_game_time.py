@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark del cálculo de TIME(VIDEO), Game_Time y Time_Group de /events:
+etapa vectorizada vs. el bucle por evento que usaba el endpoint.
+Uso: python backend/scripts/bench_game_time.py [tamaños...]
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from enrichment import add_game_time_columns, game_seconds_by_halves, tiempo_de_juego
+
+KICK_OFF_1, END_1, KICK_OFF_2, END_2 = 12.0, 2281.0, 2288.0, 4474.0
+
+
+def build_events(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"SECOND": rng.uniform(0, 4600, size=n)})
+
+
+def time_groups():
+    def calcular(second):
+        return tiempo_de_juego(second, KICK_OFF_1, END_1, KICK_OFF_2)
+    return [
+        {"label": "0'- 20'", "start": 0, "end": 20 * 60},
+        {"label": "20' - 40'", "start": 20 * 60, "end": calcular(END_1) or 0},
+        {"label": "40' - 60'", "start": calcular(KICK_OFF_2) or 0, "end": (calcular(KICK_OFF_2) or 0) + 20 * 60},
+        {"label": "60' - 80'", "start": (calcular(KICK_OFF_2) or 0) + 20 * 60, "end": calcular(END_2) or 0},
+    ]
+
+
+def legacy_loop(events, groups):
+    """Bucle original de /events (sin los print), sobre los dicts ya generados"""
+    for event in events:
+        minutes, seconds = divmod(int(event['SECOND']), 60)
+        event['TIME(VIDEO)'] = f"{minutes:02}:{seconds:02}"
+        tiempo = tiempo_de_juego(event['SECOND'], KICK_OFF_1, END_1, KICK_OFF_2)
+        if tiempo is not None:
+            m, s = divmod(tiempo, 60)
+            event['Game_Time'] = f"{int(m):02}:{int(s):02}"
+            event['Time_Group'] = None
+            for group in groups:
+                if group["start"] <= tiempo < group["end"]:
+                    event["Time_Group"] = group["label"]
+                    break
+        else:
+            event['Game_Time'] = None
+            event['Time_Group'] = None
+    return events
+
+
+def vectorized(df, groups):
+    game_seconds = game_seconds_by_halves(df['SECOND'], KICK_OFF_1, END_1, KICK_OFF_2)
+    return add_game_time_columns(df, game_seconds, groups, video_time=True)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [500, 5_000, 50_000, 200_000]
+    groups = time_groups()
+
+    # Solo se mide la etapa de enriquecimiento: la conversión a dicts es común a ambos
+    print(f"{'eventos':>10} {'vectorizado':>14} {'bucle':>14}")
+    for n in sizes:
+        df = build_events(n)
+        fast, t_fast = timed(vectorized, df.copy(), groups)
+        slow, t_slow = timed(legacy_loop, df.to_dict(orient='records'), groups)
+        assert fast.to_dict(orient='records') == slow, "Los resultados no coinciden"
+        print(f"{n:>10} {t_fast * 1000:>12.1f}ms {t_slow * 1000:>12.1f}ms")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Verifica IncrementalEnricher contra el cálculo completo en cada partido de
+uploads/ (agregando los eventos de a uno, en orden y desordenados) y mide
+el costo de agregar un evento a un partido largo: incremental vs. volver a
+enriquecer toda la matriz.
+Uso: python backend/scripts/bench_incremental_enrichment.py [eventos]
+"""
+
+import sys
+import os
+import json
+import random
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+from enrichment import calculate_attack_defence
+from event_store import discover_match_files
+from incremental_enrichment import DERIVED_COLUMNS, IncrementalEnricher
+from serialization import frame_to_records
+
+UPLOADS = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+OPTIONS = [{}, {"origin_categories": ["TURNOVER+", "SCRUM", "LINEOUT", "KICK OFF"], "by_team": True}]
+
+
+def derived(events):
+    return [tuple(event.get(c) for c in DERIVED_COLUMNS) for event in events]
+
+
+def check_possessions(events, enricher):
+    """ORIGIN/END/PHASES de los índices contra calculate_attack_defence"""
+    df = calculate_attack_defence(pd.DataFrame(enricher.events).assign(
+        SECOND=pd.to_numeric(pd.DataFrame(events)['SECOND'], errors='coerce')))
+    expected = frame_to_records(df[['ORIGIN', 'END', 'PHASES']])
+    got = [{c: e[c] for c in ('ORIGIN', 'END', 'PHASES')} for e in enricher.events]
+    for i, (a, b) in enumerate(zip(got, expected)):
+        b = dict(b, PHASES=int(b['PHASES']) if b['PHASES'] is not None else None)
+        assert a == b, f"posición {i}: {a} != {b}"
+
+
+def incremental(events, options, chunk=1):
+    enricher = IncrementalEnricher(**options)
+    for start in range(0, len(events), chunk):
+        enricher.append(events[start:start + chunk])
+    return enricher
+
+
+def long_match(events, n):
+    """Partido sintético de n eventos: el partido repetido, corrido en el tiempo"""
+    span = max(e['SECOND'] for e in events if isinstance(e.get('SECOND'), (int, float))) + 1
+    result = []
+    for i in range(n):
+        event = dict(events[i % len(events)])
+        if isinstance(event.get('SECOND'), (int, float)):
+            event['SECOND'] = event['SECOND'] + span * (i // len(events))
+        event['PERIODS'] = None
+        result.append(event)
+    return result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rng = random.Random(0)
+
+    matches = []
+    for matriz_path, _ in discover_match_files(UPLOADS):
+        with open(matriz_path) as f:
+            events = json.load(f)
+        if not events or 'CATEGORY' not in events[0]:
+            continue
+        ordered = sorted(events, key=lambda e: e['SECOND'] if isinstance(e.get('SECOND'), (int, float)) else -1)
+        shuffled = events[:]
+        rng.shuffle(shuffled)
+        for options in OPTIONS:
+            for label, sequence in (("archivo", events), ("por SECOND", ordered), ("desordenado", shuffled)):
+                full = IncrementalEnricher(sequence, **options)
+                check_possessions(sequence, full)
+                for chunk in (1, 7):
+                    assert derived(incremental(sequence, options, chunk).events) == derived(full.events), \
+                        f"{matriz_path} {options} {label} chunk={chunk}"
+        matches.append(ordered)
+        print(f"{os.path.basename(matriz_path)}: {len(events)} eventos iguales")
+
+    events = long_match(max(matches, key=len), n)
+    head, tail = events[:-100], events[-100:]
+
+    enricher = IncrementalEnricher(head)
+    start = time.perf_counter()
+    for event in tail:
+        enricher.append([event])
+    t_incremental = (time.perf_counter() - start) / len(tail)
+
+    start = time.perf_counter()
+    for i in range(5):
+        IncrementalEnricher(head + tail[:i + 1])
+    t_full = (time.perf_counter() - start) / 5
+
+    assert derived(enricher.events) == derived(IncrementalEnricher(events).events)
+    print(f"\nAgregar un evento a un partido de {len(head)} eventos:")
+    print(f"  {'incremental':<24} {t_incremental * 1000:>8.2f}ms")
+    print(f"  {'enriquecer todo':<24} {t_full * 1000:>8.2f}ms")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Verifica IntervalIndex (con recorrido y con ventanas ordenadas) contra el
+recorrido de toda la lista (lo que hacía el cliente) en cada partido de
+uploads/ y mide consultas "activos en t" y "superpuestos con [t0, t1]" en
+partidos sintéticos de distinto largo, con cada estrategia.
+Uso: python backend/scripts/bench_interval_index.py [eventos ...]
+"""
+
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from event_store import discover_match_files
+from interval_index import SCAN_LIMIT, IntervalIndex, event_spans
+
+UPLOADS = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+
+
+def scan_at(starts, ends, t):
+    return [i for i in range(len(starts)) if starts[i] <= t <= ends[i]]
+
+
+def scan_between(starts, ends, t0, t1):
+    return [i for i in range(len(starts)) if starts[i] <= t1 and ends[i] >= t0]
+
+
+def synthetic(df, n):
+    """El partido repetido hasta n eventos, corrido en el tiempo"""
+    starts, ends = event_spans(df)
+    span = np.nanmax(ends) + 1
+    reps = -(-n // len(df))
+    offsets = np.repeat(np.arange(reps) * span, len(df))[:n]
+    return np.tile(starts, reps)[:n] + offsets, np.tile(ends, reps)[:n] + offsets
+
+
+def per_query(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    return (time.perf_counter() - start) / len(queries)
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [500, 1_000, 5_000, 10_000, 20_000, 200_000]
+    rng = np.random.default_rng(0)
+
+    frames = []
+    for matriz_path, _ in discover_match_files(UPLOADS):
+        with open(matriz_path) as f:
+            df = pd.DataFrame(json.load(f))
+        if 'SECOND' not in df.columns:
+            continue
+        starts, ends = event_spans(df)
+        times = np.concatenate([rng.uniform(np.nanmin(starts) - 10, np.nanmax(ends) + 10, 300), starts[:100], ends[:100]])
+        for index in (IntervalIndex(starts, ends), IntervalIndex(starts, ends, scan_limit=0)):
+            for t in times:
+                assert index.at(t).tolist() == scan_at(starts, ends, t), f"{matriz_path}: at({t})"
+            for t0, width in zip(times[:200], rng.uniform(0, 120, 200)):
+                assert index.overlapping(t0, t0 + width).tolist() == scan_between(starts, ends, t0, t0 + width), \
+                    f"{matriz_path}: overlapping({t0}, {t0 + width})"
+        frames.append(df)
+        print(f"{os.path.basename(matriz_path)}: {len(df)} eventos, consultas iguales al recorrido")
+
+    df = max(frames, key=len)
+    print(f"\nµs por consulta (SCAN_LIMIT = {SCAN_LIMIT}: hasta ese tamaño el índice usa el recorrido)")
+    print(f"{'eventos':>8} | {'recorrido at':>12} {'rango 30s':>10} | {'ventanas at':>11} {'rango 30s':>10}"
+          f" {'armado':>8}")
+    for n in sizes:
+        starts, ends = synthetic(df, n)
+        times = rng.uniform(0, np.nanmax(ends), 2000)
+        row = []
+        for scan_limit in (n, 0):
+            start = time.perf_counter()
+            index = IntervalIndex(starts, ends, scan_limit=scan_limit)
+            t_build = time.perf_counter() - start
+            row.append(per_query(index.at, [(t,) for t in times]) * 1e6)
+            row.append(per_query(index.overlapping, [(t, t + 30) for t in times]) * 1e6)
+        print(f"{n:>8} | {row[0]:>12.1f} {row[1]:>10.1f} | {row[2]:>11.1f} {row[3]:>10.1f} {t_build * 1000:>6.1f}ms")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Simula el etiquetado en vivo de un partido de uploads/: envía sus eventos
+de a uno a POST /live/matches/<id>/events con un cliente suscrito a
+/live/matches/<id>/stream, verifica que el stream y el snapshot final
+coincidan con el enriquecimiento completo y mide la latencia envío -> push
+y los bytes recibidos contra volver a pedir el partido entero tras cada
+evento.
+Uso: python backend/scripts/bench_live_ingest.py [matriz.json]
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import http.client
+from itertools import accumulate
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from werkzeug.serving import make_server
+from app import app, TRY_ORIGIN_OPTIONS
+from incremental_enrichment import IncrementalEnricher
+
+UPLOADS = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+
+
+def request(port, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                       headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, data
+
+
+def listen(port, match_id, received, ready):
+    """Lee el stream SSE y guarda (hora de llegada, mensaje) de cada evento"""
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    connection.request('GET', f'/live/matches/{match_id}/stream')
+    response = connection.getresponse()
+    ready.set()
+    fields = {}
+    for raw in response:
+        line = raw.decode('utf-8').rstrip('\n')
+        if not line:
+            if fields.get('event') == 'events':
+                message = json.loads(fields['data'])
+                received.append((time.perf_counter(), message, len(fields['data'])))
+            fields = {}
+        elif not line.startswith(':') and ':' in line:
+            name, value = line.split(':', 1)
+            fields[name] = value.lstrip(' ')
+    connection.close()
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(UPLOADS, 'matrizPescara.json')
+    with open(path) as f:
+        events = json.load(f)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    status, data = request(port, 'POST', '/live/matches', {"header": {"TEAM": "Bench"}})
+    match_id = json.loads(data)['match_id']
+
+    received, ready = [], threading.Event()
+    listener = threading.Thread(target=listen, args=(port, match_id, received, ready), daemon=True)
+    listener.start()
+    ready.wait()
+    time.sleep(0.2)
+
+    sent = []
+    for event in events:
+        sent.append(time.perf_counter())
+        status, data = request(port, 'POST', f'/live/matches/{match_id}/events', event)
+        assert status == 201, data
+
+    deadline = time.time() + 10
+    while len(received) < len(events) and time.time() < deadline:
+        time.sleep(0.05)
+    assert len(received) == len(events), f"llegaron {len(received)} de {len(events)} mensajes"
+
+    # El cliente aplica eventos nuevos y cambios sobre su copia local
+    local = []
+    for _, message, _ in received:
+        assert message['first_position'] == len(local)
+        for update in message['updated']:
+            local[update['position']].update(update['changes'])
+        local.extend(message['events'])
+    expected = IncrementalEnricher(events, **TRY_ORIGIN_OPTIONS).events
+    assert local == expected, "la copia armada con el stream no coincide con el enriquecimiento completo"
+    status, data = request(port, 'GET', f'/live/matches/{match_id}/events')
+    assert json.loads(data)['events'] == expected, "el snapshot no coincide"
+    server.shutdown()
+
+    # Lo que costaría que el cliente vuelva a pedir todo el partido tras cada evento
+    sizes = list(accumulate(len(json.dumps(event, ensure_ascii=False)) for event in expected))
+    polled_bytes = sum(sizes)
+
+    latencies = sorted((arrival - start) * 1000 for start, (arrival, _, _) in zip(sent, received))
+    pushed_bytes = sum(size for _, _, size in received)
+    print(f"{os.path.basename(path)}: {len(events)} eventos enviados de a uno, stream y snapshot iguales")
+    print(f"  latencia envío -> push   p50 {latencies[len(latencies) // 2]:.1f}ms"
+          f"   p95 {latencies[int(len(latencies) * 0.95)]:.1f}ms")
+    print(f"  bytes recibidos por el cliente: stream {pushed_bytes / 1e6:.2f}MB"
+          f" vs. pedir el partido tras cada evento ~{polled_bytes / 1e6:.1f}MB")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Verifica player_stat_frame contra los conteos que hacen los gráficos por
+jugador del frontend (un filtro sobre todos los eventos por jugador y
+estadística) en cada partido de uploads/, y mide ambos caminos sobre una
+temporada sintética formada repitiendo los partidos.
+Uso: python backend/scripts/bench_player_stats.py [repeticiones]
+"""
+
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+from event_store import discover_match_files
+from player_stats import STAT_COLUMNS, player_stat_frame, season_stat_frame
+from serialization import frame_to_records
+
+UPLOADS = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+
+
+def players_of(event):
+    player = event.get('PLAYER')
+    return player if isinstance(player, list) else [player]
+
+
+def chart_stats(events):
+    """Los mismos filtros que TacklesBarChart, PenaltiesPlayerBarChart, TriesPlayerChart, ..."""
+    def valid(player):
+        return player is not None and str(player).strip() not in ('', 'None', 'none')
+
+    players = {p for e in events for p in players_of(e) if valid(p)}
+    lineouts = [e for e in events if e.get('CATEGORY') == 'LINEOUT']
+    players |= {e.get(c) for e in lineouts for c in ('LINE_THROWER', 'LINE_RECEIVER') if valid(e.get(c))}
+
+    def count(player, condition):
+        return sum(1 for e in events if player in players_of(e) and condition(e))
+
+    stats = {}
+    for player in players:
+        own = lambda e: e.get('TEAM') != 'OPPONENT'
+        stats[player] = {
+            "tackles": count(player, lambda e: e.get('CATEGORY') == 'TACKLE'),
+            "tackles_positive": count(player, lambda e: e.get('CATEGORY') == 'TACKLE' and e.get('ADVANCE') == 'POSITIVE'),
+            "tackles_neutral": count(player, lambda e: e.get('CATEGORY') == 'TACKLE' and e.get('ADVANCE') == 'NEUTRAL'),
+            "tackles_negative": count(player, lambda e: e.get('CATEGORY') == 'TACKLE' and e.get('ADVANCE') == 'NEGATIVE'),
+            "missed_tackles": count(player, lambda e: e.get('CATEGORY') == 'MISSED-TACKLE'),
+            "penalties": count(player, lambda e: e.get('CATEGORY') == 'PENALTY'),
+            "turnovers_won": count(player, lambda e: e.get('CATEGORY') == 'TURNOVER+'),
+            "turnovers_lost": count(player, lambda e: e.get('CATEGORY') == 'TURNOVER-'),
+            "tries": count(player, lambda e: e.get('POINTS') == 'TRY' and own(e)),
+            "points": sum(e.get('POINTS(VALUE)') or 0 for e in events
+                          if player in players_of(e) and e.get('CATEGORY') == 'POINTS' and own(e)),
+            "lineout_throws": sum(1 for e in lineouts if e.get('LINE_THROWER') == player),
+            "lineout_receptions": sum(1 for e in lineouts if e.get('LINE_RECEIVER') == player),
+        }
+    return stats
+
+
+def frame_stats(df):
+    return {row.pop('PLAYER'): row for row in frame_to_records(player_stat_frame(df).reset_index())}
+
+
+if __name__ == "__main__":
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    frames = []
+    for matriz_path, _ in discover_match_files(UPLOADS):
+        with open(matriz_path) as f:
+            df = pd.DataFrame(json.load(f))
+        if 'CATEGORY' not in df.columns:
+            continue
+        events = frame_to_records(df)
+        expected = chart_stats(events)
+        got = frame_stats(df)
+        assert got.keys() == expected.keys(), f"{matriz_path}: jugadores distintos"
+        for player, stats in expected.items():
+            assert got[player] == stats, f"{matriz_path} {player}: {got[player]} != {stats}"
+        frames.append((df, events))
+        print(f"{os.path.basename(matriz_path)}: {len(got)} jugadores iguales")
+
+    season = [item for _ in range(repetitions) for item in frames]
+    n_events = sum(len(events) for _, events in season)
+
+    start = time.perf_counter()
+    season_stat_frame([player_stat_frame(df) for df, _ in season])
+    t_frame = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _, events in season:
+        chart_stats(events)
+    t_charts = time.perf_counter() - start
+
+    print(f"\nTemporada sintética: {len(season)} partidos, {n_events} eventos, {len(STAT_COLUMNS)} estadísticas")
+    print(f"  {'conteo por partido + suma':<28} {t_frame * 1000:>8.0f}ms")
+    print(f"  {'filtros por jugador':<28} {t_charts * 1000:>8.0f}ms")
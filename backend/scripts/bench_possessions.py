@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark y verificación de la segmentación de posesiones (ORIGIN, END y
+PHASES de ATTACK/DEFENCE): segment_possessions vs. el calculate_attack_defence
+fila por fila que usaba /convert_excel_to_json_2.
+
+Primero compara ambos resultados sobre uploads/SERIE_B_PRATO_match_2.xlsx y
+luego mide matrices sintéticas (desordenadas, como la del Excel).
+Uso: python backend/scripts/bench_possessions.py [tamaños...]
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from enrichment import (
+    POSSESSION_CATEGORIES,
+    POSSESSION_END_CATEGORIES,
+    POSSESSION_ORIGIN_CATEGORIES,
+    RUCK_CATEGORY,
+    segment_possessions,
+)
+
+EXCEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'uploads', 'SERIE_B_PRATO_match_2.xlsx')
+CATEGORIES = (["TACKLE", "KICK", "MISSED-TACKLE", RUCK_CATEGORY, RUCK_CATEGORY] + POSSESSION_CATEGORIES
+              + POSSESSION_ORIGIN_CATEGORIES + POSSESSION_END_CATEGORIES)
+
+
+def legacy_attack_defence(df):
+    """Algoritmo original de convert_excel_to_json_2 (tres filtros completos por fila)"""
+    def calculate_attack_defence(row, df):
+        if row['CATEGORY'] in ['ATTACK', 'DEFENCE']:
+            origin_events = ['KICK-OFF', 'TURNOVER+', 'SCRUM', 'LINEOUT', 'PENALTY', 'FREE-KICK']
+            relevant_origin = df[(df['CATEGORY'].isin(origin_events)) & (df['SECOND'] < row['SECOND'])]
+            origin = relevant_origin.iloc[-1] if not relevant_origin.empty else None
+
+            end_events = ['PENALTY', 'TURNOVER-', 'POINTS']
+            relevant_end = df[(df['CATEGORY'].isin(end_events)) & (df['SECOND'] > row['SECOND'])]
+            end = relevant_end.iloc[0] if not relevant_end.empty else None
+
+            ruck_events = df[(df['CATEGORY'] == 'RUCK') & (df['SECOND'] >= (origin['SECOND'] if origin is not None else 0)) & (df['SECOND'] <= (end['SECOND'] if end is not None else row['SECOND']))]
+            phases = len(ruck_events) + 1 if not ruck_events.empty else 1
+
+            row['ORIGIN'] = origin['CATEGORY'] if origin is not None else None
+            row['END'] = end['CATEGORY'] if end is not None else None
+            row['PHASES'] = phases
+        return row
+    return df.apply(lambda row: calculate_attack_defence(row, df), axis=1)
+
+
+def build_events(n, seed=0):
+    """Matriz sintética de n eventos con SECOND desordenado y algunos huecos"""
+    rng = np.random.default_rng(seed)
+    seconds = rng.uniform(0, 4800 * max(1, n // 500), size=n).round(1)
+    seconds[rng.random(n) < 0.01] = np.nan
+    return pd.DataFrame({"SECOND": seconds, "CATEGORY": rng.choice(CATEGORIES, size=n)})
+
+
+def check(df, label):
+    """Compara ORIGIN/END/PHASES de las filas de posesión; devuelve los tiempos"""
+    start = time.perf_counter()
+    fast = segment_possessions(df)
+    t_fast = time.perf_counter() - start
+
+    start = time.perf_counter()
+    slow = legacy_attack_defence(df)
+    t_slow = time.perf_counter() - start
+
+    mask = df['CATEGORY'].isin(POSSESSION_CATEGORIES)
+    if mask.any():
+        for column in ('ORIGIN', 'END'):
+            expected = slow[column][mask].to_numpy(dtype=object, na_value=None)
+            assert list(fast[column][mask]) == list(expected), f"{label}: {column} no coincide"
+        assert np.array_equal(fast['PHASES'][mask].to_numpy(), slow['PHASES'][mask].to_numpy(dtype=float)), \
+            f"{label}: PHASES no coincide"
+    assert fast['PHASES'][~mask].isna().all(), f"{label}: PHASES fuera de las posesiones"
+    return t_fast, t_slow
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1_000, 5_000, 20_000, 100_000]
+
+    if os.path.exists(EXCEL_PATH):
+        df = pd.read_excel(EXCEL_PATH, sheet_name='MATRIZ')
+        t_fast, t_slow = check(df, "SERIE_B_PRATO_match_2.xlsx")
+        print(f"SERIE_B_PRATO_match_2.xlsx ({len(df)} eventos): iguales, "
+              f"{t_fast * 1000:.1f}ms vs {t_slow * 1000:.1f}ms")
+    else:
+        print(f"No se encontró {EXCEL_PATH}; solo se usan datos sintéticos")
+
+    print(f"{'eventos':>10} {'vectorizado':>14} {'original':>14}")
+    for n in sizes:
+        df = build_events(n)
+        if n <= 20_000:
+            t_fast, t_slow = check(df, f"sintético {n}")
+            legacy = f"{t_slow * 1000:>12.1f}ms"
+        else:
+            start = time.perf_counter()
+            segment_possessions(df)
+            t_fast = time.perf_counter() - start
+            legacy = f"{'-':>14}"
+        print(f"{n:>10} {t_fast * 1000:>12.1f}ms {legacy}")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la serialización de eventos: frame_to_records vs. to_dict +
+doble bucle de limpieza que usaban /events y /pescara.
+Uso: python backend/scripts/bench_serialization.py [ruta_matriz.json] [repeticiones...]
+"""
+
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+from serialization import frame_to_records
+
+DEFAULT_MATRIZ = os.path.join(os.path.dirname(__file__), '..', 'uploads', 'matrizPescara.json')
+
+
+def legacy_records(df):
+    events = df.to_dict(orient='records')
+    for event in events:
+        for key, value in event.items():
+            if value != value:
+                event[key] = None
+            elif isinstance(value, pd.Timestamp):
+                event[key] = value.isoformat()
+            elif isinstance(value, pd.Timedelta):
+                event[key] = str(value)
+    return events
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    matriz_path = args.pop(0) if args and not args[0].isdigit() else DEFAULT_MATRIZ
+    repeats = [int(a) for a in args] or [1, 10, 40]
+
+    with open(matriz_path, 'r') as f:
+        base = pd.DataFrame(json.load(f))
+
+    print(f"{'eventos':>10} {'frame_to_records':>18} {'to_dict+bucle':>15}")
+    for r in repeats:
+        df = pd.concat([base] * r, ignore_index=True)
+        fast, t_fast = timed(frame_to_records, df)
+        slow, t_slow = timed(legacy_records, df)
+        assert json.dumps(fast) == json.dumps(slow), "Los resultados no coinciden"
+        print(f"{len(df):>10} {t_fast * 1000:>16.1f}ms {t_slow * 1000:>13.1f}ms")
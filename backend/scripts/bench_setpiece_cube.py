@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Verifica el cubo de formaciones fijas contra los conteos de los gráficos de
+efectividad (ScrumEffectivityChart, LineoutEffectivityChart,
+TacklesEffectivityChart) en cada partido de uploads/, y mide una consulta de
+temporada sintética (los partidos repetidos) sobre el cubo vs. filtrar los
+eventos. También mide el armado en frío de los cubos de temporada desde un
+almacén Parquet (como /stats/set-pieces?season=).
+Uso: python backend/scripts/bench_setpiece_cube.py [repeticiones]
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+from event_store import EventStore, discover_match_files, entry_version
+from serialization import frame_to_records
+from setpiece_cube import SetPieceCubeCache, combine_cubes, match_cube, query_cube, source_cube
+
+UPLOADS = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+
+
+def chart_counts(events):
+    """(categoría, lado) -> (ganados, perdidos) con los filtros de Carousel y los gráficos"""
+    counts = {}
+    for side, is_side in (("OWN", lambda e: e.get('TEAM') != 'OPPONENT'),
+                          ("OPPONENT", lambda e: e.get('TEAM') == 'OPPONENT')):
+        scrums = [e for e in events if e.get('CATEGORY') == 'SCRUM' and is_side(e)]
+        counts[("SCRUM", side)] = (sum(1 for e in scrums if e.get('SCRUM_RESULT') == 'WIN'),
+                                   sum(1 for e in scrums if e.get('SCRUM_RESULT') == 'LOST'))
+        lineouts = [e for e in events if e.get('CATEGORY') == 'LINEOUT' and is_side(e)]
+        counts[("LINEOUT", side)] = (sum(1 for e in lineouts if e.get('LINE_RESULT') in ('CLEAN', 'DIRTY')),
+                                     sum(1 for e in lineouts if e.get('LINE_RESULT') in ('LOST L', 'NOT-STRAIGHT')))
+        team_events = [e for e in events if is_side(e)]
+        counts[("TACKLE", side)] = (sum(1 for e in team_events if e.get('CATEGORY') == 'TACKLE'),
+                                    sum(1 for e in team_events if e.get('CATEGORY') == 'MISSED-TACKLE'))
+    return counts
+
+
+def cube_counts(cube):
+    counts = {}
+    for row in frame_to_records(query_cube(cube, by=['CATEGORY', 'SIDE'])):
+        key = ("TACKLE" if row['CATEGORY'] == 'MISSED-TACKLE' else row['CATEGORY'], row['SIDE'])
+        won, lost = counts.get(key, (0, 0))
+        counts[key] = (won + row['won'], lost + row['lost'])
+    return counts
+
+
+def raw_report(events_by_match):
+    """El mismo reporte de temporada recorriendo los eventos de cada partido"""
+    report = {}
+    for events in events_by_match:
+        for key, (won, lost) in chart_counts(events).items():
+            total = report.get(key, (0, 0))
+            report[key] = (total[0] + won, total[1] + lost)
+    return report
+
+
+if __name__ == "__main__":
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    matches = []
+    for matriz_path, _ in discover_match_files(UPLOADS):
+        with open(matriz_path) as f:
+            df = pd.DataFrame(json.load(f))
+        if 'CATEGORY' not in df.columns:
+            continue
+        events = frame_to_records(df)
+        cube = match_cube(df, os.path.basename(matriz_path))
+        expected = chart_counts(events)
+        for got in (cube_counts(cube), cube_counts(source_cube(df, 'x'))):
+            for key, value in expected.items():
+                assert got.get(key, (0, 0)) == value, f"{matriz_path} {key}: {got.get(key)} != {value}"
+        matches.append((df, events))
+        print(f"{os.path.basename(matriz_path)}: {len(df)} eventos -> cubo de {len(cube)} filas, iguales")
+
+    season = [item for _ in range(repetitions) for item in matches]
+    n_events = sum(len(events) for _, events in season)
+
+    start = time.perf_counter()
+    cube = combine_cubes([match_cube(df, str(i)) for i, (df, _) in enumerate(season)])
+    t_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    query_cube(cube, by=['CATEGORY', 'SIDE'])
+    query_cube(cube, {'CATEGORY': ['LINEOUT'], 'SIDE': ['OWN']}, by=['LINE_POSITION', 'Time_Group'])
+    t_query = time.perf_counter() - start
+
+    start = time.perf_counter()
+    raw_report([events for _, events in season])
+    t_raw = time.perf_counter() - start
+
+    print(f"\nTemporada sintética: {len(season)} partidos, {n_events} eventos, cubo de {len(cube)} filas")
+    print(f"  {'armar cubos (una vez)':<28} {t_build * 1000:>8.0f}ms")
+    print(f"  {'2 consultas sobre el cubo':<28} {t_query * 1000:>8.1f}ms")
+    print(f"  {'filtrar eventos':<28} {t_raw * 1000:>8.0f}ms")
+
+    with tempfile.TemporaryDirectory() as root:
+        store = EventStore(root)
+        entries = store.ingest_folder(UPLOADS)
+        season_matches = [(e['match_id'], entry_version(e),
+                           lambda columns, match_id=e['match_id']: store.read_events(match_id, columns=columns))
+                          for e in entries]
+        cache = SetPieceCubeCache()
+        start = time.perf_counter()
+        cube = cache.for_season(None, season_matches)
+        t_cold = time.perf_counter() - start
+        start = time.perf_counter()
+        cache.for_season(None, season_matches)
+        t_warm = time.perf_counter() - start
+    print(f"\nDesde el almacén: {len(entries)} partidos -> cubo de {len(cube)} filas")
+    print(f"  {'en frío':<28} {t_cold * 1000:>8.0f}ms")
+    print(f"  {'misma versión':<28} {t_warm * 1000:>8.2f}ms")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark del cálculo de TRY_ORIGIN: versión vectorizada vs. el recorrido
+fila por fila que usaba /events.
+Uso: python backend/scripts/bench_try_origins.py [tamaños...]
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from enrichment import TRY_ORIGIN_CATEGORIES, resolve_try_origins
+
+CATEGORIES = ["RUCK", "TACKLE", "ATTACK", "DEFENCE", "KICK", "POINTS"] + TRY_ORIGIN_CATEGORIES
+
+
+def build_events(n, seed=0):
+    """Genera una matriz sintética de n eventos ordenados por SECOND"""
+    rng = np.random.default_rng(seed)
+    categories = rng.choice(CATEGORIES, size=n)
+    points = np.where(categories == "POINTS", rng.choice(["TRY", "CONVERSION"], size=n), None)
+    return pd.DataFrame({
+        "SECOND": np.sort(rng.uniform(0, 4800 * max(1, n // 500), size=n)),
+        "CATEGORY": categories,
+        "POINTS": points,
+        "TEAM": rng.choice(["SAN BENEDETTO", "OPPONENT"], size=n),
+    })
+
+
+def legacy_try_origins(df):
+    """Algoritmo original de calcular_origen_tries (cuadrático)"""
+    def get_origin_event(try_event):
+        relevant = df[(df['CATEGORY'].isin(TRY_ORIGIN_CATEGORIES)) & (df['SECOND'] < try_event['SECOND'])]
+        return relevant.iloc[-1]['CATEGORY'] if not relevant.empty else None
+    return df.apply(lambda e: get_origin_event(e) if e['POINTS'] == "TRY" else None, axis=1)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1_000, 5_000, 20_000, 100_000, 200_000]
+
+    print(f"{'eventos':>10} {'vectorizado':>14} {'por equipo':>14} {'original':>14}")
+    for n in sizes:
+        df = build_events(n)
+        fast, t_fast = timed(resolve_try_origins, df)
+        _, t_team = timed(resolve_try_origins, df, by_team=True)
+
+        # El algoritmo original solo se mide en tamaños razonables
+        if n <= 20_000:
+            slow, t_slow = timed(legacy_try_origins, df)
+            assert fast.equals(slow.astype(object)), "Los resultados no coinciden"
+            legacy = f"{t_slow * 1000:>12.1f}ms"
+        else:
+            legacy = f"{'-':>14}"
+
+        print(f"{n:>10} {t_fast * 1000:>12.1f}ms {t_team * 1000:>12.1f}ms {legacy}")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la lectura de XML de LongoMatch/Sportscode: iter_instances
+(iterparse, descartando cada instance) vs. ET.parse + findall('.//instance')
+que usaban los conversores.
+
+Verifica que ambos caminos entreguen los mismos <instance> (serializados) y
+los mismos eventos de parse_xml_events sobre los XML de uploads/, y mide
+tiempo y pico de memoria sobre una exportación sintética formada repitiendo
+las instancias de Polisportiva.xml. iterparse no es más rápido: cambia algo
+de tiempo por una memoria acotada a un instance.
+Uso: python backend/scripts/bench_xml_parsing.py [repeticiones]
+"""
+
+import sys
+import os
+import glob
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from convert_xml_enriched import parse_xml_events
+from xml_stream import iter_instances
+
+UPLOADS = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+
+
+def legacy_instances(path):
+    return ET.parse(path).getroot().findall('.//instance')
+
+
+def serialize(instance):
+    instance.tail = None
+    return ET.tostring(instance)
+
+
+def legacy_parse_xml_events(path):
+    """parse_xml_events tal como era antes, sobre el DOM completo"""
+    events = []
+    for inst in legacy_instances(path):
+        code_elem = inst.find("code")
+        if code_elem is None:
+            continue
+        start_elem, end_elem = inst.find("start"), inst.find("end")
+        if start_elem is None or end_elem is None:
+            continue
+        labels = [(label.findtext("group"), label.findtext("text")) for label in inst.findall("label")]
+        events.append((code_elem.text, start_elem.text, end_elem.text, labels))
+    return events
+
+
+def streamed_parse_xml_events(path):
+    events = []
+    for inst in iter_instances(path):
+        code_elem = inst.find("code")
+        if code_elem is None:
+            continue
+        start_elem, end_elem = inst.find("start"), inst.find("end")
+        if start_elem is None or end_elem is None:
+            continue
+        labels = [(label.findtext("group"), label.findtext("text")) for label in inst.findall("label")]
+        events.append((code_elem.text, start_elem.text, end_elem.text, labels))
+    return events
+
+
+def build_export(source, repetitions):
+    """Escribe un XML con las instancias de `source` repetidas; devuelve la ruta"""
+    with open(source, 'rb') as f:
+        content = f.read()
+    start = content.index(b'<instance>')
+    end = content.rindex(b'</instance>') + len(b'</instance>')
+    handle, path = tempfile.mkstemp(suffix='.xml')
+    with os.fdopen(handle, 'wb') as f:
+        f.write(content[:start])
+        for _ in range(repetitions):
+            f.write(content[start:end])
+        f.write(content[end:])
+    return path
+
+
+def measure(fn, path, runs=3):
+    """
+    (resultado, tiempo, pico de memoria). El tiempo es el mejor de `runs`
+    sin tracemalloc (que enlentece más al parser incremental); el pico se
+    mide en una corrida aparte.
+    """
+    elapsed = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn(path)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+if __name__ == "__main__":
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+
+    for path in sorted(glob.glob(os.path.join(UPLOADS, '*.xml'))):
+        name = os.path.basename(path)
+        # El texto tras </instance> (tail) puede no haberse leído aún al entregarlo; no se usa
+        legacy = [serialize(i) for i in legacy_instances(path)]
+        streamed = [serialize(i) for i in iter_instances(path)]
+        assert legacy == streamed, f"{name}: los instance no coinciden"
+        assert legacy_parse_xml_events(path) == streamed_parse_xml_events(path), f"{name}: eventos distintos"
+        print(f"{name}: {len(streamed)} instancias iguales, parse_xml_events -> {len(parse_xml_events(path, {}))} eventos")
+
+    path = build_export(os.path.join(UPLOADS, 'Polisportiva.xml'), repetitions)
+    try:
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"\nExportación sintética: {size_mb:.1f} MB ({repetitions} repeticiones)")
+        print(f"{'':<20} {'instancias':>10} {'tiempo':>10} {'pico memoria':>14}")
+        for label, fn in (("ET.parse + findall", legacy_parse_xml_events), ("iterparse", streamed_parse_xml_events)):
+            events, elapsed, peak = measure(fn, path)
+            print(f"{label:<20} {len(events):>10} {elapsed * 1000:>8.0f}ms {peak / 1e6:>12.1f}MB")
+        # Solo recorrer el archivo, sin guardar nada: muestra la memoria del parser en sí
+        _, elapsed, peak = measure(lambda p: sum(1 for _ in iter_instances(p)), path)
+        print(f"{'iterparse (conteo)':<20} {'':>10} {elapsed * 1000:>8.0f}ms {peak / 1e6:>12.1f}MB")
+    finally:
+        os.remove(path)
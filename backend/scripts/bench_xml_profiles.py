@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Verifica los perfiles de xml_import contra los bucles if/elif que tenían los
+conversores (convert_xml_enriched, convert_xml.py, convert_xml_pescara.py,
+xml_to_json_pescara.py e import_emergency_pescara.py) y mide el mapeo de
+labels sobre los XML de uploads/.
+
+Además de los XML reales se generan instancias aleatorias con los tres
+dialectos de grupo (<group>texto</group>, <group name=...>, <label group=...>),
+labels incompletas y textos vacíos o no numéricos.
+Uso: python backend/scripts/bench_xml_profiles.py [instancias_aleatorias]
+"""
+
+import sys
+import os
+import glob
+import random
+import time
+import xml.etree.ElementTree as ET
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from xml_import import get_import_profile
+from xml_stream import iter_instances
+
+UPLOADS = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+
+# Como en los conversores, el perfil se pide una vez y no por instancia
+ENRICHED = get_import_profile('enriched')
+SPORTSCODE = get_import_profile('sportscode')
+EMERGENCY = get_import_profile('emergency')
+
+
+def legacy_enriched(inst):
+    extra_data, players, x, y = {}, [], None, None
+    for label in inst.findall("label"):
+        group_elem, text_elem = label.find("group"), label.find("text")
+        if group_elem is not None and text_elem is not None:
+            group = group_elem.text.strip() if group_elem.text else ""
+            text = text_elem.text.strip() if text_elem.text else ""
+            if group.upper() == "JUGADOR" and text:
+                players.append(text)
+            elif group.upper() == "EQUIPO":
+                extra_data["EQUIPO"] = text
+            elif group.upper() == "X":
+                try:
+                    x = float(text)
+                except ValueError:
+                    pass
+            elif group.upper() == "Y":
+                try:
+                    y = float(text)
+                except ValueError:
+                    pass
+            else:
+                extra_data[group] = text
+    return {"players": players or None, "x": x, "y": y, "extra_data": extra_data}
+
+
+def new_enriched(inst):
+    # Como convert_xml_enriched.parse_xml_events: el perfil completa el evento ya armado
+    return ENRICHED.map_labels(inst, columns={"players": None, "x": None, "y": None, "extra_data": {}})
+
+
+def legacy_pescara(inst):
+    event, current_group = {}, None
+    for label in inst.findall('label'):
+        group_elem, text_elem = label.find('group'), label.find('text')
+        if group_elem is not None and group_elem.text is not None:
+            current_group = group_elem.text
+        if text_elem is not None and text_elem.text is not None and current_group is not None:
+            group_upper = current_group.upper()
+            text = text_elem.text
+            value = text.upper().strip()
+            if group_upper == "EQUIPO":
+                if value in ("RIVAL", "AVEZZANO"):
+                    event["TEAM"] = "OPPONENT"
+                elif value == "PESCARA" or value in ["1", "2"]:
+                    event["TEAM"] = "PESCARA"
+                else:
+                    event["TEAM"] = text
+            elif group_upper == "JUGADOR":
+                event["PLAYER"] = text
+            elif group_upper == "TIPO-PUNTOS":
+                if value in ("PENALTY-KICK", "PENALTY KICK"):
+                    event["POINTS"], event["POINTS(VALUE)"] = "PEN", 3
+                elif value in ("DROP P", "DROP"):
+                    event["POINTS"], event["POINTS(VALUE)"] = "DG", 3
+                elif value in ("CONVERSION", "CON"):
+                    event["POINTS"], event["POINTS(VALUE)"] = "CON", 2
+                elif value == "TRY":
+                    event["POINTS"], event["POINTS(VALUE)"] = "TRY", 5
+                else:
+                    event["POINTS"], event["POINTS(VALUE)"] = text, 0
+            elif group_upper in ("INFRACCION", "INFRACCIÓN"):
+                event["INFRACTION_TYPE"] = text
+            elif "TIPO-PERDIDA" in group_upper or "RECUPERACI" in group_upper:
+                event["TURNOVER_TYPE"] = text
+            elif group_upper == "AVANCE":
+                event["ADVANCE"] = text
+            else:
+                event[current_group.replace('-', '_').replace('/', '_').replace(' ', '_').upper()] = text
+            current_group = None
+    return event
+
+
+def legacy_pescara_attributes(inst):
+    event = {}
+    players = inst.find('.//label[@group="Jugadores"]')
+    if players is not None and players.find('text') is not None:
+        event["PLAYER"] = players.find('text').text
+    for label in inst.findall('.//label'):
+        group, text_elem = label.get('group', ''), label.find('text')
+        if text_elem is not None and group in ('COORDINATE_X', 'COORDINATE_Y'):
+            try:
+                event[group] = float(text_elem.text)
+            except (TypeError, ValueError):
+                pass
+    return event
+
+
+SPORTSCODE_CATEGORIES = {
+    'EQUIPO': 'TEAM', 'INFRACCION': 'INFRACTION', 'PENAL': 'PENALTY', 'SCRUM': 'SCRUM',
+    'LINEOUT': 'LINEOUT', 'TACKLE': 'TACKLE', 'RUCK': 'RUCK', 'KICK': 'KICK', 'TRY': 'POINTS',
+    'TURNOVER': 'TURNOVER+', 'DEFENSA': 'DEFENSE', 'ATAQUE': 'ATTACK',
+}
+
+
+def legacy_sportscode(inst):
+    event = {}
+    code_elem = inst.find('code')
+    if code_elem is not None:
+        group_elem = code_elem.find('.//label/group')
+        if group_elem is not None:
+            category_raw = group_elem.get('name', '')
+            event['CATEGORY'] = SPORTSCODE_CATEGORIES.get(category_raw, category_raw)
+    players_elem = inst.find('players')
+    if players_elem is not None:
+        player_elem = players_elem.find('player')
+        if player_elem is not None:
+            event['PLAYER'] = player_elem.get('name', '')
+    for label in inst.findall('.//label'):
+        text_elem = label.find('text')
+        if text_elem is not None:
+            label_text = text_elem.text
+            group_name = label.find('group').get('name', '') if label.find('group') is not None else ''
+            if 'RESULTADO' in group_name or 'RESULT' in group_name:
+                if event.get('CATEGORY') == 'SCRUM':
+                    event['SCRUM_RESULT'] = label_text
+                elif event.get('CATEGORY') == 'LINEOUT':
+                    event['LINE_RESULT'] = label_text
+            elif 'TIPO' in group_name or 'TYPE' in group_name:
+                if event.get('CATEGORY') == 'KICK':
+                    event['KICK_TYPE'] = label_text
+                elif 'INFRACTION' in event.get('CATEGORY', ''):
+                    event['INFRACTION_TYPE'] = label_text
+                elif 'TURNOVER' in event.get('CATEGORY', ''):
+                    event['TURNOVER_TYPE'] = label_text
+    return event
+
+
+def new_sportscode(inst):
+    mapping = SPORTSCODE
+    event = {}
+    category = mapping.category(inst)
+    if category is not None:
+        event['CATEGORY'] = category
+    players = mapping.players(inst)
+    if players:
+        event['PLAYER'] = players[0]
+    event.update(mapping.map_labels(inst, category))
+    return event
+
+
+EMERGENCY_KEYS = {
+    'INFRACCION': 'INFRACTION', 'TIPO DE PENAL': 'PENALTY_TYPE', 'TARJETA': 'CARD',
+    'POSICION-LINE': 'LINE_POSITION', 'CANTIDAD-LINE': 'LINEOUT_QUANTITY',
+    'RESULTADO-LINE': 'LINEOUT_RESULT', 'TIRADOR-LINE': 'LINE_THROWER', 'AVANCE': 'ADVANCE',
+    'VELOCIDAD-RUCK': 'RUCK_SPEED', 'MISC': 'MISC', 'TEXT': 'MISC',
+}
+
+
+def legacy_emergency(inst):
+    event = {'extra_data': {}}
+    players_elem = inst.find('players')
+    if players_elem is not None:
+        players = [p.find('name').text for p in players_elem.findall('Player') if p.find('name') is not None]
+        if players:
+            event['players'] = players
+    for label in inst.findall('.//label'):
+        group, text = label.find('group'), label.find('text')
+        if group is not None and text is not None:
+            key = (group.text or "").strip()
+            value = text.text.strip() if text.text else ""
+            if key in ('EQUIPO', 'JUGADOR', 'ZONA'):
+                event[{'EQUIPO': 'team', 'JUGADOR': 'player', 'ZONA': 'zone'}[key]] = value
+            elif key in ('X', 'Y'):
+                # float('') quedaba en None; el perfil no asigna la coordenada (mismo .get())
+                try:
+                    if value:
+                        event['coordinate_' + key.lower()] = float(value)
+                except ValueError:
+                    pass
+            else:
+                event['extra_data'][EMERGENCY_KEYS.get(key, key)] = value
+    return event
+
+
+def new_emergency(inst):
+    mapping = EMERGENCY
+    event = {'extra_data': {}}
+    players = mapping.players(inst)
+    if players:
+        event['players'] = players
+    columns = mapping.map_labels(inst)
+    event['extra_data'].update(columns.pop('extra_data', {}))
+    event.update(columns)
+    return event
+
+
+CHECKS = (
+    ("enriched", legacy_enriched, new_enriched),
+    ("pescara", legacy_pescara, get_import_profile('pescara').map_labels),
+    ("pescara_attributes", legacy_pescara_attributes,
+     get_import_profile('pescara_attributes').map_labels),
+    ("sportscode", legacy_sportscode, new_sportscode),
+    ("emergency", legacy_emergency, new_emergency),
+)
+
+GROUPS = ["JUGADOR", "jugador", " Jugador ", "EQUIPO", "X", "Y", "x", "TIPO-PUNTOS", "INFRACCION",
+          "Infracción", "TIPO-PERDIDA/RECUPERACIÓN", "RECUPERACION", "AVANCE", "RESULTADO-SCRUM",
+          "RESULT", "TIPO DE PENAL", "KICK TYPE", "ZONA", "MISC", "TEXT", "Jugadores",
+          "COORDINATE_X", "COORDINATE_Y", "POSICION-LINE", "Otro grupo", ""]
+TEXTS = ["PESCARA", "rival", "1", "Penalty-Kick", " drop ", "TRY", "CONVERSION", "12.5", "abc", "",
+         None, "Juan Pérez", "OK", "AVANCE +"]
+CATEGORIES = ["SCRUM", "LINEOUT", "KICK", "INFRACCION", "TURNOVER", "TACKLE", "OTRA"]
+
+
+def random_instance(rng):
+    inst = ET.Element('instance')
+    code = ET.SubElement(inst, 'code')
+    code.text = rng.choice(CATEGORIES)
+    if rng.random() < 0.7:
+        code_label = ET.SubElement(code, 'label')
+        ET.SubElement(code_label, 'group', name=rng.choice(CATEGORIES))
+    if rng.random() < 0.5:
+        players = ET.SubElement(inst, 'players')
+        for _ in range(rng.randint(0, 3)):
+            ET.SubElement(players, 'player', name=rng.choice(TEXTS) or '')
+            player = ET.SubElement(players, 'Player')
+            if rng.random() < 0.9:
+                ET.SubElement(player, 'name').text = rng.choice(TEXTS)
+    for _ in range(rng.randint(0, 8)):
+        label = ET.SubElement(inst, 'label')
+        if rng.random() < 0.3:
+            label.set('group', rng.choice(GROUPS))
+        if rng.random() < 0.85:
+            group = ET.SubElement(label, 'group')
+            group.text = rng.choice(GROUPS) if rng.random() < 0.95 else None
+            if rng.random() < 0.5:
+                group.set('name', rng.choice(GROUPS))
+        if rng.random() < 0.85:
+            ET.SubElement(label, 'text').text = rng.choice(TEXTS)
+    return inst
+
+
+def check(name, legacy, new, instances):
+    for index, inst in enumerate(instances):
+        expected, got = legacy(inst), new(inst)
+        assert expected == got, f"{name} #{index}: {expected} != {got}\n{ET.tostring(inst).decode()}"
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(17)
+    synthetic = [random_instance(rng) for _ in range(count)]
+    for name, legacy, new in CHECKS:
+        check(name, legacy, new, synthetic)
+    print(f"{count} instancias aleatorias: los 5 perfiles coinciden con los conversores anteriores")
+
+    for path in sorted(glob.glob(os.path.join(UPLOADS, '*.xml'))):
+        instances = [ET.fromstring(ET.tostring(i)) for i in iter_instances(path, encoding_errors='ignore')]
+        print(f"\n{os.path.basename(path)}: {len(instances)} instancias")
+        for name, legacy, new in CHECKS:
+            check(name, legacy, new, instances)
+            timings = []
+            for fn in (legacy, new):
+                start = time.perf_counter()
+                for _ in range(5):
+                    for inst in instances:
+                        fn(inst)
+                timings.append((time.perf_counter() - start) / 5 * 1000)
+            print(f"  {name:<20} iguales   if/elif {timings[0]:7.1f}ms   perfil {timings[1]:7.1f}ms")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Verifica y mide TRY_ORIGIN por equipo en la importación de XML:
+sweep_try_origins (un recorrido) vs. la búsqueda por try que hacía
+enrich_events_simple (una lista por comprensión sobre todos los eventos).
+
+Comprueba sobre Polisportiva.xml (y el resto de los XML de uploads/) que
+enrich_events_simple, el algoritmo anterior y resolve_try_origins(by_team=True)
+que usa /events con TRY_ORIGIN_BY_TEAM=1 den los mismos orígenes, y luego
+compara tiempos sobre eventos sintéticos con SECOND repetidos, desordenados
+(se ordenan antes, O(n log n)) y ya ordenados como vienen de un XML (un solo
+recorrido). En los sintéticos con eventos sin TEAM compara con
+resolve_try_origins(by_team=True): esos eventos no son ni tries ni orígenes.
+Uso: python backend/scripts/bench_xml_try_origins.py [tamaños...]
+"""
+
+import sys
+import os
+import glob
+import random
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+from convert_xml_enriched import enrich_events_simple, parse_xml_events
+from enrichment import TEAM_TRY_ORIGIN_CATEGORIES, resolve_try_origins, sweep_try_origins
+
+UPLOADS = os.path.join(os.path.dirname(__file__), '..', 'uploads')
+
+MATCH_INFO = {"team": "Pescara", "opponent": "Polisportiva L'Aquila"}
+PROFILE = {"kick_off_1": 0, "end_1": 2281, "kick_off_2": 2288, "end_2": 4474}
+
+
+def legacy_try_origins(enriched):
+    """Algoritmo anterior de enrich_events_simple (una búsqueda por try)"""
+    origins = [None] * len(enriched)
+    for i, event in enumerate(enriched):
+        if event.get("POINTS") == "TRY":
+            relevant_events = [
+                e for e in enriched
+                if e["CATEGORY"] in TEAM_TRY_ORIGIN_CATEGORIES
+                and e["SECOND"] < event["SECOND"]
+                and e["TEAM"] == event["TEAM"]
+            ]
+            if relevant_events:
+                origins[i] = relevant_events[-1]["CATEGORY"]
+    return origins
+
+
+def sweep(enriched):
+    return sweep_try_origins(
+        [e["SECOND"] for e in enriched], [e["CATEGORY"] for e in enriched], [e["TEAM"] for e in enriched],
+        [e.get("POINTS") == "TRY" for e in enriched], TEAM_TRY_ORIGIN_CATEGORIES)
+
+
+def build_events(n, seed=0, teams=("Pescara", "OPPONENT")):
+    """Eventos sintéticos sin ordenar, con SECOND enteros (muchos empates)"""
+    rng = random.Random(seed)
+    categories = TEAM_TRY_ORIGIN_CATEGORIES + ["RUCK", "TACKLE", "POINTS", "KICK"]
+    events = []
+    for _ in range(n):
+        category = rng.choice(categories)
+        events.append({
+            "SECOND": float(rng.randint(0, max(60, n // 2))),
+            "CATEGORY": category,
+            "TEAM": rng.choice(teams),
+            "POINTS": rng.choice(["TRY", "CONVERSION"]) if category == "POINTS" else None,
+        })
+    return events
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1_000, 5_000, 20_000, 200_000]
+
+    for path in sorted(glob.glob(os.path.join(UPLOADS, '*.xml'))):
+        enriched = enrich_events_simple(parse_xml_events(path, PROFILE), MATCH_INFO, PROFILE)
+        expected = legacy_try_origins(enriched)
+        assert [e["TRY_ORIGIN"] for e in enriched] == expected, f"{path}: enrich_events_simple distinto"
+        frame = resolve_try_origins(pd.DataFrame(enriched), TEAM_TRY_ORIGIN_CATEGORIES, by_team=True)
+        assert frame.tolist() == expected, f"{path}: resolve_try_origins(by_team=True) distinto"
+        tries = sum(1 for e in enriched if e.get("POINTS") == "TRY")
+        with_origin = sum(1 for origin in expected if origin)
+        print(f"{os.path.basename(path)}: {len(enriched)} eventos, {tries} tries, {with_origin} con origen - iguales")
+
+    print(f"\n{'eventos':>10} {'desordenados':>14} {'ordenados':>14} {'por try':>14}")
+    for n in sizes:
+        events = build_events(n)
+        fast, t_fast = timed(sweep, events)
+        # Copias nuevas: que los dicts no queden dispersos en memoria respecto de la lista
+        ordered = [dict(e) for e in sorted(events, key=lambda e: e["SECOND"])]
+        _, t_ordered = timed(sweep, ordered)
+        # Con eventos sin TEAM: igual que resolve_try_origins(by_team=True)
+        untagged = build_events(min(n, 20_000), seed=1, teams=("Pescara", "OPPONENT", None))
+        expected = resolve_try_origins(pd.DataFrame(untagged), TEAM_TRY_ORIGIN_CATEGORIES, by_team=True)
+        assert sweep(untagged) == expected.tolist(), "Eventos sin TEAM: distinto de resolve_try_origins"
+        if n <= 20_000:
+            slow, t_slow = timed(legacy_try_origins, events)
+            assert fast == slow, "Los resultados no coinciden"
+            legacy = f"{t_slow * 1000:>12.1f}ms"
+        else:
+            legacy = f"{'-':>14}"
+        print(f"{n:>10} {t_fast * 1000:>12.1f}ms {t_ordered * 1000:>12.1f}ms {legacy}")
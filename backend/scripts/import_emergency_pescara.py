@@ -8,28 +8,25 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-import xml.etree.ElementTree as ET
 from datetime import datetime
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from models import Base, Club, Team, Match, Event, Player, TeamPlayer
+from bulk_import import bulk_insert, event_rows
+from xml_import import get_import_profile
+from xml_stream import iter_instances
 
-# Configuración de BD
+# Configuración de BD (SQL_ECHO=1 para ver cada sentencia)
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./rugby_data.db')
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(DATABASE_URL, echo=os.getenv('SQL_ECHO', '0') == '1')
 SessionLocal = sessionmaker(bind=engine)
 
-# Crear tablas si no existen
-Base.metadata.create_all(bind=engine)
-
 def parse_longomatch_xml(xml_path):
     """Parsea XML de LongoMatch con estructura específica"""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-    
     events = []
+    mapping = get_import_profile('emergency')
     
-    for instance in root.findall('.//instance'):
+    for instance in iter_instances(xml_path):
         event = {
             'start': float(instance.find('start').text),
             'end': float(instance.find('end').text),
@@ -38,65 +35,14 @@ def parse_longomatch_xml(xml_path):
         }
         
         # Parsear players (si existe el tag <players>)
-        players_elem = instance.find('players')
-        if players_elem is not None:
-            players_list = []
-            for player in players_elem.findall('Player'):
-                player_name = player.find('name')
-                if player_name is not None:
-                    players_list.append(player_name.text)
-            if players_list:
-                event['players'] = players_list
-        
-        # Parsear labels
-        for label in instance.findall('.//label'):
-            group = label.find('group')
-            text = label.find('text')
-            
-            if group is not None and text is not None:
-                key = group.text.strip()
-                value = text.text.strip() if text.text else ""
-                
-                # Mapeo de campos conocidos de LongoMatch
-                if key == 'EQUIPO':
-                    event['team'] = value
-                elif key == 'JUGADOR':
-                    event['player'] = value
-                elif key == 'INFRACCION':
-                    event['extra_data']['INFRACTION'] = value
-                elif key == 'TIPO DE PENAL':
-                    event['extra_data']['PENALTY_TYPE'] = value
-                elif key == 'TARJETA':
-                    event['extra_data']['CARD'] = value
-                elif key == 'POSICION-LINE':
-                    event['extra_data']['LINE_POSITION'] = value
-                elif key == 'CANTIDAD-LINE':
-                    event['extra_data']['LINEOUT_QUANTITY'] = value
-                elif key == 'RESULTADO-LINE':
-                    event['extra_data']['LINEOUT_RESULT'] = value
-                elif key == 'TIRADOR-LINE':
-                    event['extra_data']['LINE_THROWER'] = value
-                elif key == 'ZONA':
-                    event['zone'] = value
-                elif key == 'AVANCE':
-                    event['extra_data']['ADVANCE'] = value
-                elif key == 'VELOCIDAD-RUCK':
-                    event['extra_data']['RUCK_SPEED'] = value
-                elif key == 'X':
-                    try:
-                        event['coordinate_x'] = float(value) if value else None
-                    except ValueError:
-                        pass
-                elif key == 'Y':
-                    try:
-                        event['coordinate_y'] = float(value) if value else None
-                    except ValueError:
-                        pass
-                elif key == 'MISC' or key == 'TEXT':
-                    event['extra_data']['MISC'] = value
-                else:
-                    # Otros campos van a extra_data
-                    event['extra_data'][key] = value
+        players_list = mapping.players(instance)
+        if players_list:
+            event['players'] = players_list
+        
+        # Parsear labels con el perfil "emergency": campos del modelo Event y el resto a extra_data
+        columns = mapping.map_labels(instance)
+        event['extra_data'].update(columns.pop('extra_data', {}))
+        event.update(columns)
         
         events.append(event)
     
@@ -105,6 +51,8 @@ def parse_longomatch_xml(xml_path):
 def import_match_emergency(xml_path, video_url):
     """Importa el partido directamente a la BD"""
     
+    # Crear tablas si no existen
+    Base.metadata.create_all(bind=engine)
     db = SessionLocal()
     
     try:
@@ -147,7 +95,8 @@ def import_match_emergency(xml_path, video_url):
             video_url=video_url
         )
         db.add(match)
-        db.commit()
+        # Sin commit: el partido y sus eventos se guardan en una sola transacción
+        db.flush()
         print(f"\n🏉 PARTIDO CREADO:")
         print(f"   ID: {match.id}")
         print(f"   {match.team.name} vs {match.opponent_name}")
@@ -166,22 +115,10 @@ def import_match_emergency(xml_path, video_url):
         penalty_count = 0
         lineout_count = 0
         
+        # INSERT por lotes en la transacción de la sesión
+        inserted = bulk_insert(db.connection(), Event.__table__, event_rows(events, match.id))
+        
         for event_data in events:
-            event = Event(
-                match_id=match.id,
-                event_type=event_data['event_type'],
-                start_time=event_data['start'],
-                end_time=event_data['end'],
-                team=event_data.get('team'),
-                player_name=event_data.get('player'),
-                zone=event_data.get('zone'),
-                coordinate_x=event_data.get('coordinate_x'),
-                coordinate_y=event_data.get('coordinate_y'),
-                extra_data=event_data.get('extra_data', {})
-            )
-            
-            db.add(event)
-            
             # Contadores
             event_type = event_data['event_type']
             event_counts[event_type] = event_counts.get(event_type, 0) + 1
@@ -202,6 +139,7 @@ def import_match_emergency(xml_path, video_url):
             print(f"   {event_type:<20} : {count:>3} eventos")
         
         print(f"\n🎯 ESTADÍSTICAS CLAVE:")
+        print(f"   💾 Insertados    : {inserted}")
         print(f"   🚫 Penalties     : {penalty_count}")
         print(f"   📏 Lineouts      : {lineout_count}")
         print(f"   🏉 Match ID      : {match.id}")
@@ -0,0 +1,100 @@
+"""
+Conversión de DataFrames de eventos a registros listos para JSON.
+
+La limpieza se hace por columna según su dtype (NaN/NaT -> None, Timestamp ->
+ISO 8601, Timedelta -> str) y los registros se arman con un solo zip sobre
+las columnas, en lugar de to_dict(orient='records') seguido de un segundo
+recorrido clave por clave de cada evento.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    infer_dtype,
+    is_bool_dtype,
+    is_datetime64_any_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+    is_timedelta64_dtype,
+)
+
+# Tipos inferidos que pueden esconder Timestamp/Timedelta dentro de una columna object
+_MIXED_KINDS = {"mixed", "mixed-integer", "datetime", "datetime64", "date", "timedelta", "timedelta64", "period"}
+
+
+def _json_value(value):
+    """Limpieza de un valor suelto (solo para columnas object heterogéneas)"""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, pd.Timedelta):
+        return str(value)
+    return value
+
+
+def column_values(series):
+    """Devuelve la columna como lista de valores nativos serializables a JSON"""
+    if is_datetime64_any_dtype(series.dtype):
+        return [None if pd.isna(v) else v.isoformat() for v in series.astype(object)]
+    if is_timedelta64_dtype(series.dtype):
+        return [None if pd.isna(v) else str(v) for v in series.astype(object)]
+    if is_float_dtype(series.dtype):
+        values = series.to_numpy(dtype=float)
+        result = values.astype(object)
+        result[np.isnan(values)] = None
+        return result.tolist()
+    if is_bool_dtype(series.dtype) and not series.hasnans:
+        return series.to_numpy(dtype=bool).tolist()
+    if is_integer_dtype(series.dtype) and not series.hasnans:
+        return series.to_numpy(dtype=np.int64).tolist()
+
+    values = series.to_numpy(dtype=object, na_value=None)
+    if infer_dtype(values, skipna=True) in _MIXED_KINDS:
+        return [_json_value(v) for v in values]
+    return values.tolist()
+
+
+def frame_to_records(df):
+    """Equivalente limpio de df.to_dict(orient='records') para respuestas JSON"""
+    columns = list(df.columns)
+    if df.empty:
+        return []
+    data = [column_values(df[column]) for column in columns]
+    return [dict(zip(columns, row)) for row in zip(*data)]
+
+
+# Marca de "clave omitida" en compact_records
+_OMIT = object()
+
+
+def _is_empty(value):
+    """Valores que el clean_row de los conversores Excel quitaba del registro"""
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return value != value
+    if isinstance(value, list):
+        return not value
+    return isinstance(value, str) and value == 'undefined'
+
+
+def compact_records(df):
+    """
+    Registros sin las claves vacías (None, NaN, listas vacías o 'undefined'),
+    como hacía clean_row fila por fila. Los valores no se convierten: el
+    resultado se sigue escribiendo con to_json como antes.
+    """
+    columns = list(df.columns)
+    if df.empty:
+        return []
+
+    data = []
+    for column in columns:
+        series = df[column]
+        values = series.to_numpy(dtype=object)
+        if is_float_dtype(series.dtype):
+            values = values.copy()
+            values[np.isnan(series.to_numpy(dtype=float))] = _OMIT
+        elif not (is_integer_dtype(series.dtype) or is_bool_dtype(series.dtype)
+                  or is_datetime64_any_dtype(series.dtype) or is_timedelta64_dtype(series.dtype)):
+            values = [_OMIT if _is_empty(v) else v for v in values]
+        data.append(values)
+    return [{k: v for k, v in zip(columns, row) if v is not _OMIT} for row in zip(*data)]
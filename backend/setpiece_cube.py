@@ -0,0 +1,252 @@
+"""
+Cubo de conteos de formaciones fijas y tackles.
+
+Los gráficos de efectividad (LineoutEffectivityChart, ScrumEffectivityChart,
+TacklesEffectivityChart) cuentan eventos ganados/perdidos filtrando todos los
+eventos por CATEGORY, descriptor (LINE_RESULT, SCRUM_RESULT, ADVANCE), TEAM y
+Time_Group. Aquí cada partido se reduce una sola vez a un cubo: una fila por
+combinación de dimensiones presente, con las medidas events/won/lost. Los
+cubos de varios partidos se concatenan (la temporada es otro cubo, con
+MATCH_ID como dimensión), y las consultas filtran y suman sobre esas pocas
+filas sin volver a los eventos. Los cubos de temporada se arman con las
+columnas de origen (CUBE_INPUT_COLUMNS) leídas del almacén Parquet: el
+Time_Group se calcula con game_time_groups, sin enriquecer cada partido.
+Los cubos de un partido se guardan por separado según el camino (el de
+/stats/set-pieces?match_id=, con el Time_Group enriquecido, y el de la
+temporada) y los caches son LRU acotados.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from enrichment import game_time_groups
+from event_query import QueryError
+from match_cache import lru_get, lru_put
+from prepared_response import PreparedJSON
+from serialization import frame_to_records
+
+# Descriptor que hace de RESULT en cada categoría
+RESULT_COLUMNS = {
+    "LINEOUT": "LINE_RESULT",
+    "SCRUM": "SCRUM_RESULT",
+    "TACKLE": "ADVANCE",
+    "MISSED-TACKLE": "ADVANCE",
+}
+CUBE_CATEGORIES = list(RESULT_COLUMNS)
+
+# Dimensiones del cubo, en orden; el parámetro de consulta es el nombre en minúsculas
+DIMENSIONS = ["MATCH_ID", "CATEGORY", "SIDE", "TEAM", "RESULT", "LINE_POSITION", "Time_Group"]
+QUERY_DIMENSIONS = {dimension.lower(): dimension for dimension in DIMENSIONS}
+MEASURES = ["events", "won", "lost"]
+# Columnas de los eventos con las que se arma un cubo (sin Time_Group, que se calcula)
+CUBE_INPUT_COLUMNS = ["CATEGORY", "SECOND", "PERIODS", "TEAM", "LINE_POSITION"] + \
+    sorted(set(RESULT_COLUMNS.values()))
+# Tamaño de los caches: cubos por partido y por temporada
+MAX_MATCH_CUBES = 256
+MAX_SEASON_CUBES = 32
+
+# Mismo criterio que los gráficos de efectividad
+WON = {
+    "LINEOUT": {"CLEAN", "DIRTY"},
+    "SCRUM": {"WIN"},
+}
+LOST = {
+    "LINEOUT": {"LOST L", "NOT-STRAIGHT"},
+    "SCRUM": {"LOST"},
+}
+
+# Valor de una dimensión sin dato (se devuelve como null)
+MISSING = ""
+
+
+def _values(df, name):
+    """Columna como array de objetos (todo None si no existe)"""
+    if name in df.columns:
+        return df[name].to_numpy(dtype=object)
+    return np.full(len(df), None, dtype=object)
+
+
+def _labels(values):
+    """Valores de una dimensión como texto, con MISSING para los nulos"""
+    return np.array([MISSING if v is None or v != v else str(v) for v in values], dtype=object)
+
+
+def match_cube(df, match_id, time_groups=None):
+    """
+    Cubo de un partido: columnas DIMENSIONS + MEASURES, una fila por
+    combinación. time_groups reemplaza la columna Time_Group de df.
+    """
+    if time_groups is None:
+        time_groups = _values(df, 'Time_Group')
+    category = _values(df, 'CATEGORY')
+    rows = np.isin(category, CUBE_CATEGORIES)
+    if not rows.any():
+        return pd.DataFrame(columns=DIMENSIONS + MEASURES)
+
+    category = category[rows]
+    team = _values(df, 'TEAM')[rows]
+    result = np.full(rows.sum(), None, dtype=object)
+    for name, column in RESULT_COLUMNS.items():
+        of_category = category == name
+        result[of_category] = _values(df, column)[rows][of_category]
+    result = _labels(result)
+
+    won = category == 'TACKLE'
+    lost = category == 'MISSED-TACKLE'
+    for name, values in WON.items():
+        won |= (category == name) & np.isin(result, list(values))
+    for name, values in LOST.items():
+        lost |= (category == name) & np.isin(result, list(values))
+
+    facts = pd.DataFrame({
+        "MATCH_ID": match_id,
+        "CATEGORY": category,
+        "SIDE": np.where(team == 'OPPONENT', 'OPPONENT', 'OWN'),
+        "TEAM": _labels(team),
+        "RESULT": result,
+        "LINE_POSITION": np.where(category == 'LINEOUT', _labels(_values(df, 'LINE_POSITION')[rows]), MISSING),
+        "Time_Group": _labels(np.asarray(time_groups, dtype=object)[rows]),
+        "events": 1,
+        "won": won.astype(np.int64),
+        "lost": lost.astype(np.int64),
+    })
+    return facts.groupby(DIMENSIONS, sort=True, as_index=False)[MEASURES].sum()
+
+
+def source_cube(df, match_id):
+    """Cubo de un partido a partir de sus columnas de origen (CUBE_INPUT_COLUMNS)"""
+    df = df.copy()
+    for column in CUBE_INPUT_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    return match_cube(df, match_id, time_groups=game_time_groups(df))
+
+
+def combine_cubes(cubes):
+    """Un solo cubo con las filas de varios (cada una conserva su MATCH_ID)"""
+    cubes = [cube for cube in cubes if len(cube)]
+    if not cubes:
+        return pd.DataFrame(columns=DIMENSIONS + MEASURES)
+    return pd.concat(cubes, ignore_index=True)
+
+
+def parse_cube_query(args):
+    """
+    Parámetros -> ({dimensión: [valores]}, [dimensiones de by]). Los filtros
+    usan el nombre de la dimensión en minúsculas (category=LINEOUT,SCRUM,
+    side=OWN, time_group=...); by=CATEGORY,SIDE elige por qué agrupar.
+    """
+    filters = {}
+    for name in args:
+        if name in ('match_id', 'season', 'by'):
+            continue
+        dimension = QUERY_DIMENSIONS.get(name.lower())
+        if dimension is None:
+            raise QueryError(f"Dimensión desconocida: {name}")
+        values = [v.strip() for raw in args.getlist(name) for v in raw.split(',') if v.strip()]
+        if values:
+            filters.setdefault(dimension, []).extend(values)
+
+    by = []
+    for raw in args.getlist('by'):
+        for name in raw.split(','):
+            if not name.strip():
+                continue
+            dimension = QUERY_DIMENSIONS.get(name.strip().lower())
+            if dimension is None:
+                raise QueryError(f"Dimensión desconocida en by: {name.strip()}")
+            if dimension not in by:
+                by.append(dimension)
+    return filters, by
+
+
+def query_cube(cube, filters=None, by=None):
+    """
+    Filtra el cubo (slice) y suma las medidas agrupando por `by` (roll-up de
+    las demás dimensiones). Agrega effectivity = won / (won + lost).
+    """
+    by = list(by or [])
+    mask = np.ones(len(cube), dtype=bool)
+    for dimension, values in (filters or {}).items():
+        column = cube[dimension]
+        if dimension == 'MATCH_ID':
+            mask &= column.astype(str).isin(values).to_numpy()
+        else:
+            mask &= column.isin(values).to_numpy()
+    sliced = cube[mask]
+
+    if by:
+        result = sliced.groupby(by, sort=True, as_index=False)[MEASURES].sum()
+    else:
+        result = pd.DataFrame([sliced[MEASURES].sum()], columns=MEASURES)
+    result[MEASURES] = result[MEASURES].astype(np.int64)
+
+    decided = result['won'] + result['lost']
+    result['effectivity'] = (result['won'] / decided.where(decided > 0)).round(4)
+    return result
+
+
+def _records(result):
+    records = frame_to_records(result)
+    for record in records:
+        for key, value in record.items():
+            if value == MISSING:
+                record[key] = None
+    return records
+
+
+class SetPieceCubeCache:
+    def __init__(self, max_matches=MAX_MATCH_CUBES, max_seasons=MAX_SEASON_CUBES):
+        self.max_matches = max_matches
+        self.max_seasons = max_seasons
+        self._lock = threading.Lock()
+        self._matches = OrderedDict()
+        self._seasons = OrderedDict()
+
+    def match_cube(self, match_id, version, read, build=source_cube, source='store'):
+        """
+        Cubo del partido para `version` de sus datos; read(columnas) devuelve
+        sus eventos y build(eventos, match_id) arma el cubo si hace falta.
+        `source` separa los cubos de LoadedMatch ('loaded') de los del
+        almacén ('store'): sus versiones no se pueden comparar entre sí.
+        """
+        key = (source, match_id)
+        with self._lock:
+            entry = lru_get(self._matches, key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        cube = build(read(CUBE_INPUT_COLUMNS), match_id)
+        with self._lock:
+            lru_put(self._matches, key, (version, cube), self.max_matches)
+        return cube
+
+    def for_match(self, match_id, loaded):
+        """Cubo del partido para la versión actual de sus datos (con su Time_Group enriquecido)"""
+        return self.match_cube(match_id, loaded.version, lambda columns: loaded.df, build=match_cube,
+                               source='loaded')
+
+    def for_season(self, season, matches):
+        """
+        Cubo de `matches`, una lista de (match_id, versión, read) como la de
+        match_cube, formado con los cubos de cada partido. Solo se rearma si
+        cambió algún partido; una temporada sin partidos no se guarda.
+        """
+        versions = tuple(sorted((match_id, version) for match_id, version, _ in matches))
+        with self._lock:
+            entry = lru_get(self._seasons, season)
+            if entry is not None and entry[0] == versions:
+                return entry[1]
+        cube = combine_cubes([self.match_cube(match_id, version, read)
+                              for match_id, version, read in sorted(matches, key=lambda item: item[0])])
+        if versions:
+            with self._lock:
+                lru_put(self._seasons, season, (versions, cube), self.max_seasons)
+        return cube
+
+    def respond(self, cube, args, **scope):
+        """PreparedJSON con el resultado de la consulta de args sobre cube"""
+        filters, by = parse_cube_query(args)
+        result = query_cube(cube, filters, by)
+        return PreparedJSON(dict(scope, by=by, filters=filters, rows=_records(result)))
@@ -0,0 +1,122 @@
+"""
+Ida y vuelta por el almacén Parquet: put/sync/read_events, quitar partidos
+y varias sincronizaciones simultáneas sobre un almacén vacío.
+"""
+import json
+import os
+import threading
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from event_store import EventStore  # noqa: E402
+
+HEADER = {"TEAM": "San Benedetto", "OPPONENT": "Prato", "COMPETITION": "SERIE B 24-25"}
+
+
+def write_match(folder, name, events, header=HEADER):
+    matriz = os.path.join(folder, f"matriz{name}.json")
+    matches = os.path.join(folder, f"matches{name}.json")
+    with open(matriz, 'w') as f:
+        json.dump(events, f)
+    with open(matches, 'w') as f:
+        json.dump([header], f)
+    return matriz, matches
+
+
+def build_events(n, offset=0):
+    return [{"SECOND": float(offset + i), "CATEGORY": ["TACKLE", "RUCK", "LINEOUT"][i % 3],
+             "TEAM": "OPPONENT" if i % 2 else "San Benedetto",
+             # PLAYER mezcla texto y listas: se guarda como JSON
+             "PLAYER": ["A", "B"] if i % 5 == 0 else f"P{i % 7}"} for i in range(n)]
+
+
+@pytest.fixture
+def folder(tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    return str(uploads)
+
+
+def test_sync_and_read_column_subset(folder, tmp_path):
+    pairs = {"a": write_match(folder, "A", build_events(30)), "b": write_match(folder, "B", build_events(12))}
+    store = EventStore(str(tmp_path / "store"))
+    entries, failed = store.sync(pairs)
+
+    assert failed == {}
+    assert sorted(entry['match_id'] for entry in entries) == ["a", "b"]
+    assert all(entry['season'] == "24-25" for entry in entries)
+
+    df = store.read_events("a", columns=["CATEGORY", "PLAYER", "MISSING"])
+    assert list(df.columns) == ["CATEGORY", "PLAYER"]
+    assert df['PLAYER'].tolist() == [event['PLAYER'] for event in build_events(30)]
+    lineouts = store.read_events("a", columns=["CATEGORY"], categories=["LINEOUT"])
+    assert set(lineouts['CATEGORY']) == {"LINEOUT"} and len(lineouts) == 10
+
+    # Un almacén nuevo sobre la misma carpeta lee el manifiesto
+    assert EventStore(str(tmp_path / "store")).read_events("b")['SECOND'].tolist() == [float(i) for i in range(12)]
+
+
+def test_sync_refreshes_changed_and_removes_missing(folder, tmp_path):
+    pairs = {"a": write_match(folder, "A", build_events(30)), "b": write_match(folder, "B", build_events(12))}
+    store = EventStore(str(tmp_path / "store"))
+    (a, b), _ = store.sync(pairs)
+    removed_path = store._events_path(b)
+
+    write_match(folder, "A", build_events(5, offset=100))
+    os.utime(pairs["a"][0], (1, 1))
+    entries, failed = store.sync({"a": pairs["a"]})
+
+    assert failed == {} and [entry['match_id'] for entry in entries] == ["a"]
+    assert entries[0]['version'] != a['version']
+    assert store.read_events("a")['SECOND'].tolist() == [100.0 + i for i in range(5)]
+    assert [entry['match_id'] for entry in store.matches()] == ["a"]
+    assert not os.path.exists(removed_path)
+    with pytest.raises(KeyError):
+        store.read_events("b")
+
+
+def test_failed_refresh_keeps_previous_entry(folder, tmp_path):
+    pairs = {"a": write_match(folder, "A", build_events(30))}
+    store = EventStore(str(tmp_path / "store"))
+    (entry,), _ = store.sync(pairs)
+
+    # El JSON queda a medio escribir: no se puede leer, pero el partido guardado sigue valiendo
+    with open(pairs["a"][0], 'w') as f:
+        f.write('[{"SECOND": 1')
+    entries, failed = store.sync(pairs)
+
+    assert list(failed) == ["a"]
+    assert entries == [entry]
+    assert len(store.read_events("a")) == 30
+
+
+def test_concurrent_sync_on_cold_store(folder, tmp_path):
+    pairs = {name: write_match(folder, name, build_events(2000, offset=i)) for i, name in enumerate("ABCD")}
+    store = EventStore(str(tmp_path / "store"))
+    results, errors = [], []
+    barrier = threading.Barrier(8)
+
+    def run():
+        try:
+            barrier.wait()
+            entries, failed = store.sync(pairs)
+            results.append((sorted(entry['match_id'] for entry in entries), failed))
+            for entry in entries:
+                store.read_events(entry['match_id'], columns=["SECOND"])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert results == [(list("ABCD"), {})] * 8
+    for name in "ABCD":
+        assert len(store.read_events(name)) == 2000
+    leftovers = [f for _, _, files in os.walk(store.root) for f in files if f.endswith('.tmp')]
+    assert leftovers == []
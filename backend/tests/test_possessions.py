@@ -0,0 +1,82 @@
+"""
+segment_possessions debe dar los mismos ORIGIN, END y PHASES que el
+calculate_attack_defence fila por fila de /convert_excel_to_json_2, sobre
+la matriz de SERIE_B_PRATO_match_2.xlsx y sobre matrices sintéticas.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from enrichment import (
+    POSSESSION_CATEGORIES,
+    POSSESSION_END_CATEGORIES,
+    POSSESSION_ORIGIN_CATEGORIES,
+    RUCK_CATEGORY,
+    segment_possessions,
+)
+
+EXCEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'uploads', 'SERIE_B_PRATO_match_2.xlsx')
+CATEGORIES = (["TACKLE", "KICK", "MISSED-TACKLE", RUCK_CATEGORY, RUCK_CATEGORY] + POSSESSION_CATEGORIES
+              + POSSESSION_ORIGIN_CATEGORIES + POSSESSION_END_CATEGORIES)
+
+
+def legacy_attack_defence(df):
+    """Algoritmo original de convert_excel_to_json_2 (tres filtros completos por fila)"""
+    def calculate_attack_defence(row, df):
+        if row['CATEGORY'] in ['ATTACK', 'DEFENCE']:
+            origin_events = ['KICK-OFF', 'TURNOVER+', 'SCRUM', 'LINEOUT', 'PENALTY', 'FREE-KICK']
+            relevant_origin = df[(df['CATEGORY'].isin(origin_events)) & (df['SECOND'] < row['SECOND'])]
+            origin = relevant_origin.iloc[-1] if not relevant_origin.empty else None
+
+            end_events = ['PENALTY', 'TURNOVER-', 'POINTS']
+            relevant_end = df[(df['CATEGORY'].isin(end_events)) & (df['SECOND'] > row['SECOND'])]
+            end = relevant_end.iloc[0] if not relevant_end.empty else None
+
+            ruck_events = df[(df['CATEGORY'] == 'RUCK') & (df['SECOND'] >= (origin['SECOND'] if origin is not None else 0)) & (df['SECOND'] <= (end['SECOND'] if end is not None else row['SECOND']))]
+            phases = len(ruck_events) + 1 if not ruck_events.empty else 1
+
+            row['ORIGIN'] = origin['CATEGORY'] if origin is not None else None
+            row['END'] = end['CATEGORY'] if end is not None else None
+            row['PHASES'] = phases
+        return row
+    return df.apply(lambda row: calculate_attack_defence(row, df), axis=1)
+
+
+def build_events(n, seed):
+    """Matriz sintética con SECOND desordenado, repetidos y algunos huecos"""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, n, size=n).astype(float)
+    seconds[rng.random(n) < 0.02] = np.nan
+    return pd.DataFrame({"SECOND": seconds, "CATEGORY": rng.choice(CATEGORIES, size=n)})
+
+
+def assert_same_possessions(df):
+    fast = segment_possessions(df)
+    slow = legacy_attack_defence(df)
+
+    mask = df['CATEGORY'].isin(POSSESSION_CATEGORIES)
+    assert mask.any()
+    for column in ('ORIGIN', 'END'):
+        assert list(fast[column][mask]) == list(slow[column][mask].to_numpy(dtype=object, na_value=None))
+    assert np.array_equal(fast['PHASES'][mask].to_numpy(), slow['PHASES'][mask].to_numpy(dtype=float))
+    assert fast['PHASES'][~mask].isna().all()
+
+
+def test_matches_legacy_on_workbook():
+    if not os.path.exists(EXCEL_PATH):
+        pytest.skip("No está uploads/SERIE_B_PRATO_match_2.xlsx")
+    assert_same_possessions(pd.read_excel(EXCEL_PATH, sheet_name='MATRIZ'))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_legacy(seed):
+    assert_same_possessions(build_events(200, seed))
+
+
+def test_without_columns():
+    df = pd.DataFrame({"CATEGORY": ["ATTACK", "RUCK"]})
+    result = segment_possessions(df)
+    assert list(result['ORIGIN']) == [None, None]
+    assert result['PHASES'].isna().all()
@@ -0,0 +1,72 @@
+"""
+Caches de estadísticas por jugador y cubos de formaciones fijas: los dos
+caminos de un partido no se invalidan entre sí y los caches están acotados.
+"""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from player_stats import PlayerStatsCache
+from setpiece_cube import SetPieceCubeCache
+
+EVENTS = pd.DataFrame({
+    "CATEGORY": ["TACKLE", "LINEOUT", "SCRUM", "TACKLE"],
+    "SECOND": [10.0, 20.0, 30.0, 40.0],
+    "PERIODS": [1, 1, 2, 2],
+    "TEAM": ["San Benedetto", "San Benedetto", "OPPONENT", "OPPONENT"],
+    "PLAYER": ["A", "B", None, "C"],
+    "ADVANCE": ["POSITIVE", None, None, "NEGATIVE"],
+    "LINE_RESULT": [None, "CLEAN", None, None],
+    "SCRUM_RESULT": [None, None, "WIN", None],
+    "Time_Group": ["0'- 20'"] * 4,
+})
+
+
+def counting_reader():
+    reads = []
+
+    def read(columns):
+        reads.append(columns)
+        return EVENTS
+    return read, reads
+
+
+@pytest.fixture(params=["players", "set_pieces"])
+def cache(request):
+    """(cache, per_match(match_id, loaded), per_season(season, matches), tamaños)"""
+    if request.param == "players":
+        stats = PlayerStatsCache(max_matches=4, max_prepared=3)
+        return stats, stats.for_match, stats.for_season, lambda: (len(stats._matches), len(stats._prepared))
+    cubes = SetPieceCubeCache(max_matches=4, max_seasons=3)
+    return cubes, cubes.for_match, cubes.for_season, lambda: (len(cubes._matches), len(cubes._seasons))
+
+
+def test_match_and_season_paths_do_not_rebuild_each_other(cache):
+    _, per_match, per_season, _ = cache
+    loaded = SimpleNamespace(version="loaded-v1", df=EVENTS, header={})
+    read, reads = counting_reader()
+    season_matches = [("m1", "store-v1", read)]
+
+    for _ in range(3):
+        per_match("m1", loaded)
+        per_season("24-25", season_matches)
+        # Otra temporada con el mismo partido reutiliza su resultado por partido
+        per_season(None, season_matches)
+    assert len(reads) == 1
+
+
+def test_caches_are_bounded(cache):
+    _, _, per_season, sizes = cache
+    read, reads = counting_reader()
+    matches = [(f"m{i}", "v1", read) for i in range(6)]
+
+    for i in range(50):
+        per_season(f"typo-{i}", matches[i % 6:i % 6 + 1])
+    match_entries, season_entries = sizes()
+    assert match_entries <= 4 and season_entries <= 3
+
+    # Temporadas sin partidos no se guardan
+    for i in range(50):
+        per_season(f"missing-{i}", [])
+    assert sizes()[1] <= 3
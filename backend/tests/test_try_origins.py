@@ -0,0 +1,105 @@
+"""
+sweep_try_origins (importación de XML, listas) debe dar los mismos orígenes
+que resolve_try_origins (DataFrame) y que la búsqueda por try original,
+sobre uploads/Polisportiva.xml y sobre eventos sintéticos.
+"""
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from convert_xml_enriched import enrich_events_simple, parse_xml_events
+from enrichment import TEAM_TRY_ORIGIN_CATEGORIES, resolve_try_origins, sweep_try_origins
+
+XML_PATH = os.path.join(os.path.dirname(__file__), '..', 'uploads', 'Polisportiva.xml')
+MATCH_INFO = {"team": "Pescara", "opponent": "Polisportiva L'Aquila"}
+PROFILE = {"kick_off_1": 0, "end_1": 2281, "kick_off_2": 2288, "end_2": 4474}
+CATEGORIES = TEAM_TRY_ORIGIN_CATEGORIES + ["RUCK", "TACKLE", "POINTS", "KICK"]
+
+
+def build_events(n, seed, teams=("Pescara", "OPPONENT")):
+    """Eventos desordenados, con SECOND repetidos y algunos sin SECOND"""
+    rng = random.Random(seed)
+    events = []
+    for _ in range(n):
+        category = rng.choice(CATEGORIES)
+        events.append({
+            "SECOND": float("nan") if rng.random() < 0.02 else float(rng.randint(0, n // 4)),
+            "CATEGORY": category,
+            "TEAM": rng.choice(teams),
+            "POINTS": rng.choice(["TRY", "CONVERSION"]) if category == "POINTS" else None,
+        })
+    return events
+
+
+def sweep(events, by_team=True):
+    return sweep_try_origins(
+        [e["SECOND"] for e in events], [e["CATEGORY"] for e in events],
+        [e["TEAM"] for e in events] if by_team else None,
+        [e["POINTS"] == "TRY" for e in events], TEAM_TRY_ORIGIN_CATEGORIES)
+
+
+def resolve(events, by_team=True):
+    return resolve_try_origins(pd.DataFrame(events), TEAM_TRY_ORIGIN_CATEGORIES, by_team=by_team).tolist()
+
+
+def legacy_try_origins(events):
+    """Búsqueda por try que hacía enrich_events_simple"""
+    origins = [None] * len(events)
+    for i, event in enumerate(events):
+        if event.get("POINTS") == "TRY":
+            relevant = [e for e in events
+                        if e["CATEGORY"] in TEAM_TRY_ORIGIN_CATEGORIES
+                        and e["SECOND"] < event["SECOND"] and e["TEAM"] == event["TEAM"]]
+            if relevant:
+                origins[i] = relevant[-1]["CATEGORY"]
+    return origins
+
+
+def test_polisportiva_xml():
+    if not os.path.exists(XML_PATH):
+        pytest.skip("No está uploads/Polisportiva.xml")
+    enriched = enrich_events_simple(parse_xml_events(XML_PATH, PROFILE), MATCH_INFO, PROFILE)
+    origins = [event["TRY_ORIGIN"] for event in enriched]
+
+    assert any(event.get("POINTS") == "TRY" for event in enriched)
+    assert any(origins)
+    assert origins == resolve(enriched)
+    assert origins == legacy_try_origins(enriched)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("by_team", [True, False])
+def test_sweep_matches_resolve(seed, by_team):
+    events = build_events(400, seed)
+    assert sweep(events, by_team) == resolve(events, by_team)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sweep_matches_resolve_when_ordered(seed):
+    events = sorted(build_events(400, seed), key=lambda e: e["SECOND"])
+    assert sweep(events) == resolve(events)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sweep_matches_legacy(seed):
+    events = build_events(300, seed)
+    assert sweep(events) == legacy_try_origins(events)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_events_without_team_are_skipped(seed):
+    events = build_events(400, seed, teams=("Pescara", "OPPONENT", None, float("nan")))
+    origins = sweep(events)
+    assert origins == resolve(events)
+    assert all(origin is None for event, origin in zip(events, origins) if event["TEAM"] is None)
+
+
+def test_origin_in_same_second_does_not_count():
+    events = [
+        {"SECOND": 10.0, "CATEGORY": "SCRUM", "TEAM": "Pescara", "POINTS": None},
+        {"SECOND": 20.0, "CATEGORY": "LINEOUT", "TEAM": "Pescara", "POINTS": None},
+        {"SECOND": 20.0, "CATEGORY": "POINTS", "TEAM": "Pescara", "POINTS": "TRY"},
+    ]
+    assert sweep(events) == [None, None, "SCRUM"]
@@ -0,0 +1,54 @@
+"""
+save_upload: temporales de nombre único y sin pisar archivos existentes
+salvo que se pida.
+"""
+import io
+import os
+import threading
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from conversions import save_upload
+
+
+def upload(content):
+    return FileStorage(stream=io.BytesIO(content), filename="match.xml")
+
+
+def test_refuses_existing_file_unless_overwrite(tmp_path):
+    path = str(tmp_path / "match.xml")
+    save_upload(upload(b"first"), path)
+
+    with pytest.raises(FileExistsError):
+        save_upload(upload(b"second"), path)
+    assert open(path, 'rb').read() == b"first"
+
+    save_upload(upload(b"second"), path, overwrite=True)
+    assert open(path, 'rb').read() == b"second"
+    assert os.listdir(tmp_path) == ["match.xml"]
+
+
+@pytest.mark.parametrize("overwrite", [False, True])
+def test_concurrent_uploads_publish_one_whole_file(tmp_path, overwrite):
+    path = str(tmp_path / "match.xml")
+    contents = [bytes([65 + i]) * 200_000 for i in range(8)]
+    errors = []
+    barrier = threading.Barrier(len(contents))
+
+    def run(content):
+        barrier.wait()
+        try:
+            save_upload(upload(content), path, overwrite=overwrite)
+        except FileExistsError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(content,)) for content in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert open(path, 'rb').read() in contents
+    assert len(errors) == (len(contents) - 1 if not overwrite else 0)
+    assert os.listdir(tmp_path) == ["match.xml"]
@@ -0,0 +1,540 @@
+"""
+Motor único de importación de XML (LongoMatch/Sportscode) guiado por perfiles.
+
+Cada conversor describe en un perfil declarativo cómo se leen las etiquetas
+de un <instance> y a qué columna va cada grupo, en lugar de tener su propia
+cadena de if/elif:
+
+    labels         ruta de las <label>: "label" (hijas directas) o ".//label"
+    group          de dónde sale el grupo: "group" (texto de <group>),
+                   "group@name" (atributo de <group>) o "@group" (atributo de <label>)
+    pairing        "same_label": grupo y texto en la misma <label>;
+                   "group_precedes_text": el texto usa el último grupo visto y lo consume
+    require_group  si es False, una <label> sin grupo se mapea con el grupo ""
+    strip          quitar espacios a grupo y texto (un texto vacío queda como "")
+    match_case     si es False las reglas se buscan con el grupo en mayúsculas
+    rules          {grupo: regla} exactas
+    patterns       [(patrón fnmatch, regla)] para grupos sin regla exacta
+    default        regla para el resto de los grupos (None: se ignoran)
+    category       "code" (texto de <code>) o "code_group@name" (atributo name
+                   del primer <label><group> dentro de <code>)
+    category_map   {categoría original: categoría}
+    players        {"path": ..., "attribute" o "child": ..., "first": bool}
+
+Cada regla indica la columna destino ("seccion.nombre" escribe dentro del
+dict "seccion", p. ej. extra_data; el nombre acepta {group} y {group_key}) y
+opcionalmente:
+
+    append       acumula los textos en una lista
+    type         "float": solo se asigna si el texto es numérico
+    keep_first   no sobrescribe un valor ya asignado
+    values       {TEXTO EN MAYÚSCULAS: valor o {columna: valor}}; si el texto
+                 no está se guarda tal cual junto con las columnas de otherwise
+    by_category  [(patrón de categoría, columna)]: la columna depende de la
+                 categoría del evento
+    nonempty     con texto vacío se aplica la regla default
+
+Cada grupo se resuelve una sola vez contra el perfil (regla exacta, patrón o
+default) y el resultado se guarda en un dict como _Target: la columna ya
+formateada para ese grupo y lo que hay que hacer con el texto. Mapear una
+label es una búsqueda en ese dict y, para las reglas que solo copian el
+texto (la mayoría), una asignación sin llamadas. Las rutas ".//label" se
+recorren con Element.iter, sin pasar por ElementPath.
+"""
+import fnmatch
+
+from xml_stream import iter_instances
+
+# Marca de "grupo todavía no resuelto" en el dict de reglas memorizadas
+_UNRESOLVED = object()
+# Marca de "categoría no calculada" en map_labels (None es una categoría válida: sin categoría)
+_NO_CATEGORY = object()
+
+
+def group_key(group):
+    """Nombre de columna a partir de un grupo: "TIPO-PERDIDA/RECUPERACIÓN" -> "TIPO_PERDIDA_RECUPERACIÓN" """
+    return group.replace('-', '_').replace('/', '_').replace(' ', '_').upper()
+
+
+# Cómo escribe una regla en su columna
+SET, APPEND, KEEP_FIRST = range(3)
+
+
+class _Target:
+    """
+    Regla de un perfil resuelta para un grupo concreto: la columna ya
+    formateada y lo que hay que hacer con el texto. `plain` marca las que
+    solo copian el texto, que map_labels escribe sin llamar a _apply.
+    """
+    __slots__ = ("section", "name", "mode", "as_float", "nonempty", "empty", "values", "otherwise",
+                 "by_category", "chosen", "plain")
+
+    def __init__(self, column, group, mode=SET):
+        section, name = column.split('.', 1) if '.' in column else (None, column)
+        if '{' in name:
+            name = name.format(group=group, group_key=group_key(group))
+        self.section, self.name, self.mode = section, name, mode
+        self.as_float = self.nonempty = False
+        self.empty = self.values = self.otherwise = self.by_category = None
+        self.plain = mode == SET
+
+
+def _resolve_rule(rule, group, default=None):
+    """
+    _Target de una regla del perfil para un grupo. `default` es la regla
+    default del perfil, que se aplica cuando una regla nonempty recibe un
+    texto vacío.
+    """
+    if 'by_category' in rule:
+        target = _Target('', group)
+        target.by_category = [(pattern, _Target(column, group)) for pattern, column in rule['by_category']]
+        # Columna elegida para cada categoría (None si ninguna coincide)
+        target.chosen = {}
+        target.plain = False
+        return target
+
+    mode = APPEND if rule.get('append') else KEEP_FIRST if rule.get('keep_first') else SET
+    target = _Target(rule['column'], group, mode)
+    target.as_float = rule.get('type') == 'float'
+    if rule.get('nonempty'):
+        target.nonempty = True
+        target.empty = _resolve_rule(default, group) if default else None
+    if rule.get('values') is not None:
+        target.values = {
+            key: [(None if column is None else _Target(column, group), value)
+                  for column, value in (mapped if isinstance(mapped, dict) else {None: mapped}).items()]
+            for key, mapped in rule['values'].items()
+        }
+        target.otherwise = [(_Target(column, group), value) for column, value in rule.get('otherwise', {}).items()]
+    target.plain = target.plain and not (target.as_float or target.nonempty or target.values is not None)
+    return target
+
+
+def _write(columns, target, value):
+    """Escribe value en la columna de target según su modo"""
+    section = target.section
+    if section is None:
+        values = columns
+    else:
+        values = columns.get(section)
+        if values is None:
+            values = columns[section] = {}
+    mode = target.mode
+    if mode == SET:
+        values[target.name] = value
+    elif mode == APPEND:
+        # Una columna en None (p. ej. precargada en `columns`) cuenta como lista vacía
+        current = values.get(target.name)
+        if current is None:
+            values[target.name] = [value]
+        else:
+            current.append(value)
+    elif target.name not in values:
+        values[target.name] = value
+
+
+def _apply(columns, target, text, category):
+    """Aplica a una label la regla resuelta target"""
+    if target.by_category is not None:
+        if category is None:
+            return
+        try:
+            chosen = target.chosen[category]
+        except KeyError:
+            chosen = target.chosen[category] = next(
+                (option for pattern, option in target.by_category if fnmatch.fnmatchcase(category, pattern)), None)
+        if chosen is not None:
+            _write(columns, chosen, text)
+        return
+    if target.nonempty and not text:
+        if target.empty is not None:
+            _apply(columns, target.empty, text, category)
+        return
+    if target.as_float:
+        try:
+            value = float(text)
+        except (TypeError, ValueError):
+            return
+        _write(columns, target, value)
+        return
+    if target.values is not None:
+        mapped = target.values.get(text.upper().strip()) if text is not None else None
+        if mapped is None:
+            _write(columns, target, text)
+            for other, value in target.otherwise:
+                _write(columns, other, value)
+            return
+        for other, value in mapped:
+            _write(columns, target if other is None else other, value)
+        return
+    _write(columns, target, text)
+
+
+def _descendant_tag(path):
+    """Etiqueta de una ruta ".//tag" (se recorre con iter()), o None si es otra ruta"""
+    if path.startswith('.//') and '/' not in path[3:] and '[' not in path:
+        return path[3:]
+    return None
+
+
+def _descendants(element, tag):
+    """Como element.findall('.//' + tag) pero con iter(), sin pasar por ElementPath"""
+    if element.tag != tag:
+        return element.iter(tag)
+    return [elem for elem in element.iter(tag) if elem is not element]
+
+
+def _group_source(spec):
+    """
+    (ruta, atributo) de donde sale el grupo de una label: ruta None es la
+    propia label, atributo None es el texto del elemento.
+    """
+    if spec.startswith('@'):
+        return None, spec[1:]
+    if '@' in spec:
+        path, attribute = spec.split('@', 1)
+        return path, attribute
+    return spec, None
+
+
+class ImportProfile:
+    def __init__(self, name, spec):
+        self.name = name
+        self.label_path = spec.get('labels', 'label')
+        self.pairing = spec.get('pairing', 'same_label')
+        self.require_group = spec.get('require_group', True)
+        self.strip = spec.get('strip', False)
+        self.match_case = spec.get('match_case', False)
+        self.category_source = spec.get('category', 'code')
+        self.category_map = dict(spec.get('category_map', {}))
+        self.players_spec = spec.get('players')
+
+        group_spec = spec.get('group', 'group')
+        self._group_path, self._group_attribute = _group_source(group_spec)
+        self._descendant_tag = _descendant_tag(self.label_path)
+        # En "group_precedes_text" solo cuenta una <group> con texto
+        self._group_elem = None if '@' in group_spec else group_spec
+
+        normalize = (lambda key: key) if self.match_case else str.upper
+        self._default = spec.get('default')
+        self._rules = {normalize(group): rule for group, rule in spec.get('rules', {}).items()}
+        self._patterns = [(normalize(pattern), rule) for pattern, rule in spec.get('patterns', [])]
+        self._normalize = normalize
+        self._resolved = {}
+        # (sección, columna) de los grupos cuya regla solo copia el texto
+        self._plain = {}
+        if self.players_spec:
+            self._players_container, self._players_tag = self.players_spec['path'].rsplit('/', 1)
+        self._uses_category = any('by_category' in rule for rule in
+                                  list(self._rules.values()) + [rule for _, rule in self._patterns])
+        # map_labels(instance, category=None, columns=None) aplica las reglas a las labels del
+        # instance y devuelve {columna: valor} (o completa `columns`). Es una función armada con
+        # las opciones del perfil ya fijadas, para no leer atributos en cada instancia.
+        self.map_labels = self._paired_mapper() if self.pairing == 'group_precedes_text' else self._label_mapper()
+        # Valida el perfil: cada regla tiene que poder resolverse
+        for rule in list(self._rules.values()) + [rule for _, rule in self._patterns] + [self._default or {'column': ''}]:
+            _resolve_rule(rule, '', self._default)
+
+    def rule_for(self, group):
+        """
+        Regla (_Target) para un grupo, o None si el grupo se ignora. Se
+        resuelve una vez por grupo: regla exacta, primer patrón o default.
+        """
+        try:
+            return self._resolved[group]
+        except KeyError:
+            pass
+        key = self._normalize(group)
+        rule = self._rules.get(key)
+        if rule is None:
+            for pattern, candidate in self._patterns:
+                if fnmatch.fnmatchcase(key, pattern):
+                    rule = candidate
+                    break
+            else:
+                rule = self._default
+        target = _resolve_rule(rule, group, self._default) if rule else None
+        # Se memoriza con el grupo tal cual viene en el XML: la próxima vez es un solo get
+        self._resolved[group] = target
+        if target is not None and target.plain:
+            self._plain[group] = (target.section, target.name)
+        return target
+
+    def category(self, instance):
+        """Categoría del instance según el perfil, o None si no tiene"""
+        if self.category_source == 'code_group@name':
+            # Igual que code.find('.//label/group'): el primer <group> de una <label> de <code>
+            code = instance.find('code')
+            group = None
+            if code is not None:
+                for label in _descendants(code, 'label'):
+                    group = label.find('group')
+                    if group is not None:
+                        break
+            if group is None:
+                return None
+            category = group.get('name', '')
+        else:
+            code = instance.find('code')
+            if code is None or code.text is None:
+                return None
+            category = code.text
+        return self.category_map.get(category, category)
+
+    def players(self, instance):
+        """Jugadores declarados en un elemento aparte de las labels (p. ej. <players>)"""
+        spec = self.players_spec
+        if not spec:
+            return []
+        # "players/player": hijos <player> del primer <players>
+        container = instance.find(self._players_container)
+        if container is None:
+            return []
+        players = []
+        for elem in container.iterfind(self._players_tag):
+            if 'attribute' in spec:
+                players.append(elem.get(spec['attribute'], ''))
+            else:
+                child = elem.find(spec['child'])
+                if child is None:
+                    continue
+                players.append(child.text)
+            if spec.get('first'):
+                break
+        return players
+
+    def _paired_mapper(self):
+        """map_labels para "group_precedes_text": el texto usa el último grupo visto"""
+        label_path, descendant, group_tag = self.label_path, self._descendant_tag, self._group_elem
+        resolved, rule_for = self._resolved, self.rule_for
+        plain = self._plain
+        category_of = self.category if self._uses_category else None
+
+        def map_labels(instance, category=_NO_CATEGORY, columns=None):
+            if category is _NO_CATEGORY:
+                category = category_of(instance) if category_of is not None else None
+            if columns is None:
+                columns = {}
+            current_group = None
+            labels = instance.findall(label_path) if descendant is None else _descendants(instance, descendant)
+            for label in labels:
+                group_elem = label.find(group_tag)
+                if group_elem is not None and group_elem.text is not None:
+                    current_group = group_elem.text
+                text_elem = label.find('text')
+                if text_elem is not None and text_elem.text is not None and current_group is not None:
+                    target = plain.get(current_group)
+                    if target is not None and target[0] is None:
+                        columns[target[1]] = text_elem.text
+                    else:
+                        rule = resolved.get(current_group, _UNRESOLVED)
+                        if rule is _UNRESOLVED:
+                            rule = rule_for(current_group)
+                        if rule is not None:
+                            _apply(columns, rule, text_elem.text, category)
+                    current_group = None
+            return columns
+        return map_labels
+
+    def _label_mapper(self):
+        """map_labels para "same_label": grupo y texto en la misma <label>"""
+        label_path, descendant = self.label_path, self._descendant_tag
+        resolved, plain, rule_for = self._resolved, self._plain, self.rule_for
+        group_path, group_attribute = self._group_path, self._group_attribute
+        # Caso común: el grupo es el texto de un hijo de la label
+        group_child = group_path if group_attribute is None else None
+        require_group, strip = self.require_group, self.strip
+        category_of = self.category if self._uses_category else None
+
+        def map_labels(instance, category=_NO_CATEGORY, columns=None):
+            if category is _NO_CATEGORY:
+                category = category_of(instance) if category_of is not None else None
+            if columns is None:
+                columns = {}
+            labels = instance.findall(label_path) if descendant is None else _descendants(instance, descendant)
+            for label in labels:
+                text_elem = label.find('text')
+                if text_elem is None:
+                    continue
+                if group_child is not None:
+                    group_elem = label.find(group_child)
+                    if group_elem is not None:
+                        group = group_elem.text or ''
+                    elif require_group:
+                        continue
+                    else:
+                        group = ''
+                else:
+                    if group_path is None:
+                        group = label.get(group_attribute)
+                    else:
+                        group_elem = label.find(group_path)
+                        group = None if group_elem is None else group_elem.get(group_attribute, '')
+                    if group is None:
+                        if require_group:
+                            continue
+                        group = ''
+                text = text_elem.text
+                if strip:
+                    group = group.strip()
+                    text = text.strip() if text else ""
+                # Regla que solo copia el texto: una búsqueda y una asignación
+                target = plain.get(group)
+                if target is not None:
+                    section, name = target
+                    if section is None:
+                        columns[name] = text
+                    else:
+                        values = columns.get(section)
+                        if values is None:
+                            values = columns[section] = {}
+                        values[name] = text
+                    continue
+                rule = resolved.get(group, _UNRESOLVED)
+                if rule is _UNRESOLVED:
+                    rule = rule_for(group)
+                if rule is not None:
+                    _apply(columns, rule, text, category)
+            return columns
+        return map_labels
+
+    def parse(self, source, encoding_errors=None):
+        """Genera (instance, columnas) para cada <instance> del archivo, en streaming"""
+        for instance in iter_instances(source, encoding_errors=encoding_errors):
+            yield instance, self.map_labels(instance)
+
+
+# --- perfiles de los conversores existentes ---------------------------------
+
+IMPORT_PROFILES = {
+    # convert_xml_enriched.parse_xml_events: pares group/text en cada label
+    "enriched": {
+        "labels": "label",
+        "strip": True,
+        "rules": {
+            "JUGADOR": {"column": "players", "append": True, "nonempty": True},
+            "EQUIPO": {"column": "extra_data.EQUIPO"},
+            "X": {"column": "x", "type": "float"},
+            "Y": {"column": "y", "type": "float"},
+        },
+        "default": {"column": "extra_data.{group}"},
+    },
+    # convert_xml.py (Pescara): el <text> usa el último <group> visto
+    "pescara": {
+        "labels": "label",
+        "pairing": "group_precedes_text",
+        "rules": {
+            "EQUIPO": {"column": "TEAM", "values": {
+                "RIVAL": "OPPONENT", "AVEZZANO": "OPPONENT",
+                "PESCARA": "PESCARA", "1": "PESCARA", "2": "PESCARA",
+            }},
+            "JUGADOR": {"column": "PLAYER"},
+            "TIPO-PUNTOS": {"column": "POINTS", "values": {
+                "PENALTY-KICK": {"POINTS": "PEN", "POINTS(VALUE)": 3},
+                "PENALTY KICK": {"POINTS": "PEN", "POINTS(VALUE)": 3},
+                "DROP P": {"POINTS": "DG", "POINTS(VALUE)": 3},
+                "DROP": {"POINTS": "DG", "POINTS(VALUE)": 3},
+                "CONVERSION": {"POINTS": "CON", "POINTS(VALUE)": 2},
+                "CON": {"POINTS": "CON", "POINTS(VALUE)": 2},
+                "TRY": {"POINTS": "TRY", "POINTS(VALUE)": 5},
+            }, "otherwise": {"POINTS(VALUE)": 0}},
+            "INFRACCION": {"column": "INFRACTION_TYPE"},
+            "INFRACCIÓN": {"column": "INFRACTION_TYPE"},
+            "AVANCE": {"column": "ADVANCE"},
+        },
+        "patterns": [
+            ("*TIPO-PERDIDA*", {"column": "TURNOVER_TYPE"}),
+            ("*RECUPERACI*", {"column": "TURNOVER_TYPE"}),
+        ],
+        "default": {"column": "{group_key}"},
+    },
+    # convert_xml_pescara.py (raíz del repo): grupo como atributo de <label>
+    "pescara_attributes": {
+        "labels": ".//label",
+        "group": "@group",
+        "require_group": False,
+        "match_case": True,
+        "rules": {
+            "Jugadores": {"column": "PLAYER", "keep_first": True},
+            "COORDINATE_X": {"column": "COORDINATE_X", "type": "float"},
+            "COORDINATE_Y": {"column": "COORDINATE_Y", "type": "float"},
+        },
+    },
+    # xml_to_json_pescara.py: grupos como atributo name y columnas según la categoría
+    "sportscode": {
+        "labels": ".//label",
+        "group": "group@name",
+        "require_group": False,
+        "match_case": True,
+        "category": "code_group@name",
+        "category_map": {
+            'EQUIPO': 'TEAM',
+            'INFRACCION': 'INFRACTION',
+            'PENAL': 'PENALTY',
+            'SCRUM': 'SCRUM',
+            'LINEOUT': 'LINEOUT',
+            'TACKLE': 'TACKLE',
+            'RUCK': 'RUCK',
+            'KICK': 'KICK',
+            'TRY': 'POINTS',
+            'TURNOVER': 'TURNOVER+',
+            'DEFENSA': 'DEFENSE',
+            'ATAQUE': 'ATTACK',
+        },
+        "players": {"path": "players/player", "attribute": "name", "first": True},
+        "patterns": [
+            ("*RESULTADO*", {"by_category": [("SCRUM", "SCRUM_RESULT"), ("LINEOUT", "LINE_RESULT")]}),
+            ("*RESULT*", {"by_category": [("SCRUM", "SCRUM_RESULT"), ("LINEOUT", "LINE_RESULT")]}),
+            ("*TIPO*", {"by_category": [("KICK", "KICK_TYPE"), ("*INFRACTION*", "INFRACTION_TYPE"),
+                                        ("*TURNOVER*", "TURNOVER_TYPE")]}),
+            ("*TYPE*", {"by_category": [("KICK", "KICK_TYPE"), ("*INFRACTION*", "INFRACTION_TYPE"),
+                                        ("*TURNOVER*", "TURNOVER_TYPE")]}),
+        ],
+    },
+    # scripts/import_emergency_pescara.py: campos del modelo Event y extra_data
+    "emergency": {
+        "labels": ".//label",
+        "strip": True,
+        "match_case": True,
+        "players": {"path": "players/Player", "child": "name"},
+        "rules": {
+            "EQUIPO": {"column": "team"},
+            "JUGADOR": {"column": "player"},
+            "INFRACCION": {"column": "extra_data.INFRACTION"},
+            "TIPO DE PENAL": {"column": "extra_data.PENALTY_TYPE"},
+            "TARJETA": {"column": "extra_data.CARD"},
+            "POSICION-LINE": {"column": "extra_data.LINE_POSITION"},
+            "CANTIDAD-LINE": {"column": "extra_data.LINEOUT_QUANTITY"},
+            "RESULTADO-LINE": {"column": "extra_data.LINEOUT_RESULT"},
+            "TIRADOR-LINE": {"column": "extra_data.LINE_THROWER"},
+            "ZONA": {"column": "zone"},
+            "AVANCE": {"column": "extra_data.ADVANCE"},
+            "VELOCIDAD-RUCK": {"column": "extra_data.RUCK_SPEED"},
+            "X": {"column": "coordinate_x", "type": "float"},
+            "Y": {"column": "coordinate_y", "type": "float"},
+            "MISC": {"column": "extra_data.MISC"},
+            "TEXT": {"column": "extra_data.MISC"},
+        },
+        "default": {"column": "extra_data.{group}"},
+    },
+}
+
+_compiled = {}
+
+
+def get_import_profile(name):
+    """Perfil compilado por nombre (se compila la primera vez que se pide)"""
+    profile = _compiled.get(name)
+    if profile is None:
+        if name not in IMPORT_PROFILES:
+            raise KeyError(f"Perfil de importación desconocido: {name}")
+        profile = _compiled[name] = ImportProfile(name, IMPORT_PROFILES[name])
+    return profile
+
+
+def register_import_profile(name, spec):
+    """Agrega (o reemplaza) un perfil; se compila al validarlo"""
+    profile = ImportProfile(name, spec)
+    IMPORT_PROFILES[name] = spec
+    _compiled[name] = profile
+    return profile
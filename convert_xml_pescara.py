@@ -1,10 +1,14 @@
-import xml.etree.ElementTree as ET
 import json
+import os
+import sys
 from datetime import datetime
 
-# Parsear XML - ruta dentro del contenedor Docker
-tree = ET.parse('/app/uploads/20251019 Az-Pescara (2) 2.xml')
-root = tree.getroot()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from xml_import import get_import_profile
+from xml_stream import iter_instances
+
+# XML - ruta dentro del contenedor Docker (se recorre en streaming más abajo)
+xml_path = '/app/uploads/20251019 Az-Pescara (2) 2.xml'
 
 # Obtener info del partido
 match_info = {
@@ -15,8 +19,9 @@ match_info = {
 
 matriz = []
 id_counter = 1
+mapping = get_import_profile('pescara_attributes')
 
-for instance in root.findall('.//instance'):
+for instance in iter_instances(xml_path):
     code = instance.find('code')
     if code is None:
         continue
@@ -54,27 +59,8 @@ for instance in root.findall('.//instance'):
         "OPPONENT": match_info["OPPONENT"]
     }
     
-    # Agregar players si existen
-    players = instance.find('.//label[@group="Jugadores"]')
-    if players is not None and players.find('text') is not None:
-        event["PLAYER"] = players.find('text').text
-    
-    # Agregar coordenadas si existen
-    for label in instance.findall('.//label'):
-        group = label.get('group', '')
-        text_elem = label.find('text')
-        if text_elem is not None:
-            text = text_elem.text
-            if group == 'COORDINATE_X':
-                try:
-                    event["COORDINATE_X"] = float(text)
-                except:
-                    pass
-            elif group == 'COORDINATE_Y':
-                try:
-                    event["COORDINATE_Y"] = float(text)
-                except:
-                    pass
+    # Jugador (primer label "Jugadores") y coordenadas según el perfil "pescara_attributes"
+    event.update(mapping.map_labels(instance))
     
     matriz.append(event)
     id_counter += 1
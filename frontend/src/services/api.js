@@ -4,10 +4,43 @@ const api = axios.create({
     baseURL: 'http://localhost:5001'
 });
 
-export const uploadFile = (file) => {
+export const uploadFile = (file, fields = {}) => {
     const formData = new FormData();
     formData.append('file', file);
+    Object.entries(fields).forEach(([key, value]) => formData.append(key, value));
     return api.post('/upload', formData);
 };
 
-export const getEvents = () => api.get('/events');
\ No newline at end of file
+export const getJob = (jobId) => api.get(`/jobs/${encodeURIComponent(jobId)}`);
+
+export const getJobs = () => api.get('/jobs');
+
+export const getEvents = (params) => api.get('/events', { params });
+
+export const getMatches = () => api.get('/matches');
+
+export const getMatchEvents = (matchId, params) => api.get(`/matches/${encodeURIComponent(matchId)}/events`, { params });
+
+export const getEventsAt = (matchId, t, params) => api.get(`/matches/${encodeURIComponent(matchId)}/events/at`, { params: { ...params, t } });
+
+export const getEventsInRange = (matchId, t0, t1, params) => api.get(`/matches/${encodeURIComponent(matchId)}/events/range`, { params: { ...params, t0, t1 } });
+
+export const getPlayerStats = (params) => api.get('/stats/players', { params });
+
+export const getSetPieceStats = (params) => api.get('/stats/set-pieces', { params });
+
+export const createLiveMatch = (body = {}) => api.post('/live/matches', body);
+
+export const getLiveMatch = (matchId) => api.get(`/live/matches/${encodeURIComponent(matchId)}/events`);
+
+export const postLiveEvents = (matchId, events) => api.post(`/live/matches/${encodeURIComponent(matchId)}/events`, events);
+
+// Suscripción SSE: onMessage recibe { seq, first_position, events, updated, aggregates };
+// onReset se llama si el servidor ya no tiene los mensajes perdidos (volver a pedir getLiveMatch)
+export const subscribeLiveMatch = (matchId, { lastEventId, onMessage, onReset } = {}) => {
+    const query = lastEventId != null ? `?last_event_id=${encodeURIComponent(lastEventId)}` : '';
+    const source = new EventSource(`${api.defaults.baseURL}/live/matches/${encodeURIComponent(matchId)}/stream${query}`);
+    source.addEventListener('events', (event) => onMessage && onMessage(JSON.parse(event.data)));
+    source.addEventListener('reset', (event) => onReset && onReset(JSON.parse(event.data)));
+    return source;
+};
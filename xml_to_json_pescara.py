@@ -3,10 +3,15 @@
 Script para convertir XML de LongoMatch al formato JSON que espera app.py
 Genera matriz.json (eventos) y matches.json (info del partido)
 """
-import xml.etree.ElementTree as ET
 import json
+import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from xml_import import get_import_profile
+from xml_stream import iter_instances
+
 def parse_longomatch_to_json(xml_file_path, match_info):
     """
     Convierte XML de LongoMatch al formato JSON esperado por app.py
@@ -19,29 +24,13 @@ def parse_longomatch_to_json(xml_file_path, match_info):
         'result': '0-0'
     }
     """
-    tree = ET.parse(xml_file_path)
-    root = tree.getroot()
-    
     events = []
     event_id = 1
     
-    # Mapeo de categorías de LongoMatch a formato esperado
-    category_mapping = {
-        'EQUIPO': 'TEAM',
-        'INFRACCION': 'INFRACTION',
-        'PENAL': 'PENALTY',
-        'SCRUM': 'SCRUM',
-        'LINEOUT': 'LINEOUT',
-        'TACKLE': 'TACKLE',
-        'RUCK': 'RUCK',
-        'KICK': 'KICK',
-        'TRY': 'POINTS',
-        'TURNOVER': 'TURNOVER+',
-        'DEFENSA': 'DEFENSE',
-        'ATAQUE': 'ATTACK'
-    }
+    # Categorías, jugador y etiquetas según el perfil "sportscode" de xml_import
+    mapping = get_import_profile('sportscode')
     
-    for instance in root.findall('.//instance'):
+    for instance in iter_instances(xml_file_path):
         event = {}
         
         # ID
@@ -69,42 +58,18 @@ def parse_longomatch_to_json(xml_file_path, match_info):
             duration_sec = (end_ms - int(start_elem.text)) / 1000.0
             event['DURATION'] = duration_sec
         
-        # Categoría del evento
-        code_elem = instance.find('code')
-        if code_elem is not None:
-            group_elem = code_elem.find('.//label/group')
-            if group_elem is not None:
-                category_raw = group_elem.get('name', '')
-                event['CATEGORY'] = category_mapping.get(category_raw, category_raw)
+        # Categoría del evento (group name del <code>, traducida por category_map)
+        category = mapping.category(instance)
+        if category is not None:
+            event['CATEGORY'] = category
         
         # Jugador
-        players_elem = instance.find('players')
-        if players_elem is not None:
-            player_elem = players_elem.find('player')
-            if player_elem is not None:
-                event['PLAYER'] = player_elem.get('name', '')
+        players = mapping.players(instance)
+        if players:
+            event['PLAYER'] = players[0]
         
-        # Etiquetas adicionales (text dentro de label)
-        labels = instance.findall('.//label')
-        for label in labels:
-            text_elem = label.find('text')
-            if text_elem is not None:
-                label_text = text_elem.text
-                group_name = label.find('group').get('name', '') if label.find('group') is not None else ''
-                
-                # Asignar según el tipo de etiqueta
-                if 'RESULTADO' in group_name or 'RESULT' in group_name:
-                    if event.get('CATEGORY') == 'SCRUM':
-                        event['SCRUM_RESULT'] = label_text
-                    elif event.get('CATEGORY') == 'LINEOUT':
-                        event['LINE_RESULT'] = label_text
-                elif 'TIPO' in group_name or 'TYPE' in group_name:
-                    if event.get('CATEGORY') == 'KICK':
-                        event['KICK_TYPE'] = label_text
-                    elif 'INFRACTION' in event.get('CATEGORY', ''):
-                        event['INFRACTION_TYPE'] = label_text
-                    elif 'TURNOVER' in event.get('CATEGORY', ''):
-                        event['TURNOVER_TYPE'] = label_text
+        # Etiquetas adicionales: la columna de RESULTADO/TIPO depende de la categoría
+        event.update(mapping.map_labels(instance, category))
         
         # Determinar períodos (primeros 40min = periodo 1, resto = periodo 2)
         if 'SECOND' in event: